@@ -0,0 +1,30 @@
+"""Store the webhook envelope on webhook_events for claim-check task messages
+
+Revision ID: b7e2c4d9a1f3
+Revises: 80b8196606cc
+Create Date: 2026-10-18 09:12:41.503214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4d9a1f3'
+down_revision: Union[str, Sequence[str], None] = '80b8196606cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('webhook_events', sa.Column('event_id', sa.String(), nullable=True))
+    op.add_column('webhook_events', sa.Column('event_timestamp', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('webhook_events', 'event_timestamp')
+    op.drop_column('webhook_events', 'event_id')
@@ -0,0 +1,129 @@
+"""Range-partition webhook_events, processed_events and audit_logs by created_at
+
+Revision ID: c4f8a2e6d0b5
+Revises: b7e2c4d9a1f3
+Create Date: 2026-10-18 11:37:05.281946
+
+Existing rows are copied into partitions covering their created_at range.
+Later partitions are created by app.core.table_partitions (Celery beat).
+
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2e6d0b5'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c4d9a1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_DAYS = 14
+
+# table -> (partition interval, indexes as (name, columns, unique before partitioning))
+TABLES = {
+    'webhook_events': ('day', [
+        ('ix_webhook_events_event_type', ['event_type'], False),
+        ('ix_webhook_events_id', ['id'], False),
+        ('ix_webhook_events_idempotency_key', ['idempotency_key'], True),
+        ('ix_webhook_events_service_name', ['service_name'], False),
+        ('ix_webhook_events_status', ['status'], False),
+        ('ix_webhook_events_tenant_id', ['tenant_id'], False),
+    ]),
+    'processed_events': ('day', [
+        ('ix_processed_events_event_hash', ['event_hash'], True),
+        ('ix_processed_events_id', ['id'], False),
+    ]),
+    'audit_logs': ('month', [
+        ('ix_audit_logs_id', ['id'], False),
+        ('ix_audit_logs_tenant_id', ['tenant_id'], False),
+    ]),
+}
+
+
+def _start(moment: datetime, interval: str) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    if interval == 'month':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next(start: datetime, interval: str) -> datetime:
+    if interval == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _name(table: str, start: datetime, interval: str) -> str:
+    return f"{table}_p{start:%Y%m}" if interval == 'month' else f"{table}_p{start:%Y%m%d}"
+
+
+def _swap_out(table: str, indexes) -> str:
+    """Rename the current table out of the way and free its constraint/index names"""
+    old = f"{table}_old"
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    for name, _, _ in indexes:
+        op.drop_index(name, table_name=old)
+    if table == 'audit_logs':
+        op.execute(f'ALTER TABLE {old} DROP CONSTRAINT IF EXISTS audit_logs_user_id_fkey')
+        op.execute(f'DROP POLICY IF EXISTS tenant_isolation ON {old}')
+    return old
+
+
+def _finish(table: str, old: str, indexes, unique: bool):
+    """Recreate indexes, keys and policies on the new table, copy the rows and drop the old one"""
+    for name, columns, was_unique in indexes:
+        op.create_index(name, table, columns, unique=was_unique and unique)
+    if table == 'audit_logs':
+        op.create_foreign_key('audit_logs_user_id_fkey', 'audit_logs', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+        op.execute("ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;")
+        op.execute(
+            "CREATE POLICY tenant_isolation on audit_logs \
+                USING (\
+            current_setting('app.is_super_admin', true) = 'true'\
+            OR tenant_id = current_setting('app.current_tenant')::uuid\
+        );",
+        )
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'DROP TABLE {old}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+
+    for table, (interval, indexes) in TABLES.items():
+        old = _swap_out(table, indexes)
+        op.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (created_at, id)')
+
+        oldest = bind.execute(sa.text(f'SELECT min(created_at) FROM {old}')).scalar() or now
+        start = _start(oldest, interval)
+        while start <= now + timedelta(days=PREMAKE_DAYS):
+            end = _next(start, interval)
+            op.execute(
+                f"CREATE TABLE {_name(table, start, interval)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            start = end
+        # Catches rows outside the created ranges, e.g. if maintenance stops running
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        _finish(table, old, indexes, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (_, indexes) in TABLES.items():
+        old = _swap_out(table, indexes)
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+        _finish(table, old, indexes, unique=True)
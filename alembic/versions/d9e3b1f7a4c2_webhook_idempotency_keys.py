@@ -0,0 +1,52 @@
+"""Add webhook_idempotency_keys, claimed before an event is dispatched
+
+Revision ID: d9e3b1f7a4c2
+Revises: c4f8a2e6d0b5
+Create Date: 2026-10-18 23:40:12.604318
+
+webhook_events is partitioned, so its idempotency_key can no longer be
+unique; this unpartitioned table holds one row per event instead. It is
+seeded with the events that were already processed.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e3b1f7a4c2'
+down_revision: Union[str, Sequence[str], None] = 'c4f8a2e6d0b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'webhook_idempotency_keys',
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhook_idempotency_keys_id'), 'webhook_idempotency_keys', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_webhook_idempotency_keys_idempotency_key'), 'webhook_idempotency_keys', ['idempotency_key'], unique=True
+    )
+    op.execute(
+        "INSERT INTO webhook_idempotency_keys (idempotency_key, status, claimed_at) "
+        "SELECT idempotency_key, 'completed', max(created_at) FROM webhook_events "
+        "WHERE status IN ('completed', 'archived') GROUP BY idempotency_key"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_webhook_idempotency_keys_idempotency_key'), table_name='webhook_idempotency_keys')
+    op.drop_index(op.f('ix_webhook_idempotency_keys_id'), table_name='webhook_idempotency_keys')
+    op.drop_table('webhook_idempotency_keys')
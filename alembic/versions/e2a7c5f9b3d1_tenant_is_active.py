@@ -0,0 +1,31 @@
+"""Add tenants.is_active, cleared when a tenant is deactivated
+
+Revision ID: e2a7c5f9b3d1
+Revises: d9e3b1f7a4c2
+Create Date: 2026-10-18 14:05:47.318204
+
+Existing tenants stay active. The tenant cache only treats active tenants
+as existing, so deactivation is also what stops their webhooks.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c5f9b3d1'
+down_revision: Union[str, Sequence[str], None] = 'd9e3b1f7a4c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tenants', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tenants', 'is_active')
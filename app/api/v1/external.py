@@ -9,8 +9,9 @@ import structlog
 
 from app.core.settings import settings
 from app.core.database import get_db, get_tenant_db
-from app.integrations.external_client import ApiClientConfig, ExternalApiClient
+from app.integrations.external_client import ApiClientFactory
 from app.schemas.tenant import TenantResponse, TenantUpdate
+from app.services.integration_health import integration_health
 from app.services.tenant import TenantService
 from app.api.deps import (
     get_current_tenant_admin,
@@ -29,11 +30,7 @@ router = APIRouter()
 
 @router.post("/users", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def call_external_user_service(db: Session = Depends(get_db)):
-
-    config = ApiClientConfig(
-        base_url=settings.EXTERNAL_USER_SERVICE_URL,
-    )
-    print("BASE_URL", config.base_url)
+    client = ApiClientFactory.get_client("user_management")
 
     try:
         users = db.query(User).all()
@@ -47,7 +44,6 @@ async def call_external_user_service(db: Session = Depends(get_db)):
             "tenant_id": user.tenant_id.__str__(),
         }
 
-        client = ExternalApiClient(config)
         response = await client.post("/users", data=data)
         print("ressssyyyy",response)
         return response
@@ -62,10 +58,7 @@ async def call_external_user_service(db: Session = Depends(get_db)):
 
 @router.post("/payment", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def call_external_payment_service(db: Session = Depends(get_db)):
-    config = ApiClientConfig(
-        base_url=settings.EXTERNAL_PAYMENT_SERVICE_URL,
-    )
-    client = ExternalApiClient(config)
+    client = ApiClientFactory.get_client("payment_service")
 
     try:
         users = db.query(User).all()
@@ -111,10 +104,7 @@ async def call_external_payment_service(db: Session = Depends(get_db)):
 
 @router.post("/notifications", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def call_external_comms_service(db: Session = Depends(get_db)):
-    config = ApiClientConfig(
-        base_url=settings.EXTERNAL_COMMS_SERVICE_URL,
-    )
-    client = ExternalApiClient(config)
+    client = ApiClientFactory.get_client("communication_service")
 
     try:
         users = db.query(User).all()
@@ -140,3 +130,15 @@ async def call_external_comms_service(db: Session = Depends(get_db)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to call external comms service",
         )
+
+
+@router.get("/health", response_model=dict)
+async def external_services_health():
+    """Latest health probe results per external service"""
+    return {"services": await integration_health.get_summary()}
+
+
+@router.get("/pools", response_model=dict)
+async def external_client_pools():
+    """Connection pool usage of the pooled external service clients"""
+    return {"services": ApiClientFactory.pool_stats()}
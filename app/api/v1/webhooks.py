@@ -1,16 +1,97 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
+import asyncio
 import logging
 
 import structlog
-from app.core.event_pipeline import event_emitter
+from app.api.deps import get_current_super_admin
+from app.core.backpressure import LoadShedError, webhook_budget
+from app.core.event_pipeline import dispatch_event, processing_pipeline
+from app.core.partitioned_executor import partitioned_executor
+from app.core.queue_telemetry import queue_telemetry
+from app.core.settings import settings
+from app.core.tenant_scheduler import tenant_scheduler
 from app.integrations.webhook import webhook_receiver, WebhookSource, WebhookSignatureError, WebhookTimestampError
-from app.tasks import celery as celery_app
+from app.integrations.webhook_signature import signature_verifier
+from app.integrations.webhook_stream import append_webhook, append_webhooks
+from app.models.user import User
+from app.schemas.webhooks import WebhookReplayRequest
+from app.services.webhook_replay import ReplayFilter, WebhookReplayer, replay_manager
+from app.tasks.webhook import enqueue_bulk_webhook_events, enqueue_webhook_event
 
 router = APIRouter()
 security = HTTPBearer()
 logger = structlog.get_logger(__name__)
 
+def release_budget_when_done(future, source: WebhookSource):
+    """Return the event's slot in the in-flight budget once it has been processed"""
+    def _release(done_future):
+        webhook_budget.release(source.value)
+        if not done_future.cancelled():
+            done_future.exception()  # failures are already logged by the scheduler
+    future.add_done_callback(_release)
+
+async def ingest_to_stream(request: Request, source: WebhookSource, signature, timestamp) -> JSONResponse:
+    """Verify the webhook and append it to the source's Redis Stream for stream consumers"""
+    try:
+        body = await webhook_receiver.read_verified_body(request, source, signature, timestamp)
+    except (WebhookSignatureError, WebhookTimestampError) as e:
+        logger.warning(f"Webhook validation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        entry_id = await append_webhook(source, body, dict(request.headers))
+    except Exception as e:
+        logger.error(f"Failed to append webhook to stream: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Webhook ingestion unavailable, retry later",
+            headers={"Retry-After": "5"}
+        )
+
+    return JSONResponse(status_code=202, content={"status": "accepted", "stream_id": entry_id})
+
+async def ingest_to_queue(request: Request, source: WebhookSource, signature, timestamp) -> JSONResponse:
+    """Verify and parse the webhook, then queue it for a Celery worker (claim check)"""
+    try:
+        payload = await webhook_receiver.process_webhook(
+            request=request,
+            source=source,
+            signature=signature,
+            timestamp=timestamp
+        )
+    except (WebhookSignatureError, WebhookTimestampError) as e:
+        logger.warning(f"Webhook validation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        task = await asyncio.to_thread(enqueue_webhook_event, payload)
+    except Exception as e:
+        logger.error(f"Failed to queue webhook: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Webhook ingestion unavailable, retry later",
+            headers={"Retry-After": "5"}
+        )
+
+    if task is None:
+        return JSONResponse(status_code=200, content={"status": "duplicate", "event_id": payload.event_id})
+    return JSONResponse(status_code=202, content={"status": "accepted", "event_id": payload.event_id, "task_id": task.id})
+
+def resolve_source(service_name: str, request: Request):
+    """Webhook source for the route, with its signature and timestamp headers"""
+    try:
+        source = WebhookSource(service_name)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Unknown webhook source")
+
+    headers = request.headers
+    config = webhook_receiver.configs.get(source)
+    if not config:
+        raise HTTPException(status_code=400, detail=f"No config for webhook source: {service_name}")
+    return source, headers.get(config.signature_header), headers.get(config.timestamp_header)
+
 @router.post("/{service_name}")
 async def receive_webhook(
     service_name: str,
@@ -20,17 +101,22 @@ async def receive_webhook(
     Receive webhook from external services
     This endpoint handles webhooks from multiple external services
     """
-    try:
-        source = WebhookSource(service_name)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Unknown webhook source")
+    source, signature, timestamp = resolve_source(service_name, request)
 
-    headers = request.headers
-    config = webhook_receiver.configs.get(source)
-    if not config:
-        raise HTTPException(status_code=400, detail=f"No config for webhook source: {service_name}")
-    signature = headers.get(config.signature_header)
-    timestamp = headers.get(config.timestamp_header)
+    if settings.WEBHOOK_INGEST_MODE == "stream":
+        return await ingest_to_stream(request, source, signature, timestamp)
+    if settings.WEBHOOK_INGEST_MODE == "queue":
+        return await ingest_to_queue(request, source, signature, timestamp)
+
+    try:
+        webhook_budget.acquire(source.value)
+    except LoadShedError as e:
+        logger.warning(f"Shedding webhook load: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail="Webhook processing is over capacity, retry later",
+            headers={"Retry-After": str(e.retry_after_seconds)}
+        )
 
     try:
         
@@ -41,43 +127,183 @@ async def receive_webhook(
             timestamp=timestamp
         )
     except (WebhookSignatureError, WebhookTimestampError) as e:
+        webhook_budget.release(source.value)
         logger.warning(f"Webhook validation failed: {e}")
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException as e:
+        webhook_budget.release(source.value)
         raise e
     except Exception as e:
+        webhook_budget.release(source.value)
         logger.error(f"Webhook processing error: {e}")
         raise HTTPException(status_code=400, detail="Invalid webhook payload")
 
-    event_emitter.emit_future(payload.event_type, payload)
+    release_budget_when_done(tenant_scheduler.submit(payload, dispatch_event), source)
 
     return {"status": "ok", "event_id": payload.event_id}
 
 
+@router.post("/{service_name}/batch")
+async def receive_webhook_batch(
+    service_name: str,
+    request: Request
+):
+    """
+    Receive a batch of webhooks as NDJSON or a JSON array.
+    One signature covers the whole body; each event gets its own status:
+    accepted, duplicate, rejected (unparseable) or shed (over capacity).
+    """
+    source, signature, timestamp = resolve_source(service_name, request)
+
+    try:
+        body = await webhook_receiver.read_verified_body(
+            request, source, signature, timestamp, max_size=settings.WEBHOOK_BATCH_MAX_PAYLOAD_SIZE
+        )
+    except (WebhookSignatureError, WebhookTimestampError) as e:
+        logger.warning(f"Webhook batch validation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = []
+    parsed = []
+    for index, (raw, item) in enumerate(webhook_receiver.parse_batch(body, source)):
+        if index >= settings.WEBHOOK_BATCH_MAX_EVENTS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch exceeds {settings.WEBHOOK_BATCH_MAX_EVENTS} events"
+            )
+        if isinstance(item, HTTPException):
+            results.append({"index": index, "status": "rejected", "error": item.detail})
+        else:
+            results.append({"index": index, "event_id": item.event_id, "status": "accepted"})
+            parsed.append((index, raw, item))
+
+    duplicates = await processing_pipeline.filter_duplicate_events([payload for _, _, payload in parsed])
+    fresh = []
+    for (index, raw, payload), is_duplicate in zip(parsed, duplicates):
+        if is_duplicate:
+            results[index]["status"] = "duplicate"
+        else:
+            fresh.append((index, raw, payload))
+
+    if settings.WEBHOOK_INGEST_MODE == "stream" and fresh:
+        try:
+            entry_ids = await append_webhooks(source, [raw for _, raw, _ in fresh], dict(request.headers))
+        except Exception as e:
+            logger.error(f"Failed to append webhook batch to stream: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Webhook ingestion unavailable, retry later",
+                headers={"Retry-After": "5"}
+            )
+        for (index, _, _), entry_id in zip(fresh, entry_ids):
+            results[index]["stream_id"] = entry_id
+    elif settings.WEBHOOK_INGEST_MODE == "queue" and fresh:
+        try:
+            job = await asyncio.to_thread(enqueue_bulk_webhook_events, [payload for _, _, payload in fresh])
+        except Exception as e:
+            logger.error(f"Failed to queue webhook batch: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Webhook ingestion unavailable, retry later",
+                headers={"Retry-After": "5"}
+            )
+        for index, _, _ in fresh:
+            if job is None:
+                results[index]["status"] = "duplicate"
+            else:
+                results[index]["task_id"] = job.id
+    else:
+        for index, _, payload in fresh:
+            try:
+                webhook_budget.acquire(source.value)
+            except LoadShedError as e:
+                results[index]["status"] = "shed"
+                results[index]["retry_after_seconds"] = e.retry_after_seconds
+                continue
+            release_budget_when_done(tenant_scheduler.submit(payload, dispatch_event), source)
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    logger.info(f"Received webhook batch from {source.value}: {counts}")
+    return {"status": "ok", "counts": counts, "events": results}
+
+
 @router.get("/health")
 async def webhook_health_check():
-    """Health check endpoint for webhook processing system"""
+    """Health check endpoint for webhook processing system, answered from the cached telemetry snapshot"""
     
-    try:
-        inspect = celery_app.control.inspect()
-        active_workers = inspect.active()
-        if not active_workers:
-            return {
-                "status": "unhealthy",
-                "message": "No active Celery workers found",
-                "workers": 0
-            }
-        total_workers = len(active_workers)
-        return {
-            "status": "healthy",
-            "message": "Webhook processing system is operational",
-            "workers": total_workers,
-            "worker_details": active_workers
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+    snapshot = await queue_telemetry.get_snapshot()
+    if snapshot.get("error"):
         return {
             "status": "unhealthy",
-            "message": f"Health check failed: {str(e)}",
+            "message": f"Health check failed: {snapshot['error']}",
             "workers": 0
-        }
\ No newline at end of file
+        }
+    return queue_telemetry.health(snapshot)
+
+
+@router.get("/telemetry")
+async def webhook_queue_telemetry():
+    """Queue depths, oldest message ages, live workers, task runtimes and the autoscaling signal"""
+    return await queue_telemetry.get_snapshot()
+
+
+@router.get("/pipeline/stats")
+async def webhook_pipeline_stats():
+    """Per-middleware timings for the webhook processing pipeline"""
+    return {
+        "middleware": processing_pipeline.get_middleware_stats(),
+        "scheduler": tenant_scheduler.get_stats(),
+        "budget": webhook_budget.get_stats(),
+        "partitions": partitioned_executor.get_stats(),
+        "signatures": signature_verifier.get_stats()
+    }
+
+
+@router.post("/admin/replay", status_code=202)
+async def start_webhook_replay(
+    replay: WebhookReplayRequest,
+    current_user: User = Depends(get_current_super_admin)
+):
+    """Re-drive stored webhook events through the pipeline (Super Admin only)"""
+    replayer = WebhookReplayer(
+        rate_per_second=replay.rate_per_second,
+        concurrency=replay.concurrency,
+        bypass_dedup=replay.bypass_dedup
+    )
+    report = replay_manager.start(replayer, ReplayFilter(
+        sources=replay.sources,
+        event_types=replay.event_types,
+        tenant_ids=replay.tenant_ids,
+        statuses=replay.statuses,
+        since=replay.since,
+        until=replay.until,
+        limit=replay.limit
+    ))
+    logger.info(f"Webhook replay {report.replay_id} started by {current_user.id}")
+    return report.to_dict()
+
+
+@router.get("/admin/replay/{replay_id}")
+async def get_webhook_replay(
+    replay_id: str,
+    current_user: User = Depends(get_current_super_admin)
+):
+    """Progress and throughput of a replay (Super Admin only)"""
+    report = replay_manager.reports.get(replay_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    return report.to_dict()
+
+
+@router.delete("/admin/replay/{replay_id}")
+async def cancel_webhook_replay(
+    replay_id: str,
+    current_user: User = Depends(get_current_super_admin)
+):
+    """Stop a running replay (Super Admin only)"""
+    if not replay_manager.cancel(replay_id):
+        raise HTTPException(status_code=404, detail="No running replay with that id")
+    return {"status": "cancelling", "replay_id": replay_id}
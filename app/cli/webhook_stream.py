@@ -0,0 +1,55 @@
+import asyncio
+from typing import List, Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from app.integrations import event_processors  # noqa: F401  registers the event handlers
+from app.integrations.webhook import WebhookSource
+from app.integrations.webhook_stream import WebhookStreamConsumer
+
+app = typer.Typer(name="webhook-stream", help="Consume webhooks ingested into Redis Streams")
+console = Console()
+
+
+def _sources(source: Optional[List[str]]) -> Optional[List[WebhookSource]]:
+    return [WebhookSource(s) for s in source] if source else None
+
+
+@app.command()
+def consume(
+    source: Optional[List[str]] = typer.Option(None, help="Source(s) to consume; defaults to all"),
+    consumer: Optional[str] = typer.Option(None, help="Consumer name within the group"),
+    batch_size: Optional[int] = typer.Option(None, help="Entries read per XREADGROUP call")
+):
+    """Run a webhook stream consumer until interrupted"""
+    worker = WebhookStreamConsumer(sources=_sources(source), consumer_name=consumer, batch_size=batch_size)
+    console.print(f"📥 Consuming webhook streams as {worker.consumer_name}", style="bold blue")
+
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        console.print("🛑 Consumer stopped", style="bold yellow")
+
+
+@app.command()
+def lag(source: Optional[List[str]] = typer.Option(None, help="Source(s) to inspect; defaults to all")):
+    """Show stream length and pending entries per source"""
+    worker = WebhookStreamConsumer(sources=_sources(source))
+
+    async def _lag():
+        await worker.ensure_groups()
+        return await worker.get_lag()
+
+    table = Table(title="Webhook Streams")
+    table.add_column("Source", style="cyan")
+    table.add_column("Length", style="magenta")
+    table.add_column("Pending", style="yellow")
+    for name, info in asyncio.run(_lag()).items():
+        table.add_row(name, str(info["length"]), str(info["pending"]))
+    console.print(table)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,202 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import structlog
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db_session
+from app.core.settings import settings
+from app.models.audit_log import AuditLog
+
+logger = structlog.get_logger(__name__)
+
+AUDIT_COLUMNS = (
+    "event_type", "resource_type", "resource_id", "user_id", "tenant_id", "user_email",
+    "ip_address", "user_agent", "endpoint", "old_values", "new_values", "data", "created_at",
+)
+
+_PENDING_KEY = "pending_audit_entries"
+
+
+class AuditSink:
+    """
+    Buffered audit log writer.
+
+    Entries are queued in memory and written by a background thread with one
+    multi-row INSERT every max_batch_size entries or flush_interval_ms. Durable
+    entries (strict mode, AUDIT_DURABLE_EVENT_TYPES or durable=True) skip the
+    buffer and are written in the caller's transaction, or immediately if there
+    is none. When the queue is full, callers write their entry themselves
+    rather than dropping it.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        flush_interval_ms: int,
+        max_queue_size: int,
+        strict: bool = False,
+        durable_event_types: Optional[List[str]] = None
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.strict = strict
+        self.durable_event_types = set(durable_event_types or [])
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def record(
+        self,
+        event_type: str,
+        resource_type: str,
+        tenant_id: Optional[Any] = None,
+        db: Optional[Session] = None,
+        durable: Optional[bool] = None,
+        **fields
+    ):
+        """
+        Record an audit entry.
+
+        If db is given, the entry belongs to that session's transaction: it is
+        written only once the session commits, and dropped on rollback.
+        """
+        entry = self._build_entry(event_type, resource_type, tenant_id, fields)
+        if durable is None:
+            durable = self.strict or event_type in self.durable_event_types
+
+        if durable:
+            if db is not None:
+                db.add(AuditLog(**entry))
+            else:
+                self._write([entry])
+        elif db is not None:
+            db.info.setdefault(_PENDING_KEY, []).append(entry)
+        else:
+            self.enqueue(entry)
+
+    def enqueue(self, entry: Dict[str, Any]):
+        """Hand an entry to the background writer"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit sink queue full, writing entry synchronously")
+            self._write([entry])
+
+    def flush(self) -> int:
+        """Synchronously write everything currently buffered"""
+        written = 0
+        while True:
+            batch = self._drain_nowait()
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the background writer and flush what is left"""
+        self._stopping.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        flushed = self.flush()
+        if flushed:
+            logger.info(f"Audit sink flushed {flushed} entries on shutdown")
+
+    def _build_entry(self, event_type: str, resource_type: str, tenant_id: Any, fields: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(fields) - set(AUDIT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown audit log fields: {', '.join(sorted(unknown))}")
+
+        entry = {column: None for column in AUDIT_COLUMNS}
+        entry.update(fields)
+        entry["event_type"] = event_type
+        entry["resource_type"] = resource_type
+        entry["tenant_id"] = tenant_id
+        entry["data"] = entry["data"] or {}
+        entry["created_at"] = entry["created_at"] or datetime.now(timezone.utc)
+        return entry
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain()
+            if batch:
+                self._write(batch)
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        """Wait for the first entry, then collect until the batch is full or the interval ends"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_nowait(self) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        try:
+            with get_db_session() as db:
+                db.execute(insert(AuditLog), entries)
+            return
+        except Exception as e:
+            if len(entries) == 1:
+                logger.error(f"Failed to write audit entry {entries[0]['event_type']}: {e}")
+                return
+            logger.error(f"Bulk audit write of {len(entries)} entries failed, retrying individually: {e}")
+
+        for entry in entries:
+            self._write([entry])
+
+
+audit_sink = AuditSink(
+    max_batch_size=settings.AUDIT_SINK_BATCH_SIZE,
+    flush_interval_ms=settings.AUDIT_SINK_FLUSH_INTERVAL_MS,
+    max_queue_size=settings.AUDIT_SINK_MAX_QUEUE_SIZE,
+    strict=settings.AUDIT_SINK_STRICT_DURABILITY,
+    durable_event_types=settings.AUDIT_DURABLE_EVENT_TYPES
+)
+atexit.register(audit_sink.stop)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_audit_entries(session: Session):
+    for entry in session.info.pop(_PENDING_KEY, []):
+        audit_sink.enqueue(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_audit_entries(session: Session):
+    session.info.pop(_PENDING_KEY, None)
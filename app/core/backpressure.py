@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+import structlog
+
+from app.core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+
+class LoadShedError(Exception):
+    """Raised when a request is rejected to protect the process"""
+
+    def __init__(self, message: str, status_code: int, retry_after_seconds: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after_seconds = retry_after_seconds
+
+
+class InFlightBudget:
+    """
+    Bounded budget for work accepted but not yet finished.
+
+    acquire() admits a unit of work or raises LoadShedError: 503 when the
+    process-wide budget is spent, 429 when one source has used up its own
+    share. Retry-After is estimated from the current depth and the observed
+    completion rate, so senders back off for roughly as long as the backlog
+    takes to drain.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        per_source_limits: Optional[Dict[str, int]] = None,
+        max_retry_after_seconds: int = 30,
+        name: str = "InFlightBudget"
+    ):
+        self.max_in_flight = max_in_flight
+        self.per_source_limits = per_source_limits or {}
+        self.max_retry_after_seconds = max_retry_after_seconds
+        self.name = name
+
+        self._in_flight = 0
+        self._by_source: Dict[str, int] = {}
+        self._shed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._completion_rate = 0.0
+        self._window_start = time.monotonic()
+        self._window_completions = 0
+
+    def acquire(self, source: str):
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self._shed[source] = self._shed.get(source, 0) + 1
+                raise LoadShedError(
+                    f"{self.name} over capacity ({self._in_flight} in flight)",
+                    status_code=503,
+                    retry_after_seconds=self._retry_after(self._in_flight)
+                )
+
+            source_limit = self.per_source_limits.get(source)
+            source_in_flight = self._by_source.get(source, 0)
+            if source_limit is not None and source_in_flight >= source_limit:
+                self._shed[source] = self._shed.get(source, 0) + 1
+                raise LoadShedError(
+                    f"{self.name} limit reached for {source} ({source_in_flight} in flight)",
+                    status_code=429,
+                    retry_after_seconds=self._retry_after(source_in_flight)
+                )
+
+            self._in_flight += 1
+            self._by_source[source] = source_in_flight + 1
+
+    def release(self, source: str):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            remaining = self._by_source.get(source, 0) - 1
+            if remaining > 0:
+                self._by_source[source] = remaining
+            else:
+                self._by_source.pop(source, None)
+            self._record_completion()
+
+    def _record_completion(self):
+        self._window_completions += 1
+        elapsed = time.monotonic() - self._window_start
+        if elapsed >= 1.0:
+            rate = self._window_completions / elapsed
+            # Smooth across windows so one slow second doesn't swing Retry-After
+            self._completion_rate = rate if not self._completion_rate else 0.5 * self._completion_rate + 0.5 * rate
+            self._window_start = time.monotonic()
+            self._window_completions = 0
+
+    def _retry_after(self, depth: int) -> int:
+        if self._completion_rate <= 0:
+            return self.max_retry_after_seconds
+        return max(1, min(self.max_retry_after_seconds, math.ceil(depth / self._completion_rate)))
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "by_source": dict(self._by_source),
+                "shed": dict(self._shed),
+                "completion_rate_per_second": round(self._completion_rate, 2),
+            }
+
+
+webhook_budget = InFlightBudget(
+    max_in_flight=settings.WEBHOOK_MAX_IN_FLIGHT,
+    per_source_limits=settings.WEBHOOK_SOURCE_MAX_IN_FLIGHT,
+    max_retry_after_seconds=settings.WEBHOOK_MAX_RETRY_AFTER_SECONDS,
+    name="webhooks"
+)
@@ -1,15 +1,26 @@
 import time
 import asyncio
+import contextvars
+import json
+from collections import OrderedDict
 from enum import Enum
-from typing import Callable, Any, Optional, Dict
+from typing import Callable, Any, Optional, Dict, List
 from functools import wraps
 import logging
 from dataclasses import dataclass, field
 
 import structlog
 
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+
 logger = structlog.get_logger(__name__)
 
+SHARED_KEY_PREFIX = "circuit:"
+
+# Whether the call in the current task's `async with breaker` is a probe
+_probe_call: contextvars.ContextVar[bool] = contextvars.ContextVar("circuit_breaker_probe", default=False)
+
 class CircuitState(Enum):
     CLOSED = "closed"
     OPEN = "open"
@@ -17,10 +28,17 @@ class CircuitState(Enum):
 
 @dataclass
 class CircuitBreakerConfig:
-    failure_threshold: int = 5
+    failure_threshold: int = 5  # failures in the window before the rate is considered
     recovery_timeout: float = 60.0
     expected_exception: type = Exception
     name: str = "CircuitBreaker"
+    failure_rate_threshold: float = 0.5
+    window_seconds: float = 60.0
+    window_buckets: int = 10
+    half_open_max_calls: int = 1  # concurrent probes, and successes needed to close
+    shared: bool = False  # publish OPEN through Redis to every process
+    sync_interval: float = 1.0  # how often a closed breaker looks at the shared state
+    available: Optional[Callable[[], bool]] = None  # outside health check, e.g. IntegrationHealthMonitor
 
 @dataclass
 class CircuitBreakerStats:
@@ -28,73 +46,243 @@ class CircuitBreakerStats:
     success_count: int = 0
     last_failure_time: Optional[float] = None
     state: CircuitState = CircuitState.CLOSED
-    
+
 class CircuitBreakerError(Exception):
     """Raised when circuit breaker is open"""
     pass
 
+
+class SlidingWindow:
+    """Call and failure counts over the last window_seconds, in fixed time buckets"""
+
+    def __init__(self, window_seconds: float, buckets: int = 10):
+        self.buckets = max(1, buckets)
+        self.width = window_seconds / self.buckets
+        self._epochs: List[int] = [-1] * self.buckets
+        self._calls: List[int] = [0] * self.buckets
+        self._failures: List[int] = [0] * self.buckets
+
+    def add(self, failed: bool, now: float):
+        epoch = int(now / self.width)
+        index = epoch % self.buckets
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._calls[index] = 0
+            self._failures[index] = 0
+        self._calls[index] += 1
+        if failed:
+            self._failures[index] += 1
+
+    def totals(self, now: float):
+        """(calls, failures) in the window ending at now"""
+        oldest = int(now / self.width) - self.buckets
+        calls = failures = 0
+        for index, epoch in enumerate(self._epochs):
+            if epoch > oldest:
+                calls += self._calls[index]
+                failures += self._failures[index]
+        return calls, failures
+
+    def reset(self):
+        self._epochs = [-1] * self.buckets
+
+
 class CircuitBreaker:
+    """
+    Opens when, over the sliding window, at least failure_threshold calls
+    failed and they make up failure_rate_threshold of all calls. After
+    recovery_timeout it lets half_open_max_calls probes through at a time,
+    closing once that many succeed and reopening on any probe failure.
+
+    Accounting never awaits, so it needs no lock: on one event loop no other
+    coroutine can run in between. With shared=True, opening also sets a Redis
+    key that expires after recovery_timeout; closed breakers of the same name
+    in other processes read it in the background every sync_interval and open
+    too, so all workers back off a dead service together.
+
+    With an available() health check, a closed breaker also opens when it
+    reports the service down, and an open one sends no probes until it
+    reports the service up again.
+    """
+
     def __init__(self, config: CircuitBreakerConfig):
         self.config = config
         self.stats = CircuitBreakerStats()
-        self._lock = asyncio.Lock()
-    
+        self.window = SlidingWindow(config.window_seconds, config.window_buckets)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._synced_at = 0.0
+        self._sync: Optional[asyncio.Task] = None
+
     async def __aenter__(self):
-        await self._check_state()
+        _probe_call.set(self.acquire())
         return self
-    
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is None:
-            await self._on_success()
-        elif issubclass(exc_type, self.config.expected_exception):
-            await self._on_failure()
+        self.finish(_probe_call.get(), exc_type)
         return False
-    
-    async def _check_state(self):
-        async with self._lock:
-            if self.stats.state == CircuitState.OPEN:
-                if self._should_attempt_reset():
-                    self.stats.state = CircuitState.HALF_OPEN
-                    logger.info(f"Circuit breaker {self.config.name} moving to HALF_OPEN")
-                else:
-                    raise CircuitBreakerError(f"Circuit breaker {self.config.name} is OPEN")
-    
-    def _should_attempt_reset(self) -> bool:
-        return (
-            self.stats.last_failure_time is not None and
-            time.time() - self.stats.last_failure_time >= self.config.recovery_timeout
-        )
-    
-    async def _on_success(self):
-        async with self._lock:
-            self.stats.success_count += 1
-            if self.stats.state == CircuitState.HALF_OPEN:
+
+    @property
+    def state(self) -> CircuitState:
+        return self.stats.state
+
+    def acquire(self) -> bool:
+        """
+        Admit a call or raise CircuitBreakerError. Returns True if the call is
+        a half-open probe; pass that back to record_success/record_failure.
+        """
+        state = self.stats.state
+        available = self.config.available
+        if state == CircuitState.CLOSED:
+            if self.config.shared:
+                self._maybe_sync()
+            if available is None or available():
+                return False
+            # Every process reads the same health check, no need to publish
+            self._open(time.monotonic(), publish=False)
+            logger.warning(f"Circuit breaker {self.config.name} opened: health check reports the service down")
+            raise CircuitBreakerError(f"Circuit breaker {self.config.name} is OPEN")
+
+        if state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.config.recovery_timeout or (available is not None and not available()):
+                raise CircuitBreakerError(f"Circuit breaker {self.config.name} is OPEN")
+            self.stats.state = CircuitState.HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+            logger.info(f"Circuit breaker {self.config.name} moving to HALF_OPEN")
+
+        if self._probes >= self.config.half_open_max_calls:
+            raise CircuitBreakerError(f"Circuit breaker {self.config.name} is HALF_OPEN, probe in progress")
+        self._probes += 1
+        return True
+
+    def record_success(self, probe: bool = False):
+        self.stats.success_count += 1
+        self.window.add(False, time.monotonic())
+        if probe and self.stats.state == CircuitState.HALF_OPEN:
+            self._probes -= 1
+            self._probe_successes += 1
+            if self._probe_successes >= self.config.half_open_max_calls:
                 self.stats.state = CircuitState.CLOSED
-                self.stats.failure_count = 0
+                self.window.reset()
+                if self.config.shared:
+                    self._spawn(self._clear_shared())
                 logger.info(f"Circuit breaker {self.config.name} reset to CLOSED")
-    
-    async def _on_failure(self):
-        async with self._lock:
-            self.stats.failure_count += 1
-            self.stats.last_failure_time = time.time()
-            
-            if (self.stats.state == CircuitState.CLOSED and 
-                self.stats.failure_count >= self.config.failure_threshold):
-                self.stats.state = CircuitState.OPEN
-                logger.warning(f"Circuit breaker {self.config.name} opened after {self.stats.failure_count} failures")
-            elif self.stats.state == CircuitState.HALF_OPEN:
-                self.stats.state = CircuitState.OPEN
-                logger.warning(f"Circuit breaker {self.config.name} reopened on failure")
-
-_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+    def record_failure(self, probe: bool = False):
+        now = time.monotonic()
+        self.stats.failure_count += 1
+        self.stats.last_failure_time = time.time()
+        self.window.add(True, now)
+
+        if probe and self.stats.state == CircuitState.HALF_OPEN:
+            self._open(now)
+            logger.warning(f"Circuit breaker {self.config.name} reopened on failure")
+        elif self.stats.state == CircuitState.CLOSED:
+            calls, failures = self.window.totals(now)
+            if failures >= self.config.failure_threshold and failures / calls >= self.config.failure_rate_threshold:
+                self._open(now)
+                logger.warning(f"Circuit breaker {self.config.name} opened after {failures} of {calls} calls failed")
+
+    def finish(self, probe: bool, exc_type: Optional[type] = None):
+        """Record a call by how it ended: no exception, expected_exception, or anything else"""
+        if exc_type is None:
+            self.record_success(probe)
+        elif issubclass(exc_type, self.config.expected_exception):
+            self.record_failure(probe)
+        else:
+            self.release(probe)
+
+    def release(self, probe: bool = False):
+        """End a call that says nothing about the service's health"""
+        if probe and self.stats.state == CircuitState.HALF_OPEN:
+            self._probes -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls, failures = self.window.totals(time.monotonic())
+        return {
+            "state": self.stats.state.value,
+            "window_calls": calls,
+            "window_failures": failures,
+            "failure_count": self.stats.failure_count,
+            "success_count": self.stats.success_count,
+        }
+
+    def _open(self, now: float, publish: bool = True):
+        self.stats.state = CircuitState.OPEN
+        self._opened_at = now
+        if publish and self.config.shared:
+            self._spawn(self._publish_open())
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < self.config.sync_interval or (self._sync and not self._sync.done()):
+            return
+        self._synced_at = now
+        self._sync = self._spawn(self._load_shared())
+
+    def _spawn(self, coro) -> Optional[asyncio.Task]:
+        try:
+            return asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return None
+
+    async def _publish_open(self):
+        try:
+            await async_redis_client.set(
+                f"{SHARED_KEY_PREFIX}{self.config.name}",
+                json.dumps({"opened_at": time.time()}),
+                ex=max(1, int(self.config.recovery_timeout))
+            )
+        except Exception as e:
+            logger.warning(f"Could not publish circuit breaker {self.config.name} state: {e}")
+
+    async def _clear_shared(self):
+        try:
+            await async_redis_client.delete(f"{SHARED_KEY_PREFIX}{self.config.name}")
+        except Exception as e:
+            logger.warning(f"Could not clear circuit breaker {self.config.name} state: {e}")
+
+    async def _load_shared(self):
+        try:
+            shared = await async_redis_client.get(f"{SHARED_KEY_PREFIX}{self.config.name}")
+        except Exception as e:
+            logger.warning(f"Could not load circuit breaker {self.config.name} state: {e}")
+            return
+        if not shared or self.stats.state != CircuitState.CLOSED:
+            return
+        opened_ago = max(0.0, time.time() - json.loads(shared)["opened_at"])
+        self._open(time.monotonic() - opened_ago, publish=False)
+        logger.warning(f"Circuit breaker {self.config.name} opened by another process")
+
+# Least recently used last-to-first; at most CIRCUIT_BREAKER_MAX_BREAKERS, of
+# which only closed ones are dropped (an open breaker must keep refusing calls)
+_circuit_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
 
 def get_circuit_breaker(name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
     """Get or create a circuit breaker instance"""
-    if name not in _circuit_breakers:
-        if config is None:
-            config = CircuitBreakerConfig(name=name)
-        _circuit_breakers[name] = CircuitBreaker(config)
-    return _circuit_breakers[name]
+    breaker = _circuit_breakers.get(name)
+    if breaker is not None:
+        _circuit_breakers.move_to_end(name)
+        return breaker
+    breaker = CircuitBreaker(config or CircuitBreakerConfig(name=name))
+    _circuit_breakers[name] = breaker
+    _evict_circuit_breakers(settings.CIRCUIT_BREAKER_MAX_BREAKERS)
+    return breaker
+
+def _evict_circuit_breakers(max_breakers: int):
+    excess = len(_circuit_breakers) - max_breakers
+    if excess <= 0:
+        return
+    closed = [name for name, breaker in _circuit_breakers.items() if breaker.state == CircuitState.CLOSED]
+    for name in closed[:excess]:
+        del _circuit_breakers[name]
+
+def circuit_breaker_stats(prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker whose name starts with prefix"""
+    return {name: breaker.snapshot() for name, breaker in _circuit_breakers.items() if name.startswith(prefix)}
 
 def circuit_breaker(
     name: str,
@@ -109,14 +297,14 @@ def circuit_breaker(
         expected_exception=expected_exception,
         name=name
     )
-    
+
     def decorator(func: Callable) -> Callable:
         breaker = get_circuit_breaker(name, config)
-        
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             async with breaker:
                 return await func(*args, **kwargs)
-        
+
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import structlog
+from app.schemas.webhooks import ProcessingResult, WebhookPayload
+
+logger = structlog.get_logger(__name__)
+
+BatchProcessor = Callable[[List[WebhookPayload]], Awaitable[List[ProcessingResult]]]
+
+
+class EventBatcher:
+    """
+    Collects events into micro-batches and hands them to a batch processor.
+    A batch is flushed once it holds max_batch_size events or max_wait_ms
+    after its first event arrived, whichever comes first. An event arriving
+    while the batcher is idle (nothing pending or being processed) is
+    flushed straight away, so a lone event, such as one per Celery task,
+    never waits max_wait_ms for company.
+    """
+
+    def __init__(self, processor: BatchProcessor, max_batch_size: int, max_wait_ms: int, name: str = "EventBatcher"):
+        self.processor = processor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._pending: List[Tuple[WebhookPayload, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, payload: WebhookPayload) -> ProcessingResult:
+        """Queue an event for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Celery tasks run on short-lived loops; never carry state across them
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._flushes = set()
+
+        future = loop.create_future()
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self.max_batch_size or (len(self._pending) == 1 and not self._flushes):
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait_ms / 1000)
+        self._timer = None
+        self._flush_now()
+
+    def _flush_now(self):
+        """Start processing the oldest pending batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+
+        if batch:
+            task = self._loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+        if self._pending:
+            if len(self._pending) >= self.max_batch_size:
+                self._flush_now()
+            else:
+                self._timer = self._loop.create_task(self._flush_later())
+
+    async def _flush(self, batch: List[Tuple[WebhookPayload, asyncio.Future]]):
+        payloads = [payload for payload, _ in batch]
+        try:
+            results = await self.processor(payloads)
+            if len(results) != len(batch):
+                raise ValueError(f"Batch processor returned {len(results)} results for {len(batch)} events")
+        except Exception as e:
+            logger.error(f"Batch {self.name} failed: {e}")
+            results = [ProcessingResult(success=False, error_message=str(e)) for _ in batch]
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,18 +1,25 @@
 import asyncio
 import json
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Union
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 import logging
+import time
 
 import structlog
 from app.integrations.webhook import WebhookPayload, WebhookSource
 from app.core.database import get_db_session, get_async_db_session  # Import the context managers
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 import hashlib
+from app.core.audit_sink import audit_sink
+from app.core.partitioned_executor import partitioned_executor
+from app.core.settings import settings
+from app.core.tenant_cache import tenant_cache
 from app.models import Tenant, AuditLog, WebhookStatus
-from app.models.webhooks import EventType, WebhookEventDB
+from app.models.webhooks import EventType, WebhookEventDB, WebhookIdempotencyKey
 from app.schemas.webhooks import ProcessingResult
 from pymitter import EventEmitter
 
@@ -20,63 +27,365 @@ logger = structlog.get_logger(__name__)
 
 event_emitter = EventEmitter()
 
+async def emit_event(payload: WebhookPayload) -> ProcessingResult:
+    """Run every handler registered for the event; the result is the first failure, if any"""
+    async def run(listener: Callable) -> Any:
+        outcome = listener(payload)
+        return await outcome if asyncio.iscoroutine(outcome) else outcome
+
+    listeners = event_emitter.listeners(payload.event_type)
+    outcomes = await asyncio.gather(*(run(listener) for listener in listeners))
+    results = [outcome for outcome in outcomes if isinstance(outcome, ProcessingResult)]
+    for result in results:
+        if not result.success:
+            return result
+    if results:
+        return results[0]
+    if not listeners:
+        return ProcessingResult(success=True, metadata={"skipped": "no_handler"})
+    return ProcessingResult(success=True)
+
+def handler_name(handler: Callable) -> str:
+    """Stable name of an event handler, part of its claim keys"""
+    return f"{handler.__module__}.{handler.__qualname__}"
+
+async def dispatch_event(payload: WebhookPayload) -> ProcessingResult:
+    """Run the event after any earlier events for the same entity"""
+    return await partitioned_executor.submit(payload, emit_event)
+
+class MiddlewareKind(Enum):
+    TRANSFORM = "transform"  # returns a (possibly new) payload; runs in registration order
+    OBSERVER = "observer"    # only inspects the payload; may reject it by raising
+
+@dataclass
+class PipelineMiddleware:
+    func: Callable
+    kind: MiddlewareKind = MiddlewareKind.TRANSFORM
+    batch_func: Optional[Callable] = None
+    deferred: bool = False  # observers only: run after the handler instead of before
+
+    @property
+    def name(self) -> str:
+        return self.func.__name__
+
+@dataclass
+class MiddlewareTiming:
+    calls: int = 0
+    failures: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
 class EventPipeline:
     def __init__(self, emitter: EventEmitter):
         self.emmiter = emitter
-        self.middleware: List[Callable] = []
+        self.middleware: List[PipelineMiddleware] = []
+        self.middleware_timings: Dict[str, MiddlewareTiming] = {}
         self.deduplication_cache: Dict[str, datetime] = {} #TODO: change to use redis
         self._lock = asyncio.Lock()
 
-    def add_middleware(self, middleware: Callable):
-            """Add middleware to the processing pipeline"""
-            self.middleware.append(middleware)
-            logger.info(f"Added middleware: {middleware.__name__}")
+    def add_middleware(
+        self,
+        middleware: Callable,
+        batch_middleware: Optional[Callable] = None,
+        kind: MiddlewareKind = MiddlewareKind.TRANSFORM,
+        deferred: bool = False
+    ):
+            """
+            Add middleware to the processing pipeline, optionally with a batch-aware variant.
+            Transforms run in order; observers run concurrently once the transforms are done,
+            or after the handler if deferred.
+            """
+            if deferred and kind != MiddlewareKind.OBSERVER:
+                raise ValueError("Only observer middleware can be deferred")
+            self.middleware.append(PipelineMiddleware(middleware, kind, batch_middleware, deferred))
+            logger.info(f"Added {kind.value} middleware: {middleware.__name__}")
+
+    def _stage(self, kind: MiddlewareKind, deferred: bool = False) -> List[PipelineMiddleware]:
+        return [m for m in self.middleware if m.kind == kind and m.deferred == deferred]
+
+    async def _timed(self, middleware: PipelineMiddleware, call: Callable, arg: Any) -> Any:
+        """Run one middleware call and record how long it took"""
+        timing = self.middleware_timings.setdefault(middleware.name, MiddlewareTiming())
+        start = time.perf_counter()
+        try:
+            return await call(arg)
+        except Exception:
+            timing.failures += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            timing.calls += 1
+            timing.total_ms += elapsed_ms
+            timing.max_ms = max(timing.max_ms, elapsed_ms)
+
+    def get_middleware_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-middleware call counts and latencies"""
+        return {
+            name: {
+                "calls": timing.calls,
+                "failures": timing.failures,
+                "avg_ms": round(timing.avg_ms, 3),
+                "max_ms": round(timing.max_ms, 3),
+                "total_ms": round(timing.total_ms, 3),
+            }
+            for name, timing in self.middleware_timings.items()
+        }
     
     def generate_event_hash(self, payload: WebhookPayload) -> str:
         """Generate unique hash for event deduplication"""
         hash_data = f"{payload.event_id}:{payload.source.value}:{payload.timestamp.isoformat()}"
         return hashlib.sha256(hash_data.encode()).hexdigest()
+
+    def claim_key(self, payload: WebhookPayload, handler: str) -> str:
+        """Idempotency key of one handler's run of an event"""
+        return hashlib.sha256(f"{self.generate_event_hash(payload)}:{handler}".encode()).hexdigest()
+
+    def _handler_claim_keys(self, payload: WebhookPayload) -> List[str]:
+        """Claim keys of every pipeline handler registered for the event"""
+        return [
+            self.claim_key(payload, handler_name(listener))
+            for listener in self.emmiter.listeners(payload.event_type)
+            if hasattr(listener, "handler_func")
+        ]
     
     async def is_duplicate_event(self, payload: WebhookPayload) -> bool:
         """Check if event has already been processed (idempotency)"""
-        event_hash = self.generate_event_hash(payload)
-        
-        async with self._lock:
-            if event_hash in self.deduplication_cache:
-                return True
-            
+        return (await self.filter_duplicate_events([payload]))[0]
+
+    async def filter_duplicate_events(self, payloads: List[WebhookPayload]) -> List[bool]:
+        """
+        Check a batch of events for duplicates with a single query: an event
+        is a duplicate once every handler registered for it has completed it.
+        Only a hint for answering senders early; claim_events is what makes
+        sure each handler processes an event once.
+        """
+        claim_keys = [self._handler_claim_keys(payload) for payload in payloads]
+        unknown_keys = {key for keys in claim_keys for key in keys if key not in self.deduplication_cache}
+        known_keys = set()
+
+        if unknown_keys:
             try:
                 with get_db_session() as db:
-                    result = db.query(WebhookEventDB.id).filter(
-                        WebhookEventDB.idempotency_key == event_hash
-                    ).first()
-                    
-                    if result:
-                        self.deduplication_cache[event_hash] = payload.timestamp
-                        return True
-            
+                    rows = db.query(WebhookIdempotencyKey.idempotency_key).filter(
+                        WebhookIdempotencyKey.idempotency_key.in_(unknown_keys),
+                        WebhookIdempotencyKey.status == WebhookStatus.COMPLETED
+                    ).all()
+                    known_keys = {row.idempotency_key for row in rows}
             except Exception as e:
-                logger.error(f"Error checking duplicate event: {e}")
-                return False
-            
-            return False
+                logger.error(f"Error checking duplicate events: {e}")
+
+        duplicates = []
+        seen = set()
+        for payload, keys in zip(payloads, claim_keys):
+            event_hash = self.generate_event_hash(payload)
+            is_duplicate = event_hash in seen or bool(keys) and all(
+                key in known_keys or key in self.deduplication_cache for key in keys
+            )
+            for key in keys:
+                if key in known_keys:
+                    self.deduplication_cache[key] = payload.timestamp
+            seen.add(event_hash)
+            duplicates.append(is_duplicate)
+
+        return duplicates
+
+    async def claim_event(self, payload: WebhookPayload, handler: str) -> bool:
+        """Claim one event for a handler; False if it is a duplicate"""
+        return (await self.claim_events([payload], handler))[0]
+
+    async def claim_events(self, payloads: List[WebhookPayload], handler: str) -> List[bool]:
+        """
+        Claim events for a handler before they are dispatched to it. Claims
+        are keyed by event and handler, so every handler of an event runs it
+        once. Each claim is an INSERT ... ON CONFLICT on
+        webhook_idempotency_keys, so of two workers racing for an event only
+        one wins. Events that are completed or being processed elsewhere get
+        False, as do repeats within the batch; failed events and claims
+        older than the lease can be taken. If the claim table can't be
+        reached the events are processed anyway.
+        """
+        claim_keys = [self.claim_key(payload, handler) for payload in payloads]
+        candidates = {key for key in claim_keys if key not in self.deduplication_cache}
+        claimed = set()
+
+        if candidates:
+            try:
+                claimed = await asyncio.to_thread(self._claim, candidates)
+            except Exception as e:
+                logger.error(f"Error claiming {len(candidates)} events: {e}")
+                claimed = candidates
+
+        results = []
+        for key in claim_keys:
+            results.append(key in claimed)
+            claimed.discard(key)
+        return results
+
+    def _claim(self, claim_keys) -> set:
+        lease_expired = datetime.now(timezone.utc) - timedelta(seconds=settings.WEBHOOK_CLAIM_LEASE_SECONDS)
+        statement = pg_insert(WebhookIdempotencyKey).values([
+            {"idempotency_key": key, "status": WebhookStatus.PROCESSING}
+            for key in sorted(claim_keys)
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[WebhookIdempotencyKey.idempotency_key],
+            set_={"status": WebhookStatus.PROCESSING, "claimed_at": func.now()},
+            where=or_(
+                WebhookIdempotencyKey.status == WebhookStatus.FAILED,
+                and_(
+                    WebhookIdempotencyKey.status == WebhookStatus.PROCESSING,
+                    WebhookIdempotencyKey.claimed_at < lease_expired
+                )
+            )
+        ).returning(WebhookIdempotencyKey.idempotency_key)
+
+        with get_db_session() as db:
+            return {row.idempotency_key for row in db.execute(statement)}
+
+    def _finish_claims(self, db: Session, outcomes: Dict[str, bool]):
+        """Record how claimed events ended: completed, or failed and claimable again"""
+        for success in (True, False):
+            claim_keys = [key for key, succeeded in outcomes.items() if succeeded == success]
+            if claim_keys:
+                db.query(WebhookIdempotencyKey).filter(
+                    WebhookIdempotencyKey.idempotency_key.in_(claim_keys)
+                ).update(
+                    {"status": WebhookStatus.COMPLETED if success else WebhookStatus.FAILED},
+                    synchronize_session=False
+                )
+
+    async def release_claims(self, payloads: List[WebhookPayload]):
+        """
+        Forget that events were processed so every handler can claim and run
+        them again (replays that bypass dedup). Claims held by a running
+        worker are left alone.
+        """
+        claim_keys = {key for payload in payloads for key in self._handler_claim_keys(payload)}
+        if not claim_keys:
+            return
+        async with self._lock:
+            for key in claim_keys:
+                self.deduplication_cache.pop(key, None)
+
+        def _release():
+            with get_db_session() as db:
+                db.query(WebhookIdempotencyKey).filter(
+                    WebhookIdempotencyKey.idempotency_key.in_(claim_keys),
+                    WebhookIdempotencyKey.status != WebhookStatus.PROCESSING
+                ).delete(synchronize_session=False)
+
+        await asyncio.to_thread(_release)
+
+    def expire_claims(self, older_than_days: int) -> int:
+        """Delete claims older than the webhook_events retention; returns how many"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        with get_db_session() as db:
+            return db.query(WebhookIdempotencyKey).filter(
+                WebhookIdempotencyKey.claimed_at < cutoff
+            ).delete(synchronize_session=False)
     
     async def apply_middleware(self, payload: WebhookPayload) -> WebhookPayload:
-        """Apply middleware to the payload"""
+        """Apply transforms in order, then the non-deferred observers concurrently"""
         current_payload = payload
         
-        for middleware in self.middleware:
+        for middleware in self._stage(MiddlewareKind.TRANSFORM):
             try:
-                current_payload = await middleware(current_payload)
+                current_payload = await self._timed(middleware, middleware.func, current_payload)
             except Exception as e:
-                logger.error(f"Middleware {middleware.__name__} failed: {e}")
+                logger.error(f"Middleware {middleware.name} failed: {e}")
                 raise
+
+        observers = self._stage(MiddlewareKind.OBSERVER)
+        outcomes = await asyncio.gather(
+            *(self._timed(middleware, middleware.func, current_payload) for middleware in observers),
+            return_exceptions=True
+        )
+        for middleware, outcome in zip(observers, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Middleware {middleware.name} failed: {outcome}")
+                raise outcome
         
         return current_payload
+
+    async def run_deferred_middleware(self, payload: WebhookPayload):
+        """Run deferred observers after the handler; failures are logged, not raised"""
+        observers = self._stage(MiddlewareKind.OBSERVER, deferred=True)
+        outcomes = await asyncio.gather(
+            *(self._timed(middleware, middleware.func, payload) for middleware in observers),
+            return_exceptions=True
+        )
+        for middleware, outcome in zip(observers, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Deferred middleware {middleware.name} failed: {outcome}")
+
+    async def _apply_to_batch(
+        self,
+        middleware: PipelineMiddleware,
+        payloads: List[WebhookPayload]
+    ) -> List[Union[WebhookPayload, Exception]]:
+        """Run one middleware over a batch, with its batch variant if it has one"""
+        try:
+            if middleware.batch_func:
+                return await self._timed(middleware, middleware.batch_func, payloads)
+            return await asyncio.gather(
+                *(self._timed(middleware, middleware.func, payload) for payload in payloads),
+                return_exceptions=True
+            )
+        except Exception as e:
+            logger.error(f"Middleware {middleware.name} failed for batch: {e}")
+            return [e] * len(payloads)
+
+    async def apply_batch_middleware(self, payloads: List[WebhookPayload]) -> List[Union[WebhookPayload, Exception]]:
+        """
+        Apply middleware to a batch of payloads.
+        Returns one entry per payload: the processed payload, or the exception that rejected it.
+        """
+        outcomes: List[Union[WebhookPayload, Exception]] = list(payloads)
+
+        def live() -> List[int]:
+            return [i for i, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)]
+
+        for middleware in self._stage(MiddlewareKind.TRANSFORM):
+            indexes = live()
+            if not indexes:
+                return outcomes
+            processed = await self._apply_to_batch(middleware, [outcomes[i] for i in indexes])
+            for i, outcome in zip(indexes, processed):
+                outcomes[i] = outcome
+
+        indexes = live()
+        observers = self._stage(MiddlewareKind.OBSERVER)
+        if indexes and observers:
+            batch = [outcomes[i] for i in indexes]
+            observed = await asyncio.gather(
+                *(self._apply_to_batch(middleware, batch) for middleware in observers)
+            )
+            for middleware_outcomes in observed:
+                for i, outcome in zip(indexes, middleware_outcomes):
+                    if isinstance(outcome, Exception) and not isinstance(outcomes[i], Exception):
+                        outcomes[i] = outcome
+
+        return outcomes
+
+    async def run_deferred_batch_middleware(self, payloads: List[WebhookPayload]):
+        """Run deferred observers over a processed batch; failures are logged, not raised"""
+        observers = self._stage(MiddlewareKind.OBSERVER, deferred=True)
+        observed = await asyncio.gather(
+            *(self._apply_to_batch(middleware, payloads) for middleware in observers)
+        )
+        for middleware, middleware_outcomes in zip(observers, observed):
+            failures = sum(1 for outcome in middleware_outcomes if isinstance(outcome, Exception))
+            if failures:
+                logger.error(f"Deferred middleware {middleware.name} failed for {failures} events")
     
-    async def mark_event_processed(self, payload: WebhookPayload, result: ProcessingResult):
-        """Mark event as processed in database and cache"""
+    async def mark_event_processed(self, payload: WebhookPayload, result: ProcessingResult, handler: str):
+        """Mark event as processed by a handler in database and cache"""
         event_hash = self.generate_event_hash(payload)
+        claim_key = self.claim_key(payload, handler)
         
         try:
             with get_db_session() as db:
@@ -88,33 +397,150 @@ class EventPipeline:
                     existing_event.status = WebhookStatus.COMPLETED if result.success else WebhookStatus.FAILED
                     existing_event.processed_at = datetime.now(timezone.utc)
                     existing_event.data = result.metadata
+                    existing_event.error_message = result.error_message
+                    existing_event.completed_at = datetime.now(timezone.utc)
                 else:
                     new_event = WebhookEventDB(
                         service_name=payload.source.value,
                         event_type=payload.event_type,
-                        payload=payload.data,
+                        payload=payload.data_dict(),
                         tenant_id=payload.tenant_id,
                         idempotency_key=event_hash,
+                        event_id=payload.event_id,
+                        event_timestamp=payload.timestamp.isoformat(),
                         status=WebhookStatus.COMPLETED if result.success else WebhookStatus.FAILED,
                         error_message=result.error_message,
                         completed_at=datetime.now(timezone.utc)
                     )
                     db.add(new_event)
+
+                self._finish_claims(db, {claim_key: result.success})
             
-            async with self._lock:
-                self.deduplication_cache[event_hash] = payload.timestamp
-                
-                if len(self.deduplication_cache) > 1000:
-                    oldest_keys = sorted(
-                        self.deduplication_cache.keys(),
-                        key=lambda k: self.deduplication_cache[k]
-                    )[:500]
-                    for key in oldest_keys:
-                        del self.deduplication_cache[key]
+            if result.success:
+                await self._remember_events({claim_key: payload.timestamp})
         
         except Exception as e:
             logger.error(f"Error marking event as processed: {e}")
 
+    async def mark_events_processed(
+        self,
+        payloads: List[WebhookPayload],
+        results: List[ProcessingResult],
+        handler: str
+    ):
+        """
+        Mark a batch of events as processed by a handler with one lookup and
+        one insert. Duplicates were handled by whoever claimed them and are
+        left alone, including repeats of an event within the batch.
+        """
+        now = datetime.now(timezone.utc)
+        outcomes: Dict[str, tuple] = {}
+        for payload, result in zip(payloads, results):
+            if result.metadata.get("skipped") != "duplicate_event":
+                outcomes[self.generate_event_hash(payload)] = (payload, result)
+        if not outcomes:
+            return
+
+        try:
+            with get_db_session() as db:
+                existing_events = db.query(WebhookEventDB).filter(
+                    WebhookEventDB.idempotency_key.in_(outcomes.keys())
+                ).all()
+
+                for existing_event in existing_events:
+                    _, result = outcomes[existing_event.idempotency_key]
+                    existing_event.status = WebhookStatus.COMPLETED if result.success else WebhookStatus.FAILED
+                    existing_event.processed_at = now
+                    existing_event.data = result.metadata
+                    existing_event.error_message = result.error_message
+                    existing_event.completed_at = now
+
+                existing_hashes = {event.idempotency_key for event in existing_events}
+                db.add_all([
+                    WebhookEventDB(
+                        service_name=payload.source.value,
+                        event_type=payload.event_type,
+                        payload=payload.data_dict(),
+                        tenant_id=payload.tenant_id,
+                        idempotency_key=event_hash,
+                        event_id=payload.event_id,
+                        event_timestamp=payload.timestamp.isoformat(),
+                        status=WebhookStatus.COMPLETED if result.success else WebhookStatus.FAILED,
+                        error_message=result.error_message,
+                        completed_at=now
+                    )
+                    for event_hash, (payload, result) in outcomes.items()
+                    if event_hash not in existing_hashes
+                ])
+
+                self._finish_claims(db, {
+                    self.claim_key(payload, handler): result.success for payload, result in outcomes.values()
+                })
+
+            await self._remember_events({
+                self.claim_key(payload, handler): payload.timestamp
+                for payload, result in outcomes.values() if result.success
+            })
+
+        except Exception as e:
+            logger.error(f"Error marking {len(payloads)} events as processed: {e}")
+
+    def record_pending_events(self, payloads: List[WebhookPayload]) -> List[Optional[str]]:
+        """
+        Claim check for queued events: store each payload as a pending
+        webhook_events row and return the row ids, so only the id has to
+        travel through the broker. Events that were already processed
+        get None; events already pending keep their existing row.
+        """
+        event_hashes = [self.generate_event_hash(payload) for payload in payloads]
+        with get_db_session() as db:
+            rows = {
+                row.idempotency_key: row
+                for row in db.query(
+                    WebhookEventDB.id, WebhookEventDB.idempotency_key, WebhookEventDB.status
+                ).filter(WebhookEventDB.idempotency_key.in_(event_hashes)).all()
+            }
+
+            new_events = {}
+            for payload, event_hash in zip(payloads, event_hashes):
+                if event_hash in rows or event_hash in new_events:
+                    continue
+                new_events[event_hash] = WebhookEventDB(
+                    service_name=payload.source.value,
+                    event_type=payload.event_type,
+                    payload=payload.data_dict(),
+                    tenant_id=payload.tenant_id,
+                    idempotency_key=event_hash,
+                    event_id=payload.event_id,
+                    event_timestamp=payload.timestamp.isoformat(),
+                    status=WebhookStatus.PENDING
+                )
+            db.add_all(new_events.values())
+            db.flush()
+
+            event_ids = []
+            for event_hash in event_hashes:
+                if event_hash in new_events:
+                    event_ids.append(str(new_events[event_hash].id))
+                elif rows[event_hash].status in (WebhookStatus.COMPLETED, WebhookStatus.ARCHIVED):
+                    event_ids.append(None)
+                else:
+                    event_ids.append(str(rows[event_hash].id))
+            return event_ids
+
+    async def _remember_events(self, event_hashes: Dict[str, datetime]):
+        """Add completed claim keys to the local dedup cache, evicting the oldest"""
+        async with self._lock:
+            self.deduplication_cache.update(event_hashes)
+            
+            if len(self.deduplication_cache) > 1000:
+                oldest_keys = sorted(
+                    self.deduplication_cache.keys(),
+                    key=lambda k: self.deduplication_cache[k]
+                )[:500]
+                for key in oldest_keys:
+                    del self.deduplication_cache[key]
+
     
 
 processing_pipeline = EventPipeline(event_emitter)
@@ -124,14 +550,8 @@ async def tenant_validation_middleware(payload: WebhookPayload) -> WebhookPayloa
     """Validate tenant information in webhook payload"""
     if payload.tenant_id:
         try:
-            with get_db_session() as db:
-                result = db.query(Tenant.id).filter(
-                    Tenant.id == payload.tenant_id, 
-                    # Tenant.is_active == True
-                ).first()
-                
-                if not result:
-                    raise ValueError(f"Invalid or inactive tenant: {payload.tenant_id}")
+            if not await tenant_cache.exists(payload.tenant_id):
+                raise ValueError(f"Invalid or inactive tenant: {payload.tenant_id}")
         
         except Exception as e:
             logger.error(f"Tenant validation failed: {e}")
@@ -139,28 +559,53 @@ async def tenant_validation_middleware(payload: WebhookPayload) -> WebhookPayloa
     
     return payload
 
+async def tenant_validation_batch_middleware(payloads: List[WebhookPayload]) -> List[Union[WebhookPayload, Exception]]:
+    """Validate the tenants of a batch of webhook payloads with one cache lookup"""
+    valid_tenants = await tenant_cache.exists_many(
+        payload.tenant_id for payload in payloads if payload.tenant_id
+    )
+
+    outcomes: List[Union[WebhookPayload, Exception]] = []
+    for payload in payloads:
+        if not payload.tenant_id or tenant_cache.normalize(payload.tenant_id) in valid_tenants:
+            outcomes.append(payload)
+        else:
+            logger.error(f"Tenant validation failed: Invalid or inactive tenant: {payload.tenant_id}")
+            outcomes.append(ValueError(f"Invalid or inactive tenant: {payload.tenant_id}"))
+
+    return outcomes
+
 async def audit_logging_middleware(payload: WebhookPayload) -> WebhookPayload:
     """Log webhook events for audit purposes"""
     try:
-        with get_db_session() as db:
-            audit_entry = AuditLog(
-                tenant_id=payload.tenant_id,
-                event_type=f"webhook_received_{payload.event_type}",
-                resource_type="webhook",
-                
-                data= {
-                    "id": payload.event_id,
-                    "source": payload.source.value,
-                    "timestamp": payload.timestamp.isoformat()
-                }
-            )
-            db.add(audit_entry)
-            # Commit happens automatically in context manager
+        audit_sink.record(
+            tenant_id=payload.tenant_id,
+            event_type=f"webhook_received_{payload.event_type}",
+            resource_type="webhook",
+            
+            data= {
+                "id": payload.event_id,
+                "source": payload.source.value,
+                "timestamp": payload.timestamp.isoformat()
+            }
+        )
 
     except Exception as e:
         logger.error(f"Audit logging failed: {e}")
     
     return payload
 
-processing_pipeline.add_middleware(tenant_validation_middleware)
-processing_pipeline.add_middleware(audit_logging_middleware)
\ No newline at end of file
+async def audit_logging_batch_middleware(payloads: List[WebhookPayload]) -> List[WebhookPayload]:
+    """Log a batch of webhook events for audit purposes"""
+    for payload in payloads:
+        await audit_logging_middleware(payload)
+
+    return payloads
+
+processing_pipeline.add_middleware(
+    tenant_validation_middleware, tenant_validation_batch_middleware, kind=MiddlewareKind.OBSERVER
+)
+# Deferred so only events that passed tenant validation are audited as received
+processing_pipeline.add_middleware(
+    audit_logging_middleware, audit_logging_batch_middleware, kind=MiddlewareKind.OBSERVER, deferred=True
+)
\ No newline at end of file
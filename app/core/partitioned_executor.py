@@ -0,0 +1,130 @@
+import asyncio
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+# Event type prefix -> (entity namespace, data fields to try for the entity id).
+# Payments are keyed by their subscription so they stay ordered with it.
+ENTITY_KEYS: Dict[str, Tuple[str, List[str]]] = {
+    "user": ("user", ["id", "user_id"]),
+    "subscription": ("subscription", ["id", "subscription_id"]),
+    "payment": ("subscription", ["subscription_id"]),
+}
+
+
+def entity_key(payload: Any) -> Optional[str]:
+    """
+    Ordering key for an event, e.g. "subscription:<id>".
+    Events without a key have no ordering requirement.
+    """
+    prefix = payload.event_type.split(".", 1)[0]
+    spec = ENTITY_KEYS.get(prefix)
+    if not spec or not hasattr(payload.data, "get"):
+        return None
+
+    namespace, fields = spec
+    for field in fields:
+        value = payload.data.get(field)
+        if value:
+            return f"{payload.tenant_id or '-'}:{namespace}:{value}"
+    return None
+
+
+def partition_for(key: str, partitions: int) -> int:
+    """Stable partition number for a key (the same in every process)"""
+    return zlib.crc32(key.encode()) % partitions
+
+
+def partition_queue_name(key: str, partitions: int = None, prefix: str = "webhooks") -> str:
+    """Celery queue that serves a key's partition, e.g. webhooks.partition.3"""
+    partitions = partitions or settings.WEBHOOK_PARTITION_COUNT
+    return f"{prefix}.partition.{partition_for(key, partitions)}"
+
+
+class PartitionedExecutor:
+    """
+    Runs events for the same entity one at a time and in arrival order, while
+    events for different entities run in parallel on a fixed pool of workers.
+    Each worker owns one partition and drains its queue FIFO. A failing or
+    cancelled dispatch only fails its own event; workers stop when they are
+    cancelled themselves (shutdown() or the loop closing).
+    """
+
+    def __init__(self, partitions: int):
+        self.partitions = max(1, partitions)
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def submit(self, payload: Any, dispatch: Callable[[Any], Awaitable[Any]]) -> asyncio.Future:
+        """Run dispatch(payload) in the payload's partition, or right away if it has no entity key"""
+        loop = asyncio.get_running_loop()
+        key = entity_key(payload)
+        if key is None:
+            return asyncio.ensure_future(dispatch(payload))
+
+        self._ensure_workers(loop)
+        future = loop.create_future()
+        self._queues[partition_for(key, self.partitions)].put_nowait((payload, dispatch, future))
+        return future
+
+    def _ensure_workers(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queues = [asyncio.Queue() for _ in range(self.partitions)]
+        self._workers = [loop.create_task(self._work(queue)) for queue in self._queues]
+
+    async def _work(self, queue: asyncio.Queue):
+        worker = asyncio.current_task()
+        while True:
+            payload, dispatch, future = await queue.get()
+            try:
+                result = await dispatch(payload)
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                if worker.cancelling():
+                    raise
+                # Cancelled inside dispatch, not the worker: only this event is lost
+                logger.error(f"Partitioned event {payload.event_id} was cancelled")
+            except (KeyboardInterrupt, SystemExit) as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            except BaseException as e:
+                logger.error(f"Partitioned event {payload.event_id} failed: {e!r}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def shutdown(self):
+        """Stop the workers; events still queued are cancelled"""
+        workers, queues = self._workers, self._queues
+        self._loop, self._workers, self._queues = None, [], []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for queue in queues:
+            while not queue.empty():
+                _, _, future = queue.get_nowait()
+                future.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        depths = [queue.qsize() for queue in self._queues]
+        return {
+            "partitions": self.partitions,
+            "queued": sum(depths),
+            "max_partition_depth": max(depths, default=0),
+        }
+
+
+partitioned_executor = PartitionedExecutor(settings.WEBHOOK_PARTITION_COUNT)
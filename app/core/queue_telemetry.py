@@ -0,0 +1,280 @@
+import asyncio
+import json
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import structlog
+
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+WORKER_KEY_PREFIX = "telemetry:worker:"
+SENT_AT_HEADER = "sent_at"
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+
+
+def priority_keys(queue: str) -> List[str]:
+    """Redis lists backing a queue, one per broker priority step"""
+    return [queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))], 2)
+
+
+class WorkerTelemetry:
+    """
+    Worker-process side of queue telemetry.
+
+    Times every task between task_prerun and task_postrun and publishes a
+    heartbeat key (hostname, pid, tasks run, runtime percentiles per task)
+    to Redis every heartbeat_interval seconds. Keys expire after a few
+    missed heartbeats, so the set of keys is the set of live workers; no
+    broadcast to the workers is needed to count them.
+    """
+
+    def __init__(self, heartbeat_interval: float = 10.0, window: int = 200):
+        self.heartbeat_interval = heartbeat_interval
+        self.window = window
+        self.key = f"{WORKER_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+        self.started_at = time.time()
+        self.tasks_run = 0
+        self._running: Dict[str, tuple] = {}
+        self._runtimes: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[asyncio.Future] = None
+
+    def task_started(self, task_id: str, task_name: str):
+        with self._lock:
+            self._running[task_id] = (task_name, time.perf_counter())
+
+    def task_finished(self, task_id: str):
+        with self._lock:
+            started = self._running.pop(task_id, None)
+            if started is None:
+                return
+            task_name, started_at = started
+            self._runtimes.setdefault(task_name, deque(maxlen=self.window)).append(
+                (time.perf_counter() - started_at) * 1000
+            )
+            self.tasks_run += 1
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Publish heartbeats from the given (worker runtime) loop"""
+        if self._heartbeat is None or self._heartbeat.done():
+            self.key = f"{WORKER_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+            self._heartbeat = asyncio.run_coroutine_threadsafe(self._beat(), loop)
+
+    def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            runtimes = {name: list(samples) for name, samples in self._runtimes.items()}
+            running = [name for name, _ in self._running.values()]
+        return {
+            "hostname": socket.gethostname(),
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "heartbeat_at": time.time(),
+            "tasks_run": self.tasks_run,
+            "running": running,
+            "runtimes": {
+                name: {"count": len(samples), "p50_ms": percentile(samples, 0.5), "p95_ms": percentile(samples, 0.95)}
+                for name, samples in runtimes.items()
+            },
+        }
+
+    async def _beat(self):
+        while True:
+            try:
+                await async_redis_client.set(
+                    self.key,
+                    json.dumps(self.state()),
+                    ex=max(1, int(self.heartbeat_interval * 3))
+                )
+            except Exception as e:
+                logger.warning(f"Could not publish worker heartbeat: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+
+class QueueTelemetry:
+    """
+    Cached snapshot of broker queues and workers, for health checks and autoscaling.
+
+    A refresh reads, in one Redis pipeline, the length of every priority list
+    of every queue and the oldest message at the tail of each (its age comes
+    from the sent_at header stamped at publish time), plus the live worker
+    heartbeats. get_snapshot() returns the cached snapshot straight away and
+    starts a background refresh once it is older than refresh_interval, so
+    callers never wait on Redis or on the workers.
+
+    The autoscaling signal sizes each queue's worker pool as depth divided
+    by target_backlog_per_worker, plus one while the oldest message has
+    waited longer than max_message_age seconds.
+    """
+
+    def __init__(
+        self,
+        queues: List[str],
+        refresh_interval: float = 5.0,
+        target_backlog_per_worker: int = 100,
+        max_message_age: float = 30.0,
+        min_workers: int = 1,
+        max_workers: int = 20
+    ):
+        self.queues = queues
+        self.refresh_interval = refresh_interval
+        self.target_backlog_per_worker = max(1, target_backlog_per_worker)
+        self.max_message_age = max_message_age
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._refreshed_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        if self._snapshot is None:
+            await self.refresh()
+        elif time.monotonic() - self._refreshed_at > self.refresh_interval and not (self._refresh and not self._refresh.done()):
+            self._refresh = asyncio.create_task(self.refresh())
+        return self._snapshot
+
+    async def refresh(self) -> Dict[str, Any]:
+        try:
+            self._snapshot = await self._collect()
+        except Exception as e:
+            logger.error(f"Error collecting queue telemetry: {e}")
+            if self._snapshot is None:
+                self._snapshot = {"collected_at": time.time(), "error": str(e), "queues": {}, "workers": [], "tasks": {}, "autoscale": {}}
+        self._refreshed_at = time.monotonic()
+        return self._snapshot
+
+    async def _collect(self) -> Dict[str, Any]:
+        now = time.time()
+        pipe = async_redis_client.pipeline(transaction=False)
+        for queue in self.queues:
+            for key in priority_keys(queue):
+                pipe.llen(key)
+                pipe.lindex(key, -1)
+        replies = await pipe.execute()
+
+        queues = {}
+        position = 0
+        for queue in self.queues:
+            depth = 0
+            oldest_sent_at = None
+            for _ in PRIORITY_STEPS:
+                length, tail = replies[position], replies[position + 1]
+                position += 2
+                depth += length or 0
+                sent_at = self._sent_at(tail)
+                if sent_at is not None and (oldest_sent_at is None or sent_at < oldest_sent_at):
+                    oldest_sent_at = sent_at
+            queues[queue] = {
+                "depth": depth,
+                "oldest_age_seconds": round(max(0.0, now - oldest_sent_at), 3) if oldest_sent_at else None,
+            }
+
+        workers = []
+        worker_keys = [key async for key in async_redis_client.scan_iter(match=f"{WORKER_KEY_PREFIX}*", count=500)]
+        if worker_keys:
+            workers = [json.loads(value) for value in await async_redis_client.mget(worker_keys) if value]
+
+        tasks: Dict[str, Dict[str, Any]] = {}
+        for worker in workers:
+            for name, runtime in worker.get("runtimes", {}).items():
+                merged = tasks.setdefault(name, {"count": 0, "p50_ms": None, "p95_ms": None})
+                merged["count"] += runtime["count"]
+                for field in ("p50_ms", "p95_ms"):
+                    if runtime[field] is not None:
+                        merged[field] = max(merged[field] or 0, runtime[field])
+
+        return {
+            "collected_at": now,
+            "queues": queues,
+            "workers": workers,
+            "tasks": tasks,
+            "autoscale": self.autoscale(queues),
+        }
+
+    def autoscale(self, queues: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Desired worker count per queue from its depth and oldest message age"""
+        signal = {}
+        for queue, stats in queues.items():
+            desired = math.ceil(stats["depth"] / self.target_backlog_per_worker)
+            reason = "backlog"
+            age = stats["oldest_age_seconds"]
+            if age is not None and age > self.max_message_age:
+                desired += 1
+                reason = "message_age"
+            signal[queue] = {
+                "desired_workers": max(self.min_workers, min(self.max_workers, desired)),
+                "reason": reason,
+            }
+        return signal
+
+    def health(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        workers = len(snapshot["workers"])
+        snapshot_age = time.time() - snapshot["collected_at"]
+        stale = [
+            queue for queue, stats in snapshot["queues"].items()
+            if stats["oldest_age_seconds"] is not None and stats["oldest_age_seconds"] > self.max_message_age
+        ]
+        if snapshot_age > self.refresh_interval * 3:
+            status, message = "unhealthy", f"Telemetry is {snapshot_age:.0f}s old"
+        elif not workers:
+            status, message = "unhealthy", "No live Celery workers"
+        elif stale:
+            status, message = "degraded", f"Messages waiting longer than {self.max_message_age:g}s in: {', '.join(stale)}"
+        else:
+            status, message = "healthy", "Webhook processing system is operational"
+        return {
+            "status": status,
+            "message": message,
+            "workers": workers,
+            "queued": sum(stats["depth"] for stats in snapshot["queues"].values()),
+            "snapshot_age_seconds": round(snapshot_age, 3),
+        }
+
+    @staticmethod
+    def _sent_at(message: Optional[str]) -> Optional[float]:
+        if not message:
+            return None
+        try:
+            return float(json.loads(message)["headers"][SENT_AT_HEADER])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+def broker_queues() -> List[str]:
+    from app.tasks.routing import BULK_QUEUE, CRITICAL_QUEUE, DEFAULT_QUEUE, MAINTENANCE_QUEUE, SYNC_QUEUE, WEBHOOK_QUEUE
+    queues = [CRITICAL_QUEUE, WEBHOOK_QUEUE, BULK_QUEUE, SYNC_QUEUE, MAINTENANCE_QUEUE, DEFAULT_QUEUE]
+    for prefix in (CRITICAL_QUEUE, WEBHOOK_QUEUE):
+        queues.extend(f"{prefix}.partition.{n}" for n in range(settings.WEBHOOK_PARTITION_COUNT))
+    return queues
+
+
+worker_telemetry = WorkerTelemetry(heartbeat_interval=settings.WORKER_HEARTBEAT_INTERVAL_SECONDS)
+
+queue_telemetry = QueueTelemetry(
+    queues=broker_queues(),
+    refresh_interval=settings.QUEUE_TELEMETRY_INTERVAL_SECONDS,
+    target_backlog_per_worker=settings.AUTOSCALE_TARGET_BACKLOG_PER_WORKER,
+    max_message_age=settings.AUTOSCALE_MAX_MESSAGE_AGE_SECONDS,
+    min_workers=settings.AUTOSCALE_MIN_WORKERS,
+    max_workers=settings.AUTOSCALE_MAX_WORKERS
+)
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import Optional
+
+import structlog
+
+from app.core.redis_client import async_redis_client
+from app.core.retry_util import RateLimitError
+
+logger = structlog.get_logger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+
+
+class TokenBucket:
+    """
+    Token bucket: refills at `rate` tokens per second up to `burst` tokens,
+    one token per request.
+
+    acquire() reserves its token up front, letting the balance go negative,
+    and then sleeps until the refill covers it. Accounting happens without
+    awaiting, so no lock is needed, and each waiter's delay is fixed by its
+    place in line, so waiters are served in arrival order instead of all
+    queuing behind one sleeping holder of a lock. A cancelled waiter hands
+    its reservation back.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_wait: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self.max_wait = max_wait
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait for a token; raises RateLimitError if that would take longer than max_wait"""
+        delay = self._reserve()
+        if delay <= 0:
+            return
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._refund()
+            raise
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        self._refill()
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        if self.max_wait is not None and delay > self.max_wait:
+            raise RateLimitError(f"Rate limit wait of {delay:.2f}s exceeds {self.max_wait:.2f}s")
+        self._tokens -= 1
+        return delay
+
+    def _refund(self):
+        self._refill()
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+# KEYS[1] bucket; ARGV: rate, burst, max_wait (-1 for none).
+# Returns {reserved, delay}; delay as a string so Redis doesn't truncate it.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+
+local delay = math.max(0, (1 - tokens) / rate)
+if max_wait >= 0 and delay > max_wait then
+    return {0, tostring(delay)}
+end
+
+tokens = tokens - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return {1, tostring(delay)}
+"""
+
+# KEYS[1] bucket; ARGV: rate, burst. Hands back a reserved token.
+TOKEN_REFUND_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+if not state[1] then
+    return 0
+end
+local tokens = tonumber(state[1])
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate + 1)
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return 1
+"""
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process using the same key, e.g. all pods
+    calling an external API with one API key. Each reservation is a single
+    atomic Lua script run on the Redis clock, so the limit holds however
+    many callers there are. A cancelled waiter hands its reservation back
+    with a second script. If Redis can't be reached it falls back to a
+    local bucket with the same settings.
+    """
+
+    def __init__(self, key: str, rate: float, burst: Optional[float] = None, max_wait: Optional[float] = None):
+        super().__init__(rate, burst, max_wait)
+        self.key = f"{KEY_PREFIX}{key}"
+        self._script = async_redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._refund_script = async_redis_client.register_script(TOKEN_REFUND_SCRIPT)
+
+    async def acquire(self):
+        try:
+            reserved, delay = await self._script(
+                keys=[self.key],
+                args=[self.rate, self.burst, -1 if self.max_wait is None else self.max_wait]
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limiter {self.key} unavailable, limiting locally: {e}")
+            return await super().acquire()
+
+        delay = float(delay)
+        if not int(reserved):
+            raise RateLimitError(f"Rate limit wait of {delay:.2f}s exceeds {self.max_wait:.2f}s")
+        if delay <= 0:
+            return
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            await self._refund_shared()
+            raise
+
+    async def _refund_shared(self):
+        try:
+            await self._refund_script(keys=[self.key], args=[self.rate, self.burst])
+        except Exception as e:
+            logger.warning(f"Could not return token to Redis rate limiter {self.key}: {e}")
@@ -0,0 +1,9 @@
+import redis
+import redis.asyncio as aioredis
+
+from app.core.settings import settings
+
+# Shared clients for infrastructure code (caches, queues, pub/sub).
+# Connections are created lazily, so importing this module never touches Redis.
+redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+async_redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -1,22 +1,24 @@
 import structlog
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    before_sleep_log,
-)
 from functools import wraps
 import logging
 import httpx
-from typing import Callable, Any, Optional, List, Type
+from typing import Callable, Any, Awaitable, Collection, Optional, List, Type
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import asyncio
+import random
+import time
 
 logger = structlog.get_logger(__name__)
 
 class RetryableError(Exception):
     """Base class for retryable errors"""
-    pass
+
+    def __init__(self, message: str = "", status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 class ExternalServiceError(RetryableError):
     """External service temporarily unavailable"""
@@ -26,36 +28,156 @@ class RateLimitError(RetryableError):
     """Rate limit exceeded"""
     pass
 
-def create_retry_decorator(
-    max_attempts: int = 3,
-    wait_multiplier: float = 1,
-    wait_max: float = 60,
-    retry_exceptions: Optional[List[Type[Exception]]] = None
-):
-    """Create a customizable retry decorator"""
-    if retry_exceptions is None:
-        retry_exceptions = [RetryableError, httpx.HTTPError, ConnectionError]
-    
-    return retry(
-        stop=stop_after_attempt(max_attempts),
-        wait=wait_exponential(multiplier=wait_multiplier, max=wait_max),
-        retry=retry_if_exception_type(tuple(retry_exceptions)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        reraise=True
-    )
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# 4xx statuses worth retrying; any other 4xx will fail the same way again
+RETRYABLE_CLIENT_STATUSES = frozenset({408, 425, 429})
+# Failures where the request never reached the service, safe to retry for any method
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of requests.
+
+    Every first attempt deposits `ratio` tokens and every retry spends one,
+    plus min_per_second tokens accrue so low-traffic callers can still
+    retry. Retries are limited to about ratio x requests however many
+    requests fail, so when a service degrades each worker adds at most that
+    fraction of extra load instead of multiplying it by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: Optional[float] = None):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens if max_tokens is not None else max(10.0, min_per_second * 10)
+        self._tokens = self.max_tokens
+        self._updated = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self._refill()
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self._tokens < 1:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"tokens": round(self._tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed call.
+
+    Waits use full jitter: a random time between 0 and the exponential
+    backoff (base_delay * 2^(attempt-1), at most max_delay), so clients that
+    failed together don't retry together. A Retry-After from the service is
+    used instead when present; if it asks for more than max_retry_after
+    seconds the error is raised rather than waited on.
+
+    For HTTP calls (method given), non-idempotent methods such as POST are
+    retried only when the request never reached the service, when it was
+    refused with 429 or Retry-After, or when it carries an Idempotency-Key.
+    4xx responses other than 408/425/429 and RateLimitErrors raised before
+    sending (our own limiter, whose caller chose not to wait) are not retried.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_retry_after: float = 60.0
+    retry_exceptions: tuple = (RetryableError, httpx.HTTPError, ConnectionError)
+    idempotent_methods: Collection[str] = field(default_factory=lambda: IDEMPOTENT_METHODS)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None not to retry"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_retry_after:
+            return None
+        # A little jitter so callers told the same Retry-After don't return at once
+        return retry_after + random.uniform(0, min(1.0, self.base_delay))
+
+    def is_retryable(self, error: BaseException, method: Optional[str] = None, idempotent: bool = False) -> bool:
+        if not isinstance(error, self.retry_exceptions):
+            return False
+        status_code = getattr(error, "status_code", None)
+        if isinstance(error, RateLimitError) and status_code is None:
+            return False
+        if status_code is not None and 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_STATUSES:
+            return False
+        if method is None or idempotent or method.upper() in self.idempotent_methods:
+            return True
+        if getattr(error, "retry_after", None) is not None or status_code == 429:
+            return True
+        return isinstance(error, NOT_SENT_ERRORS) or isinstance(error.__cause__, NOT_SENT_ERRORS)
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        name: str = "call",
+        method: Optional[str] = None,
+        idempotent: bool = False,
+        budget: Optional[RetryBudget] = None
+    ) -> Any:
+        """Run func, retrying per this policy and, if given, within the budget"""
+        if budget is not None:
+            budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts or not self.is_retryable(e, method, idempotent):
+                    if attempt > 1:
+                        logger.error(f"Giving up on {name} after {attempt} attempts: {e}")
+                    raise
+                wait_time = self.delay(attempt, e)
+                if wait_time is None:
+                    logger.warning(f"Not retrying {name}: Retry-After {e.retry_after:.0f}s exceeds {self.max_retry_after:.0f}s")
+                    raise
+                if budget is not None and not budget.withdraw():
+                    logger.warning(f"Retry budget exhausted, not retrying {name}: {e}")
+                    raise
+                logger.warning(f"Attempt {attempt} failed for {name}: {e}. Retrying in {wait_time:.2f}s")
+                await asyncio.sleep(wait_time)
 
-external_api_retry = create_retry_decorator(
-    max_attempts=3,
-    wait_multiplier=2,
-    wait_max=30,
-    retry_exceptions=[
-        httpx.HTTPError,
-        httpx.ConnectError,
-        httpx.TimeoutException,
-        ExternalServiceError,
-        RateLimitError
-    ]
-)
 
 def async_retry(
     max_attempts: int = 3,
@@ -63,26 +185,18 @@ def async_retry(
     wait_max: float = 60,
     retry_exceptions: Optional[List[Type[Exception]]] = None
 ):
-    """Async retry decorator"""
-    if retry_exceptions is None:
-        retry_exceptions = [RetryableError, httpx.HTTPError, ConnectionError]
-    
+    """Async retry decorator using RetryPolicy (full jitter, Retry-After)"""
+    policy = RetryPolicy(
+        max_attempts=max_attempts,
+        base_delay=wait_multiplier,
+        max_delay=wait_max,
+        retry_exceptions=tuple(retry_exceptions) if retry_exceptions else RetryPolicy.retry_exceptions
+    )
+
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            attempt = 0
-            while attempt < max_attempts:
-                try:
-                    return await func(*args, **kwargs)
-                except tuple(retry_exceptions) as e:
-                    attempt += 1
-                    if attempt >= max_attempts:
-                        logger.error(f"Max retries ({max_attempts}) exceeded for {func.__name__}: {e}")
-                        raise
-                    
-                    wait_time = min(wait_multiplier * (2 ** (attempt - 1)), wait_max)
-                    logger.warning(f"Attempt {attempt} failed for {func.__name__}: {e}. Retrying in {wait_time}s")
-                    await asyncio.sleep(wait_time)
-            
+            return await policy.call(lambda: func(*args, **kwargs), name=func.__name__)
+
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -1,6 +1,6 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict # type: ignore
-from typing import List, Optional
+from typing import Dict, List, Optional
 import secrets
 
 class Settings(BaseSettings):
@@ -19,14 +19,128 @@ class Settings(BaseSettings):
 
     WEBHOOK_SIGNATURE_TOLERANCE_SECONDS: int = 300
     INTEGRATION_HEALTH_CHECK_INTERVAL: int = 60
+    INTEGRATION_HEALTH_TIMEOUT_SECONDS: float = 5.0
+    INTEGRATION_HEALTH_DEGRADED_MS: float = 1000.0  # slower answers count as degraded
+    INTEGRATION_HEALTH_WINDOW: int = 60  # recent samples per service behind the summary
+    INTEGRATION_HEALTH_RAW_RETENTION_HOURS: int = 24  # then rolled up per hour
+    INTEGRATION_HEALTH_ROLLUP_RETENTION_DAYS: int = 30
     MAX_WEBHOOK_PAYLOAD_SIZE: int = 1024*1024  # 1MB
+    WEBHOOK_SOURCE_MAX_PAYLOAD_SIZE: Dict[str, int] = {}  # per-source override, e.g. {"payment_service": 262144}
 
+    # Webhook signing secrets per source, newest first. Overrides the built-in
+    # defaults; list the old secret second while senders rotate to a new one.
+    # e.g. {"payment_service": ["new-secret", "old-secret"]}
+    WEBHOOK_SECRETS: Dict[str, List[str]] = {}
+
+    # Micro-batching for batch=True event handlers
+    EVENT_BATCH_MAX_SIZE: int = 100
+    EVENT_BATCH_MAX_WAIT_MS: int = 50
+
+    # Tenant existence cache used by webhook tenant validation
+    TENANT_CACHE_TTL_SECONDS: int = 300
+    TENANT_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+
+    # Buffered audit log writer
+    AUDIT_SINK_BATCH_SIZE: int = 500
+    AUDIT_SINK_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_SINK_MAX_QUEUE_SIZE: int = 10000
+    AUDIT_SINK_STRICT_DURABILITY: bool = False  # write every audit entry synchronously
+    AUDIT_DURABLE_EVENT_TYPES: List[str] = ["DEACTIVATE", "DELETE"]
+
+    # Weighted fair scheduling of webhook events across tenants
+    TENANT_SCHEDULER_MAX_CONCURRENCY: int = 50
+    TENANT_SCHEDULER_MAX_IN_FLIGHT_PER_TENANT: int = 10
+    TENANT_PLAN_WEIGHTS: Dict[str, int] = {"basic": 1, "professional": 2, "enterprise": 4}
+
+    # Webhook ingress backpressure
+    WEBHOOK_MAX_IN_FLIGHT: int = 1000
+    WEBHOOK_SOURCE_MAX_IN_FLIGHT: Dict[str, int] = {}  # e.g. {"communication_service": 500}
+    WEBHOOK_MAX_RETRY_AFTER_SECONDS: int = 30
+
+    # Batch webhook endpoint (POST /webhooks/{source}/batch)
+    WEBHOOK_BATCH_MAX_EVENTS: int = 1000
+    WEBHOOK_BATCH_MAX_PAYLOAD_SIZE: int = 16*1024*1024  # 16MB
+
+    # Bulk webhook task: events handled at once per worker, and events per
+    # chunk when a bulk job is spread over workers with a chord
+    WEBHOOK_BULK_CONCURRENCY: int = 50
+    WEBHOOK_BULK_CHUNK_SIZE: int = 500
+
+    # An event claimed for processing (webhook_idempotency_keys) whose worker
+    # hasn't finished it within this long may be claimed by another worker
+    WEBHOOK_CLAIM_LEASE_SECONDS: int = 300
+
+    # Per-entity ordering: events for one entity run in order within a partition
+    WEBHOOK_PARTITION_COUNT: int = 16
+
+    # Celery task priority per plan; the Redis broker serves 0 first and 9 last
+    TASK_PLAN_PRIORITIES: Dict[str, int] = {"enterprise": 0, "professional": 2, "basic": 4}
+    TASK_DEFAULT_PRIORITY: int = 5
+
+    # Celery result backend: default lifetime of stored results, and overrides
+    # per task name. Tasks nobody reads results from don't store them at all.
+    CELERY_RESULT_EXPIRES_SECONDS: int = 3600
+    TASK_RESULT_TTLS: Dict[str, int] = {
+        "process_bulk_webhook_events": 600,  # read once by the chord callback
+        "summarize_bulk_webhook_results": 86400,
+        "health_check": 60,
+    }
+
+    # Queue/worker telemetry and the queue-depth autoscaling signal
+    QUEUE_TELEMETRY_INTERVAL_SECONDS: float = 5.0
+    WORKER_HEARTBEAT_INTERVAL_SECONDS: float = 10.0
+    AUTOSCALE_TARGET_BACKLOG_PER_WORKER: int = 100
+    AUTOSCALE_MAX_MESSAGE_AGE_SECONDS: float = 30.0
+    AUTOSCALE_MIN_WORKERS: int = 1
+    AUTOSCALE_MAX_WORKERS: int = 20
+
+    # Time-partitioned tables (range partitions on created_at). Partitions are
+    # created PARTITION_PREMAKE_DAYS ahead and dropped whole once older than
+    # their table's retention; tables without a retention keep everything.
+    PARTITION_INTERVALS: Dict[str, str] = {"webhook_events": "day", "processed_events": "day", "audit_logs": "month"}
+    PARTITION_RETENTION_DAYS: Dict[str, int] = {"webhook_events": 90, "processed_events": 30, "audit_logs": 365}
+    PARTITION_PREMAKE_DAYS: int = 14
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    PARTITION_DETACH_CONCURRENTLY: bool = False  # needs Postgres 14+
+
+    # Webhook ingestion: "inline" processes in the API process, "stream" appends
+    # to a Redis Stream per source and returns 202 for stream consumers to process,
+    # "queue" stores the event and returns 202 for Celery workers to process
+    WEBHOOK_INGEST_MODE: str = "inline"
+    WEBHOOK_STREAM_PREFIX: str = "webhooks:stream:"
+    WEBHOOK_STREAM_MAXLEN: int = 1_000_000
+    WEBHOOK_STREAM_GROUP: str = "webhook-processors"
+    WEBHOOK_STREAM_BATCH_SIZE: int = 100
+    WEBHOOK_STREAM_CLAIM_IDLE_MS: int = 60_000
+    WEBHOOK_STREAM_MAX_DELIVERIES: int = 5
+
+    # External API circuit breakers, one per service and route (e.g. GET
+    # /users/{id}): open when at least FAILURE_THRESHOLD calls failed in the
+    # window and they are at least FAILURE_RATE of its calls. SHARED opens them
+    # in every process at once. Closed breakers beyond MAX_BREAKERS are dropped,
+    # least recently used first.
     CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
     CIRCUIT_BREAKER_RECOVERY_TIMEOUT: int = 60
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 60.0
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    CIRCUIT_BREAKER_SHARED: bool = True
+    CIRCUIT_BREAKER_MAX_BREAKERS: int = 1000
+
+    # External API retries: full-jitter backoff, Retry-After up to a limit, and
+    # per service at most RETRY_BUDGET_RATIO retries per request (plus a
+    # trickle of RETRY_BUDGET_MIN_PER_SECOND for quiet services)
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 30.0
+    RETRY_MAX_RETRY_AFTER_SECONDS: float = 60.0
+    RETRY_BUDGET_RATIO: float = 0.1
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
 
-    # Rate Limiting
+    # Rate Limiting. A rate-limited external client allows bursts of its rate
+    # unless it sets rate_limit_burst; BURST_RATE_LIMIT_PER_SECOND, if set, is
+    # the burst of clients that don't.
     DEFAULT_RATE_LIMIT_PER_SECOND: float = 10.0
-    BURST_RATE_LIMIT_PER_SECOND: float = 100.0
+    BURST_RATE_LIMIT_PER_SECOND: Optional[float] = None
     
     
     JWT_SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -47,6 +161,23 @@ class Settings(BaseSettings):
     EXTERNAL_USER_SERVICE_URL: str = "http://localhost:8001"
     EXTERNAL_PAYMENT_SERVICE_URL: str = "http://localhost:8002"
     EXTERNAL_COMMS_SERVICE_URL: str = "http://localhost:8003"
+
+    # Connection pools of the ApiClientFactory clients, one pool per external service
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP2_ENABLED: bool = False  # needs the h2 package (httpx[http2])
+    HTTP_DNS_CACHE_TTL_SECONDS: float = 300.0  # 0 disables the DNS cache
+
+    # GET response cache of the external clients: endpoint pattern -> seconds a
+    # response is served without asking; after that it is revalidated by ETag
+    EXTERNAL_CACHE_TTLS: Dict[str, float] = {
+        "/users/*": 30.0,
+        "/subscriptions/*": 10.0,
+        "/notifications/*": 5.0,
+    }
+    EXTERNAL_CACHE_DEFAULT_TTL_SECONDS: float = 0.0
+    EXTERNAL_CACHE_MAX_ENTRIES: int = 1000
     
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
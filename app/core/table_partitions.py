@@ -0,0 +1,201 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine
+from app.core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+INTERVALS = ("day", "month")
+
+
+@dataclass
+class PartitionedTable:
+    name: str
+    interval: str = "day"
+    retention_days: Optional[int] = None  # None keeps every partition
+
+
+def partition_start(moment: datetime, interval: str) -> datetime:
+    """Lower bound of the partition holding `moment` (UTC)"""
+    moment = moment.astimezone(timezone.utc)
+    if interval == "month":
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_partition_start(start: datetime, interval: str) -> datetime:
+    if interval == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(table: str, start: datetime, interval: str) -> str:
+    """e.g. webhook_events_p20250701 (daily) or audit_logs_p202507 (monthly)"""
+    return f"{table}_p{start:%Y%m}" if interval == "month" else f"{table}_p{start:%Y%m%d}"
+
+
+def parse_partition_name(table: str, name: str, interval: str) -> Optional[datetime]:
+    """Lower bound encoded in a partition's name, or None for other children (e.g. the default partition)"""
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        start = datetime.strptime(name[len(prefix):], "%Y%m" if interval == "month" else "%Y%m%d")
+    except ValueError:
+        return None
+    return start.replace(tzinfo=timezone.utc)
+
+
+class TablePartitionManager:
+    """
+    Maintains native range partitions (by created_at) for append-heavy tables.
+
+    ensure_partitions() creates partitions from the current one up to
+    premake_days ahead, so inserts never land in the default partition,
+    and the default partition itself if the table has none (e.g. after
+    Base.metadata.create_all, which only creates the parent).
+    drop_expired_partitions() enforces retention by detaching and dropping
+    whole partitions once every row in them is older than the table's
+    retention, which is a catalog change instead of a DELETE that scans,
+    bloats and writes WAL for every row.
+
+    DDL runs in autocommit so each partition change holds its locks only
+    briefly; with detach_concurrently (Postgres 14+) detaching doesn't
+    block queries on the parent at all.
+    """
+
+    def __init__(
+        self,
+        tables: List[PartitionedTable],
+        premake_days: int = 14,
+        detach_concurrently: bool = False,
+        bind: Engine = engine
+    ):
+        unsupported = {table.interval for table in tables} - set(INTERVALS)
+        if unsupported:
+            raise ValueError(f"Unsupported partition interval(s): {', '.join(sorted(unsupported))}")
+        self.tables = {table.name: table for table in tables}
+        self.premake_days = premake_days
+        self.detach_concurrently = detach_concurrently
+        self.bind = bind
+
+    def ensure_partitions(self, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """Create any missing partitions up to premake_days ahead; returns those created per table"""
+        now = now or datetime.now(timezone.utc)
+        created: Dict[str, List[str]] = {}
+        for table in self.tables.values():
+            self.ensure_default_partition(table.name)
+            existing = set(self.list_partitions(table.name))
+            start = partition_start(now, table.interval)
+            horizon = now + timedelta(days=self.premake_days)
+            while start <= horizon:
+                end = next_partition_start(start, table.interval)
+                name = partition_name(table.name, start, table.interval)
+                if name not in existing:
+                    try:
+                        self._execute(
+                            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table.name}" '
+                            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                        )
+                        created.setdefault(table.name, []).append(name)
+                        logger.info(f"Created partition {name}")
+                    except Exception as e:
+                        logger.error(f"Could not create partition {name}: {e}")
+                start = end
+        return created
+
+    def ensure_default_partition(self, table_name: str):
+        """Create the partition for rows outside every range, if missing"""
+        try:
+            self._execute(f'CREATE TABLE IF NOT EXISTS "{table_name}_default" PARTITION OF "{table_name}" DEFAULT')
+        except Exception as e:
+            logger.error(f"Could not create default partition of {table_name}: {e}")
+
+    def drop_expired_partitions(
+        self,
+        table_name: Optional[str] = None,
+        retention_days: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Detach and drop partitions entirely older than the retention period.
+        Defaults to every managed table with its configured retention;
+        retention_days overrides it for a single table.
+        """
+        now = now or datetime.now(timezone.utc)
+        tables = [self.tables[table_name]] if table_name else list(self.tables.values())
+        dropped: Dict[str, List[str]] = {}
+        for table in tables:
+            days = retention_days if retention_days is not None else table.retention_days
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            for name, start in self.list_partitions(table.name).items():
+                if next_partition_start(start, table.interval) > cutoff:
+                    continue
+                try:
+                    concurrently = " CONCURRENTLY" if self.detach_concurrently else ""
+                    self._execute(f'ALTER TABLE "{table.name}" DETACH PARTITION "{name}"{concurrently}')
+                    self._execute(f'DROP TABLE IF EXISTS "{name}"')
+                    dropped.setdefault(table.name, []).append(name)
+                    logger.info(f"Dropped expired partition {name}")
+                except Exception as e:
+                    logger.error(f"Could not drop partition {name}: {e}")
+        return dropped
+
+    def list_partitions(self, table_name: str) -> Dict[str, datetime]:
+        """Managed partitions of a table and their lower bounds, oldest first"""
+        interval = self.tables[table_name].interval
+        with self.bind.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = :table"
+                ),
+                {"table": table_name}
+            ).all()
+        partitions: List[Tuple[str, datetime]] = []
+        for (name,) in rows:
+            start = parse_partition_name(table_name, name, interval)
+            if start is not None:
+                partitions.append((name, start))
+        return dict(sorted(partitions, key=lambda partition: partition[1]))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for table in self.tables.values():
+            partitions = self.list_partitions(table.name)
+            stats[table.name] = {
+                "interval": table.interval,
+                "retention_days": table.retention_days,
+                "partitions": len(partitions),
+                "oldest": next(iter(partitions), None),
+                "newest": next(reversed(partitions), None) if partitions else None,
+            }
+        return stats
+
+    def _execute(self, statement: str):
+        with self.bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(statement))
+
+
+table_partitions = TablePartitionManager(
+    tables=[
+        PartitionedTable(
+            name=name,
+            interval=settings.PARTITION_INTERVALS.get(name, "day"),
+            retention_days=settings.PARTITION_RETENTION_DAYS.get(name)
+        )
+        for name in ("webhook_events", "processed_events", "audit_logs")
+    ],
+    premake_days=settings.PARTITION_PREMAKE_DAYS,
+    detach_concurrently=settings.PARTITION_DETACH_CONCURRENTLY
+)
@@ -0,0 +1,194 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import structlog
+
+from app.core.database import get_db_session
+from app.core.redis_client import async_redis_client, redis_client
+from app.core.settings import settings
+from app.models import Tenant
+
+logger = structlog.get_logger(__name__)
+
+
+class TenantCache:
+    """
+    Tenant existence cache for hot paths such as webhook tenant validation.
+
+    Lookups go through three layers: an in-process TTL cache, a Redis set of
+    known tenants (plus short-lived keys for unknown ids), and finally Postgres.
+    Tenant changes are published on a pub/sub channel so every process drops
+    its local entry straight away instead of waiting for the TTL.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        redis_key: str = "tenants:valid",
+        missing_key_prefix: str = "tenants:missing:",
+        channel: str = "tenants:invalidate"
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.redis_key = redis_key
+        self.missing_key_prefix = missing_key_prefix
+        self.channel = channel
+        self._local: Dict[str, Tuple[bool, float]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener_retry_at = 0.0
+
+    @staticmethod
+    def normalize(tenant_id: str) -> Optional[str]:
+        """Canonical string form of a tenant id, or None if it is not a UUID"""
+        try:
+            return str(uuid.UUID(str(tenant_id)))
+        except ValueError:
+            return None
+
+    async def exists(self, tenant_id: str) -> bool:
+        """Check whether a single tenant exists"""
+        tenant_id = self.normalize(tenant_id)
+        if tenant_id is None:
+            return False
+        return tenant_id in await self.exists_many([tenant_id])
+
+    async def exists_many(self, tenant_ids: Iterable[str]) -> Set[str]:
+        """Return the normalized ids of the tenants that exist"""
+        self._ensure_listener()
+        now = time.monotonic()
+
+        valid: Set[str] = set()
+        unresolved: Set[str] = set()
+        for tenant_id in filter(None, map(self.normalize, tenant_ids)):
+            cached = self._local.get(tenant_id)
+            if cached and cached[1] > now:
+                if cached[0]:
+                    valid.add(tenant_id)
+            else:
+                unresolved.add(tenant_id)
+
+        if unresolved:
+            unresolved = await self._resolve_from_redis(unresolved, valid, now)
+
+        if unresolved:
+            found = await asyncio.to_thread(self._load_from_db, unresolved)
+            await self._store(found, unresolved - found, now)
+            valid |= found
+
+        return valid
+
+    async def _resolve_from_redis(self, tenant_ids: Set[str], valid: Set[str], now: float) -> Set[str]:
+        """Resolve what Redis knows about; return the ids it could not answer for"""
+        ordered = list(tenant_ids)
+        try:
+            async with async_redis_client.pipeline(transaction=False) as pipe:
+                for tenant_id in ordered:
+                    pipe.sismember(self.redis_key, tenant_id)
+                    pipe.exists(f"{self.missing_key_prefix}{tenant_id}")
+                replies = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Tenant cache Redis lookup failed: {e}")
+            return tenant_ids
+
+        unresolved = set()
+        for i, tenant_id in enumerate(ordered):
+            is_member, is_missing = replies[2 * i], replies[2 * i + 1]
+            if is_member:
+                valid.add(tenant_id)
+                self._local[tenant_id] = (True, now + self.ttl_seconds)
+            elif is_missing:
+                self._local[tenant_id] = (False, now + self.negative_ttl_seconds)
+            else:
+                unresolved.add(tenant_id)
+        return unresolved
+
+    def _load_from_db(self, tenant_ids: Set[str]) -> Set[str]:
+        """Active tenants among the given ids; blocking, run it off the event loop"""
+        with get_db_session() as db:
+            rows = db.query(Tenant.id).filter(
+                Tenant.id.in_(tenant_ids),
+                Tenant.is_active.is_(True)
+            ).all()
+            return {str(row.id) for row in rows}
+
+    async def _store(self, found: Set[str], missing: Set[str], now: float):
+        for tenant_id in found:
+            self._local[tenant_id] = (True, now + self.ttl_seconds)
+        for tenant_id in missing:
+            self._local[tenant_id] = (False, now + self.negative_ttl_seconds)
+
+        try:
+            async with async_redis_client.pipeline(transaction=False) as pipe:
+                if found:
+                    pipe.sadd(self.redis_key, *found)
+                for tenant_id in missing:
+                    pipe.set(f"{self.missing_key_prefix}{tenant_id}", 1, ex=int(self.negative_ttl_seconds) or 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Tenant cache Redis update failed: {e}")
+
+    def publish_change(self, tenant_id: str, exists: bool):
+        """
+        Record a tenant being created or deactivated and tell every process.
+        Called from synchronous service code after the change is committed.
+        """
+        tenant_id = self.normalize(tenant_id)
+        if tenant_id is None:
+            return
+
+        self._local.pop(tenant_id, None)
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            if exists:
+                pipe.sadd(self.redis_key, tenant_id)
+            else:
+                pipe.srem(self.redis_key, tenant_id)
+            pipe.delete(f"{self.missing_key_prefix}{tenant_id}")
+            pipe.publish(self.channel, tenant_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish tenant cache invalidation for {tenant_id}: {e}")
+
+    def invalidate_local(self, tenant_id: Optional[str] = None):
+        """Drop one tenant (or everything) from the in-process cache"""
+        if tenant_id is None:
+            self._local.clear()
+        else:
+            self._local.pop(tenant_id, None)
+
+    def _ensure_listener(self):
+        """Start the invalidation listener on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._listener_loop is loop and self._listener:
+            if not self._listener.done() or time.monotonic() < self._listener_retry_at:
+                return
+        self._listener_loop = loop
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        pubsub = async_redis_client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.invalidate_local(message["data"])
+        except Exception as e:
+            # Without invalidations, entries still expire through their TTL
+            logger.warning(f"Tenant cache invalidation listener stopped: {e}")
+            self.invalidate_local()
+            self._listener_retry_at = time.monotonic() + 5.0
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+tenant_cache = TenantCache(
+    ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.TENANT_CACHE_NEGATIVE_TTL_SECONDS
+)
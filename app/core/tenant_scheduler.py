@@ -0,0 +1,223 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+import structlog
+
+from app.core.database import get_db_session
+from app.core.settings import settings
+from app.core.tenant_cache import tenant_cache
+from app.models import Tenant
+
+logger = structlog.get_logger(__name__)
+
+NO_TENANT = "__no_tenant__"
+
+
+@dataclass
+class ScheduledJob:
+    payload: Any
+    dispatch: Callable[[Any], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class TenantScheduler:
+    """
+    Weighted fair scheduler for webhook events.
+
+    Each tenant gets its own FIFO queue and queues are served with deficit
+    round-robin: every turn a tenant earns credit equal to its plan weight and
+    spends one credit per dispatched event. A global concurrency limit and a
+    per-tenant in-flight cap mean a burst from one tenant only delays that
+    tenant's own events.
+
+    Tenant plans are cached and loaded in a worker thread, never inside a
+    scheduling pass: until a tenant's plan has loaded (or while it is
+    refreshed) it is scheduled with its previous or the default weight.
+    The Celery task router reads the same cache through plan().
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_in_flight_per_tenant: int,
+        plan_weights: Dict[str, int],
+        default_weight: int = 1,
+        weight_ttl_seconds: float = 300.0
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_in_flight_per_tenant = max(1, max_in_flight_per_tenant)
+        self.plan_weights = plan_weights
+        self.default_weight = default_weight
+        self.weight_ttl_seconds = weight_ttl_seconds
+
+        self._queues: Dict[str, Deque[ScheduledJob]] = {}
+        self._active: Deque[str] = deque()
+        self._deficit: Dict[str, float] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._running = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._plans: Dict[str, Tuple[Optional[str], float]] = {}
+        self._loading_plans: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def submit(self, payload: Any, dispatch: Callable[[Any], Awaitable[Any]]) -> asyncio.Future:
+        """Queue an event for its tenant; the returned future resolves with dispatch's result"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._reset(loop)
+
+        tenant = tenant_cache.normalize(payload.tenant_id) if payload.tenant_id else None
+        tenant = tenant or NO_TENANT
+
+        future = loop.create_future()
+        if tenant not in self._queues:
+            self._queues[tenant] = deque()
+            self._deficit[tenant] = 0.0
+            self._active.append(tenant)
+        self._queues[tenant].append(ScheduledJob(payload, dispatch, future, time.monotonic()))
+
+        self._schedule()
+        return future
+
+    def _reset(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queues.clear()
+        self._active.clear()
+        self._deficit.clear()
+        self._in_flight.clear()
+        self._running = 0
+        self._tasks = set()
+        self._loading_plans.clear()
+
+    def _weight(self, tenant: str) -> int:
+        """Scheduling weight for a tenant, derived from Tenant.plan_type"""
+        if tenant == NO_TENANT:
+            return self.default_weight
+
+        cached = self._plans.get(tenant)
+        if (not cached or cached[1] <= time.monotonic()) and tenant not in self._loading_plans:
+            self._loading_plans.add(tenant)
+            task = self._loop.create_task(self._load_plan(tenant))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if not cached or cached[0] is None:
+            return self.default_weight
+        return self.plan_weights.get(cached[0], self.default_weight)
+
+    def plan(self, tenant: str) -> Optional[str]:
+        """
+        Cached Tenant.plan_type for a normalized tenant id. Queries the
+        database on a miss, so call it from sync code or a worker thread.
+        """
+        cached = self._plans.get(tenant)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        plan = self._query_plan(tenant)
+        self._plans[tenant] = (plan, time.monotonic() + self.weight_ttl_seconds)
+        return plan
+
+    async def _load_plan(self, tenant: str):
+        try:
+            plan = await asyncio.to_thread(self._query_plan, tenant)
+            self._plans[tenant] = (plan, time.monotonic() + self.weight_ttl_seconds)
+        finally:
+            self._loading_plans.discard(tenant)
+
+    def _query_plan(self, tenant: str) -> Optional[str]:
+        try:
+            with get_db_session() as db:
+                row = db.query(Tenant.plan_type).filter(Tenant.id == tenant).first()
+                return row.plan_type if row else None
+        except Exception as e:
+            logger.warning(f"Could not load plan for tenant {tenant}: {e}")
+        return None
+
+    def _schedule(self):
+        """Dispatch as many queued events as the concurrency limits allow"""
+        idle_visits = 0
+        while self._running < self.max_concurrency and self._active and idle_visits < len(self._active):
+            tenant = self._active[0]
+            queue = self._queues[tenant]
+
+            if self._in_flight.get(tenant, 0) >= self.max_in_flight_per_tenant:
+                self._active.rotate(-1)
+                idle_visits += 1
+                continue
+
+            if self._deficit[tenant] < 1:
+                self._deficit[tenant] += self._weight(tenant)
+
+            dispatched = False
+            while (
+                queue
+                and self._deficit[tenant] >= 1
+                and self._running < self.max_concurrency
+                and self._in_flight.get(tenant, 0) < self.max_in_flight_per_tenant
+            ):
+                self._deficit[tenant] -= 1
+                self._start(tenant, queue.popleft())
+                dispatched = True
+
+            if not queue:
+                self._active.popleft()
+                del self._queues[tenant]
+                del self._deficit[tenant]
+            elif self._running >= self.max_concurrency and self._deficit[tenant] >= 1:
+                # Out of global capacity mid-turn: resume this tenant's turn next time
+                break
+            else:
+                self._active.rotate(-1)
+
+            idle_visits = 0 if dispatched else idle_visits + 1
+
+    def _start(self, tenant: str, job: ScheduledJob):
+        self._running += 1
+        self._in_flight[tenant] = self._in_flight.get(tenant, 0) + 1
+        task = self._loop.create_task(self._run(tenant, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, tenant: str, job: ScheduledJob):
+        try:
+            result = await job.dispatch(job.payload)
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Scheduled event for tenant {tenant} failed: {e}")
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._running -= 1
+            self._in_flight[tenant] -= 1
+            if not self._in_flight[tenant]:
+                del self._in_flight[tenant]
+            self._schedule()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and in-flight counts per tenant"""
+        now = time.monotonic()
+        return {
+            "running": self._running,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "tenants": {
+                tenant: {
+                    "queued": len(self._queues.get(tenant, ())),
+                    "in_flight": self._in_flight.get(tenant, 0),
+                    "oldest_wait_ms": round((now - self._queues[tenant][0].enqueued_at) * 1000, 1)
+                    if self._queues.get(tenant) else 0.0,
+                }
+                for tenant in set(self._queues) | set(self._in_flight)
+            },
+        }
+
+
+tenant_scheduler = TenantScheduler(
+    max_concurrency=settings.TENANT_SCHEDULER_MAX_CONCURRENCY,
+    max_in_flight_per_tenant=settings.TENANT_SCHEDULER_MAX_IN_FLIGHT_PER_TENANT,
+    plan_weights=settings.TENANT_PLAN_WEIGHTS,
+    weight_ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS
+)
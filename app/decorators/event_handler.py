@@ -1,39 +1,202 @@
+from dataclasses import replace
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, List, Optional
 import asyncio
 import logging
 
 import structlog
-from app.core.event_pipeline import EventPipeline, event_emitter, processing_pipeline
+from app.core.event_batcher import EventBatcher
+from app.core.event_pipeline import EventPipeline, event_emitter, handler_name, processing_pipeline
+from app.core.partitioned_executor import entity_key
+from app.core.settings import settings
 from app.schemas.webhooks import ProcessingResult, WebhookPayload 
 
 logger = structlog.get_logger(__name__)
 
-def event_handler(event_type: str, pipeline: EventPipeline = None):
+async def process_event_batch(
+    pipeline: EventPipeline,
+    handler_func: Callable,
+    payloads: List[WebhookPayload],
+    handler: Optional[str] = None
+) -> List[ProcessingResult]:
     """
-    Decorator that wraps handlers with the full processing pipeline
+    Run a batch of events through the pipeline with set-based dedup, middleware
+    and status writes, calling the handler once with every accepted payload.
+    Events are claimed for handler, the handler function's name by default.
+    """
+    handler = handler or handler_name(handler_func)
+    results: List[Optional[ProcessingResult]] = [None] * len(payloads)
+
+    claimed = await pipeline.claim_events(payloads, handler)
+    fresh = []
+    for i, is_claimed in enumerate(claimed):
+        if not is_claimed:
+            results[i] = ProcessingResult(success=True, metadata={"skipped": "duplicate_event"})
+        else:
+            fresh.append(i)
+
+    outcomes = await pipeline.apply_batch_middleware([payloads[i] for i in fresh])
+    accepted = []
+    accepted_payloads = []
+    for i, outcome in zip(fresh, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = ProcessingResult(success=False, error_message=str(outcome))
+        else:
+            accepted.append(i)
+            accepted_payloads.append(outcome)
+
+    if accepted_payloads:
+        logger.info(f"Processing batch of {len(accepted_payloads)} {accepted_payloads[0].event_type} events")
+        try:
+            handler_results = await handler_func(accepted_payloads)
+            if isinstance(handler_results, ProcessingResult):
+                handler_results = [
+                    replace(handler_results, metadata=dict(handler_results.metadata)) for _ in accepted
+                ]
+            if len(handler_results) != len(accepted):
+                raise ValueError(f"Handler returned {len(handler_results)} results for {len(accepted)} events")
+        except Exception as e:
+            logger.error(f"Error processing event batch: {e}")
+            handler_results = [ProcessingResult(success=False, error_message=str(e)) for _ in accepted]
+
+        for i, result in zip(accepted, handler_results):
+            results[i] = result
+
+        await pipeline.run_deferred_batch_middleware(accepted_payloads)
+
+    await pipeline.mark_events_processed(payloads, results, handler)
+
+    failed = sum(1 for result in results if not result.success)
+    logger.info(f"Processed event batch: {len(payloads)} events, {len(payloads) - len(fresh)} duplicates, {failed} failed")
+    return results
+
+def _per_event_handler(handler_func: Callable, concurrency: int) -> Callable:
+    """
+    Adapt a single-event handler to take a batch. Events for the same entity
+    run one after another in batch order; different entities run concurrently.
+    """
+    async def run_batch(payloads: List[WebhookPayload]) -> List[ProcessingResult]:
+        semaphore = asyncio.Semaphore(concurrency)
+        results: List[Optional[ProcessingResult]] = [None] * len(payloads)
+        groups = {}
+        for i, payload in enumerate(payloads):
+            groups.setdefault(entity_key(payload) or f"__event_{i}", []).append(i)
+
+        async def run_group(indexes: List[int]):
+            async with semaphore:
+                for i in indexes:
+                    try:
+                        result = await handler_func(payloads[i])
+                        results[i] = result if isinstance(result, ProcessingResult) else ProcessingResult(success=result is not False)
+                    except Exception as e:
+                        logger.error(f"Error processing event {payloads[i].event_id}: {e}")
+                        results[i] = ProcessingResult(success=False, error_message=str(e))
+
+        await asyncio.gather(*(run_group(indexes) for indexes in groups.values()))
+        return results
+
+    return run_batch
+
+async def process_event_bulk(
+    payloads: List[WebhookPayload],
+    concurrency: Optional[int] = None
+) -> List[ProcessingResult]:
+    """
+    Process already-decoded events without going through the emitter one by one.
+
+    Events are grouped by type and each group goes through process_event_batch
+    for every registered handler, so dedup and status writes are one query
+    each per group. Single-event handlers run with bounded concurrency.
+    """
+    concurrency = concurrency or settings.WEBHOOK_BULK_CONCURRENCY
+    results: List[ProcessingResult] = [
+        ProcessingResult(success=True, metadata={"skipped": "no_handler"}) for _ in payloads
+    ]
+
+    by_type = {}
+    for i, payload in enumerate(payloads):
+        by_type.setdefault(payload.event_type, []).append(i)
+
+    for event_type, indexes in by_type.items():
+        group = [payloads[i] for i in indexes]
+        for listener in event_emitter.listeners(event_type):
+            handler_func = getattr(listener, "handler_func", None)
+            if handler_func is None:
+                # Not registered through @event_handler: no pipeline to batch through
+                handler_results = await _per_event_handler(listener, concurrency)(group)
+            else:
+                if not listener.batched:
+                    handler_func = _per_event_handler(handler_func, concurrency)
+                handler_results = await process_event_batch(
+                    listener.pipeline or processing_pipeline, handler_func, group, handler_name(listener)
+                )
+
+            for i, result in zip(indexes, handler_results):
+                if results[i].metadata.get("skipped") == "no_handler" or not result.success:
+                    results[i] = result
+
+    return results
+
+def event_handler(
+    event_type: str,
+    pipeline: EventPipeline = None,
+    batch: bool = False,
+    max_batch_size: Optional[int] = None,
+    max_wait_ms: Optional[int] = None
+):
+    """
+    Decorator that wraps handlers with the full processing pipeline.
+
+    With batch=True, events are collected into micro-batches of up to
+    max_batch_size events or max_wait_ms milliseconds. The handler is then
+    called with a list of payloads and returns a list of results (or one
+    result for the whole batch).
     """
     def decorator(handler_func: Callable) -> Callable:
+        if batch:
+            batcher = EventBatcher(
+                processor=lambda payloads: process_event_batch(
+                    pipeline or processing_pipeline, handler_func, payloads
+                ),
+                max_batch_size=max_batch_size or settings.EVENT_BATCH_MAX_SIZE,
+                max_wait_ms=max_wait_ms if max_wait_ms is not None else settings.EVENT_BATCH_MAX_WAIT_MS,
+                name=event_type
+            )
+
+            @wraps(handler_func)
+            async def batch_wrapper(payload: WebhookPayload) -> ProcessingResult:
+                return await batcher.submit(payload)
+
+            batch_wrapper.batcher = batcher
+            batch_wrapper.handler_func = handler_func
+            batch_wrapper.pipeline = pipeline
+            batch_wrapper.batched = True
+            event_emitter.on(event_type, batch_wrapper)
+            logger.info(f"Registered batch handler for event: {event_type}")
+
+            return batch_wrapper
+
+        name = handler_name(handler_func)
+
         @wraps(handler_func)
         async def wrapper(payload: WebhookPayload) -> ProcessingResult:
             current_pipeline = pipeline or processing_pipeline
             
             try:
-                if await current_pipeline.is_duplicate_event(payload):
+                if not await current_pipeline.claim_event(payload, name):
                     logger.info(f"Duplicate event detected: {payload.event_id}")
-                    result = ProcessingResult(
+                    return ProcessingResult(
                         success=True,
                         metadata={"skipped": "duplicate_event"}
                     )
-                    await current_pipeline.mark_event_processed(payload, result)
-                    return result
                 
                 processed_payload = await current_pipeline.apply_middleware(payload)
                 
                 logger.info(f"Processing event: {processed_payload.event_type} - {processed_payload.event_id}")
                 result = await handler_func(processed_payload)
+                await current_pipeline.run_deferred_middleware(processed_payload)
                 
-                await current_pipeline.mark_event_processed(payload, result)
+                await current_pipeline.mark_event_processed(payload, result, name)
                 
                 if result.success:
                     logger.info(f"Successfully processed event: {processed_payload.event_id}")
@@ -50,12 +213,16 @@ def event_handler(event_type: str, pipeline: EventPipeline = None):
                 )
                 
                 try:
-                    await current_pipeline.mark_event_processed(payload, result)
+                    await current_pipeline.mark_event_processed(payload, result, name)
                 except Exception as mark_error:
                     logger.error(f"Error marking failed event: {mark_error}")
                 
                 return result
         
+        wrapper.handler_func = handler_func
+        wrapper.pipeline = pipeline
+        wrapper.batched = False
+
         # Register the wrapped handler with pymitter
         event_emitter.on(event_type, wrapper)
         logger.info(f"Registered handler for event: {event_type}")
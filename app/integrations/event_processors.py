@@ -86,18 +86,22 @@ def process_subscription_created(self, event: WebhookEvent) -> bool:
         logger.error(f"Error processing subscription_created event: {str(e)}")
         return False
 
-@event_handler(EventType.EMAIL_DELIVERED.value)
-def process_email_delivered(self, event: WebhookEvent) -> bool:
-    """Process email delivery event"""
-    try:
-        payload = event.payload
-        
-        logger.info(f"Recorded email delivery {payload['message_id']} for tenant {payload['tenant_id']}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error processing email_delivered event: {str(e)}")
-        return False
+@event_handler(EventType.EMAIL_DELIVERED.value, batch=True)
+async def process_email_delivered(events: List[WebhookPayload]) -> List[ProcessingResult]:
+    """Process a batch of email delivery events"""
+    results = []
+    for event in events:
+        try:
+            payload = event.data
+            
+            logger.info(f"Recorded email delivery {payload['id']} for tenant {event.tenant_id}")
+            results.append(ProcessingResult(success=True))
+            
+        except Exception as e:
+            logger.error(f"Error processing email_delivered event: {str(e)}")
+            results.append(ProcessingResult(success=False, error_message=str(e)))
+
+    return results
 
 @event_handler(EventType.EMAIL_BOUNCED.value)
 def process_email_bounced(self, event: WebhookEvent) -> bool:
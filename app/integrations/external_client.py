@@ -1,52 +1,156 @@
 import httpx
 import asyncio
-from typing import Dict, Any, Optional, List, Union
-from dataclasses import dataclass
+import importlib.util
+import ipaddress
+import re
+import socket
+from typing import Dict, Any, Optional, List, Tuple, Union
+from dataclasses import dataclass, replace
 import logging
 
 import structlog
-from app.core.retry_util import async_retry, ExternalServiceError, RateLimitError
-from app.core.circuit_breaker import circuit_breaker, CircuitBreakerConfig
+from app.core.retry_util import ExternalServiceError, RateLimitError, RetryBudget, RetryPolicy, parse_retry_after
+from app.core.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, circuit_breaker_stats, get_circuit_breaker
+from app.core.rate_limiter import RedisTokenBucket, TokenBucket
+from app.integrations.response_cache import ResponseCache
+from app.core.settings import settings
 import time
 import json
 from urllib.parse import urljoin
 
 logger = structlog.get_logger(__name__)
 
+# Path segments kept as they are when deriving an endpoint's pattern: lowercase
+# words such as "users" or "process", and API versions. Anything else (numbers,
+# UUIDs, prefixed ids like sub_1234abcd or cus_NffrFeUfNV2Hib) is a record id.
+LITERAL_SEGMENT = re.compile(r"^([a-z][a-z_-]{0,31}|v\d{1,3})?$")
+
+
+def endpoint_pattern(endpoint: str) -> str:
+    """Endpoint with record ids replaced, e.g. /users/{id}, to key per-endpoint state"""
+    path = endpoint.split("?", 1)[0]
+    return "/".join(segment if LITERAL_SEGMENT.match(segment) else "{id}" for segment in path.split("/"))
+
+
 @dataclass
 class ApiClientConfig:
     base_url: str
     timeout: float = 30.0
-    max_retries: int = 3
+    max_retries: int = 3  # retries after the first attempt, within the retry budget
     rate_limit_per_second: Optional[float] = None
+    rate_limit_burst: Optional[float] = None  # defaults to BURST_RATE_LIMIT_PER_SECOND if set, else the rate
+    rate_limit_max_wait: Optional[float] = None  # raise RateLimitError rather than wait longer
+    rate_limit_key: Optional[str] = None  # share the limit across processes via Redis, e.g. per API key
     default_headers: Optional[Dict[str, str]] = None
     auth_token: Optional[str] = None
-    circuit_breaker_config: Optional[CircuitBreakerConfig] = None
+    circuit_breaker_config: Optional[CircuitBreakerConfig] = None  # template for the per-endpoint breakers
+    retry_policy: Optional[RetryPolicy] = None  # defaults to the RETRY_* settings and max_retries
+    max_connections: int = settings.HTTP_MAX_CONNECTIONS
+    max_keepalive_connections: int = settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+    http2: bool = settings.HTTP2_ENABLED
+    dns_cache_ttl: float = settings.HTTP_DNS_CACHE_TTL_SECONDS
+    response_cache: bool = True  # coalesce and cache GETs, see ResponseCache
+    cache_ttls: Optional[Dict[str, float]] = None  # defaults to EXTERNAL_CACHE_TTLS
+    health_monitor: Optional[Any] = None  # IntegrationHealthMonitor feeding the breakers and timeouts
+
+
+class CachingResolverTransport(httpx.AsyncBaseTransport):
+    """
+    Resolves each host once per ttl seconds instead of on every new connection.
+
+    The request is sent to the cached address while the Host header and the
+    TLS server name (sni_hostname) keep the original host, so virtual hosting
+    and certificate checks are unaffected. An address that refuses a
+    connection is dropped from the cache and resolved again next time.
+    """
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, ttl: float):
+        self.transport = transport
+        self.ttl = ttl
+        self._addresses: Dict[Tuple[str, int], Tuple[str, float]] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        key = None
+        if host and not self._is_ip(host):
+            key = (host, request.url.port or (443 if request.url.scheme == "https" else 80))
+            address = await self._resolve(key)
+            if address:
+                request.url = request.url.copy_with(host=address)
+                if request.url.scheme == "https":
+                    request.extensions = {**request.extensions, "sni_hostname": host}
+        try:
+            return await self.transport.handle_async_request(request)
+        except httpx.ConnectError:
+            if key:
+                self._addresses.pop(key, None)
+            raise
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    async def _resolve(self, key: Tuple[str, int]) -> Optional[str]:
+        cached = self._addresses.get(key)
+        now = time.monotonic()
+        if cached and cached[1] > now:
+            return cached[0]
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(*key, type=socket.SOCK_STREAM)
+        except OSError as e:
+            logger.warning(f"Could not resolve {key[0]}: {e}")
+            # Let the transport resolve (and fail) on its own
+            return cached[0] if cached else None
+        address = infos[0][4][0]
+        self._addresses[key] = (address, now + self.ttl)
+        return address
+
+    @staticmethod
+    def _is_ip(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
 
-class RateLimiter:
-    def __init__(self, requests_per_second: float):
-        self.requests_per_second = requests_per_second
-        self.last_request_time = 0.0
-        self._lock = asyncio.Lock()
-    
-    async def acquire(self):
-        async with self._lock:
-            now = time.time()
-            time_since_last = now - self.last_request_time
-            min_interval = 1.0 / self.requests_per_second
-            
-            if time_since_last < min_interval:
-                sleep_time = min_interval - time_since_last
-                await asyncio.sleep(sleep_time)
-            
-            self.last_request_time = time.time()
 
 class ExternalApiClient:
-    def __init__(self, config: ApiClientConfig):
+    def __init__(self, config: ApiClientConfig, service_name: Optional[str] = None):
         self.config = config
+        self.service_name = service_name or config.base_url
+        self.breaker_config = config.circuit_breaker_config or CircuitBreakerConfig(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+            failure_rate_threshold=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+            half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS,
+            shared=settings.CIRCUIT_BREAKER_SHARED
+        )
+        self.health_monitor = config.health_monitor
+        if self.health_monitor is not None and self.breaker_config.available is None:
+            self.breaker_config = replace(
+                self.breaker_config,
+                available=lambda: self.health_monitor.is_available(self.service_name)
+            )
+        self.retry_policy = config.retry_policy or RetryPolicy(
+            max_attempts=config.max_retries + 1,
+            base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+            max_retry_after=settings.RETRY_MAX_RETRY_AFTER_SECONDS
+        )
+        self.retry_budget = RetryBudget(settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_MIN_PER_SECOND)
         self.rate_limiter = None
         if config.rate_limit_per_second:
-            self.rate_limiter = RateLimiter(config.rate_limit_per_second)
+            burst = config.rate_limit_burst if config.rate_limit_burst is not None else settings.BURST_RATE_LIMIT_PER_SECOND
+            if config.rate_limit_key:
+                self.rate_limiter = RedisTokenBucket(
+                    config.rate_limit_key,
+                    config.rate_limit_per_second,
+                    burst,
+                    config.rate_limit_max_wait
+                )
+            else:
+                self.rate_limiter = TokenBucket(config.rate_limit_per_second, burst, config.rate_limit_max_wait)
         
         headers = {
             "Content-Type": "application/json",
@@ -56,10 +160,33 @@ class ExternalApiClient:
         if config.auth_token: #may be api key
             headers["Authorization"] = f"Bearer {config.auth_token}"
         
+        http2 = config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        self.limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+        self.transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+        self.requests_sent = 0
+        self.response_cache = None
+        if config.response_cache:
+            self.response_cache = ResponseCache(
+                ttls=config.cache_ttls if config.cache_ttls is not None else settings.EXTERNAL_CACHE_TTLS,
+                default_ttl=settings.EXTERNAL_CACHE_DEFAULT_TTL_SECONDS,
+                max_entries=settings.EXTERNAL_CACHE_MAX_ENTRIES
+            )
+
         self.client = httpx.AsyncClient(
             base_url=config.base_url,
             timeout=config.timeout,
-            headers=headers
+            headers=headers,
+            transport=(
+                CachingResolverTransport(self.transport, config.dns_cache_ttl)
+                if config.dns_cache_ttl > 0 else self.transport
+            )
         )
     
     async def __aenter__(self):
@@ -74,102 +201,251 @@ class ExternalApiClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
     ) -> httpx.Response:
-        """Make HTTP request with rate limiting and error handling"""
-        
-        if self.rate_limiter:
-            await self.rate_limiter.acquire()
+        """
+        Make HTTP request, retried per the retry policy within this service's retry budget.
+        route is the endpoint's template, e.g. "/users/{id}", naming its circuit breaker;
+        without it the template is derived from the endpoint.
+        """
+        idempotent = any(name.lower() == "idempotency-key" for name in (headers or {}))
+        return await self.retry_policy.call(
+            lambda: self._send(method, endpoint, data, params, headers, route),
+            name=f"{method} {self.service_name}{endpoint}",
+            method=method,
+            idempotent=idempotent,
+            budget=self.retry_budget
+        )
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
+    ) -> httpx.Response:
+        """One attempt, with circuit breaking, rate limiting and error handling"""
         
+        breaker = self.circuit_breaker(method, endpoint, route)
+        probe = breaker.acquire()
+        # None until the service answers or fails to: a call stopped before that
+        # (rate limit wait, cancellation) says nothing about its health
+        healthy = None
         
         request_headers = {}
         if headers:
             request_headers.update(headers)
         
         try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+
+            timeout = self.config.timeout
+            if self.health_monitor is not None:
+                timeout = self.health_monitor.suggested_timeout(self.service_name, timeout)
+
+            self.requests_sent += 1
             response = await self.client.request(
                 method=method,
                 url=endpoint,
                 json=data,
                 params=params,
-                headers=request_headers
+                headers=request_headers,
+                timeout=timeout
             )
+            healthy = response.status_code < 500
             
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
             if response.status_code == 429:
-                retry_after = response.headers.get("Retry-After", "60")
                 logger.warning(f"Rate limited. Retry after {retry_after} seconds")
-                raise RateLimitError(f"Rate limited: {response.status_code}")
+                raise RateLimitError(
+                    f"Rate limited: {response.status_code}",
+                    status_code=response.status_code,
+                    retry_after=retry_after
+                )
             
            
             if response.status_code >= 500:
-                raise ExternalServiceError(f"Server error: {response.status_code}")
-            
-            print("response status code: ",response.status_code)
+                raise ExternalServiceError(
+                    f"Server error: {response.status_code}",
+                    status_code=response.status_code,
+                    retry_after=retry_after
+                )
+
+            if response.status_code == 304:
+                return response
             
             response.raise_for_status()
             return response
             
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error in {method} {endpoint}: {e}")
+            raise ExternalServiceError(f"HTTP error: {e}", status_code=e.response.status_code) from e
         except httpx.HTTPError as e:
+            if healthy is None:
+                healthy = False  # timeout or connection error
             logger.error(f"HTTP error in {method} {endpoint}: {e}")
-            raise ExternalServiceError(f"HTTP error: {e}")
+            raise ExternalServiceError(f"HTTP error: {e}") from e
+        finally:
+            if healthy is None:
+                breaker.release(probe)
+            elif healthy:
+                breaker.record_success(probe)
+            else:
+                breaker.record_failure(probe)
+            if method != "GET" and self.response_cache is not None:
+                self.response_cache.invalidate(endpoint)
+
+    def circuit_breaker(self, method: str, endpoint: str, route: Optional[str] = None) -> CircuitBreaker:
+        """Breaker for one route of this service, shared by every client of the service"""
+        name = f"{self.service_name}:{method} {route or endpoint_pattern(endpoint)}"
+        return get_circuit_breaker(name, replace(self.breaker_config, name=name))
+
+    async def _conditional_get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        etag: Optional[str],
+        route: Optional[str] = None
+    ):
+        """GET for the response cache, revalidating with If-None-Match when there is an etag"""
+        request_headers = dict(headers or {})
+        if etag:
+            request_headers["If-None-Match"] = etag
+        response = await self._make_request("GET", endpoint, params=params, headers=request_headers, route=route)
+        cacheable = "no-store" not in response.headers.get("Cache-Control", "")
+        return response.status_code, response.content, response.headers.get("ETag"), cacheable
     
-    # @async_retry(max_attempts=3, wait_multiplier=2)
-    # @circuit_breaker("external_api", failure_threshold=5, recovery_timeout=60.0)
     async def get(
         self,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
     ) -> Dict[str, Any]:
-        """GET request"""
-        response = await self._make_request("GET", endpoint, params=params, headers=headers)
-        return response.json()
+        """GET request, served through the response cache when enabled"""
+        if self.response_cache is None:
+            response = await self._make_request("GET", endpoint, params=params, headers=headers, route=route)
+            return response.json()
+        body = await self.response_cache.get(
+            ResponseCache.key(endpoint, params, headers),
+            lambda etag: self._conditional_get(endpoint, params, headers, etag, route)
+        )
+        return json.loads(body)
     
-    # @async_retry(max_attempts=3, wait_multiplier=2)
-    # @circuit_breaker("external_api", failure_threshold=5, recovery_timeout=60.0)
     async def post(
         self,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
     ) -> Dict[str, Any]:
         """POST request"""
-        response = await self._make_request("POST", endpoint, data=data, headers=headers)
+        response = await self._make_request("POST", endpoint, data=data, headers=headers, route=route)
         return response.json() if response.content else {}
     
-    @async_retry(max_attempts=3, wait_multiplier=2)
-    @circuit_breaker("external_api", failure_threshold=5, recovery_timeout=60.0)
     async def put(
         self,
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
     ) -> Dict[str, Any]:
         """PUT request"""
-        response = await self._make_request("PUT", endpoint, data=data, headers=headers)
+        response = await self._make_request("PUT", endpoint, data=data, headers=headers, route=route)
         return response.json() if response.content else {}
     
-    @async_retry(max_attempts=3, wait_multiplier=2)
-    @circuit_breaker("external_api", failure_threshold=5, recovery_timeout=60.0)
     async def delete(
         self,
         endpoint: str,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        route: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """DELETE request"""
-        response = await self._make_request("DELETE", endpoint, headers=headers)
+        response = await self._make_request("DELETE", endpoint, headers=headers, route=route)
         return response.json() if response.content else None
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Pool connections and queued requests, response cache, circuit breaker and retry budget state"""
+        pool = getattr(self.transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "base_url": self.config.base_url,
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "waiting": sum(1 for request in getattr(pool, "_requests", []) if request.is_queued()),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "requests_sent": self.requests_sent,
+            "cache": self.response_cache.stats() if self.response_cache is not None else None,
+            "circuit_breakers": circuit_breaker_stats(prefix=f"{self.service_name}:"),
+            "retry_budget": self.retry_budget.stats(),
+        }
+
+
+def service_configs() -> Dict[str, ApiClientConfig]:
+    """Client configuration for each external service we call"""
+    from app.services.integration_health import integration_health
+    return {
+        "user_management": ApiClientConfig(
+            base_url=settings.EXTERNAL_USER_SERVICE_URL,
+            health_monitor=integration_health
+        ),
+        "payment_service": ApiClientConfig(
+            base_url=settings.EXTERNAL_PAYMENT_SERVICE_URL,
+            health_monitor=integration_health
+        ),
+        "communication_service": ApiClientConfig(
+            base_url=settings.EXTERNAL_COMMS_SERVICE_URL,
+            health_monitor=integration_health
+        ),
+    }
+
 
 class ApiClientFactory:
+    """
+    One pooled client per external service for the life of the process.
+
+    Clients are created at startup (the FastAPI lifespan, or lazily on a
+    Celery worker's runtime loop) and reused by every request, so
+    connections are kept alive between calls; close_all() on shutdown.
+    """
+
     _clients: Dict[str, ExternalApiClient] = {}
     
     @classmethod
     def create_client(cls, service_name: str, config: ApiClientConfig) -> ExternalApiClient:
         """Create and cache API client"""
         if service_name not in cls._clients:
-            cls._clients[service_name] = ExternalApiClient(config)
+            cls._clients[service_name] = ExternalApiClient(config, service_name)
+        return cls._clients[service_name]
+
+    @classmethod
+    def get_client(cls, service_name: str) -> ExternalApiClient:
+        """Pooled client for a configured service, created on first use"""
+        if service_name not in cls._clients:
+            configs = service_configs()
+            if service_name not in configs:
+                raise ValueError(f"No API client configured for service {service_name}")
+            return cls.create_client(service_name, configs[service_name])
         return cls._clients[service_name]
+
+    @classmethod
+    def start(cls):
+        """Create the clients of all configured services"""
+        for service_name in service_configs():
+            cls.get_client(service_name)
+        logger.info(f"Started API clients for {', '.join(cls._clients)}")
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {service_name: client.pool_stats() for service_name, client in cls._clients.items()}
     
     @classmethod
     async def close_all(cls):
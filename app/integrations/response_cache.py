@@ -0,0 +1,134 @@
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+CacheKey = Tuple[str, Tuple, Tuple]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: Optional[str]
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Cache of GET responses for one external service.
+
+    Identical GETs in flight at the same time share one request. Responses
+    are kept for the TTL of the first endpoint pattern they match (fnmatch,
+    e.g. "/users/*"), default_ttl otherwise. Once stale, an entry with an
+    ETag is revalidated with If-None-Match, so an unchanged resource costs a
+    304 without a body. Entries are dropped least recently used first, and
+    on writes to the same endpoint.
+
+    Bodies are stored as bytes and parsed for each caller, so callers can
+    modify what they get back.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0.0, max_entries: int = 1000):
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self._outdated: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(endpoint: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> CacheKey:
+        return (
+            endpoint,
+            tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+            tuple(sorted((k.lower(), v) for k, v in (headers or {}).items())),
+        )
+
+    def ttl_for(self, endpoint: str) -> float:
+        for pattern, ttl in self.ttls.items():
+            if fnmatchcase(endpoint, pattern):
+                return ttl
+        return self.default_ttl
+
+    async def get(
+        self,
+        key: CacheKey,
+        fetch: Callable[[Optional[str]], Awaitable[Tuple[int, bytes, Optional[str], bool]]]
+    ) -> bytes:
+        """
+        Body for key, fresh from the cache or through fetch(etag).
+
+        fetch sends the request (with If-None-Match if etag is given) and
+        returns (status_code, body, etag, cacheable).
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(key, entry, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetched(key, done))
+        # shield: a cancelled caller must not cancel the request others wait on
+        return await asyncio.shield(task)
+
+    def invalidate(self, endpoint: str):
+        """Forget every cached variant of an endpoint, e.g. after a PUT to it"""
+        for key in [key for key in self._entries if key[0] == endpoint]:
+            del self._entries[key]
+        # GETs already in flight may answer with the old version: don't store
+        # their result or let new callers join them
+        for key in [key for key in self._inflight if key[0] == endpoint]:
+            self._outdated.add(self._inflight.pop(key))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+    async def _fetch(self, key: CacheKey, entry: Optional[CachedResponse], fetch) -> bytes:
+        status_code, body, etag, cacheable = await fetch(entry.etag if entry else None)
+        ttl = self.ttl_for(key[0])
+        if status_code == 304 and entry is not None:
+            self.revalidated += 1
+            if asyncio.current_task() not in self._outdated:
+                entry.expires_at = time.monotonic() + ttl
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            return entry.body
+
+        self.misses += 1
+        if cacheable and (ttl > 0 or etag) and asyncio.current_task() not in self._outdated:
+            self._entries[key] = CachedResponse(body=body, etag=etag, expires_at=time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.pop(key, None)
+        return body
+
+    def _fetched(self, key: CacheKey, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark a failure as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
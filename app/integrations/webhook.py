@@ -1,44 +1,17 @@
-import hmac
-import hashlib
-import json
-from typing import Dict, Any, Optional, Callable, List
+from typing import Dict, Any, Optional, Callable, Iterator, List, Tuple, Union
 from fastapi import HTTPException, Header, Request
-from dataclasses import dataclass
 from datetime import datetime, timezone
 import logging
-from enum import Enum
 
+import msgspec
 import structlog
 
-logger = structlog.get_logger(__name__)
+from app.core.settings import settings
+from app.integrations.webhook_codec import UnknownEventTypeError, webhook_codec
+from app.integrations.webhook_signature import SignatureCheck, WebhookSignatureError, signature_verifier
+from app.schemas.webhooks import WebhookConfig, WebhookPayload, WebhookSource
 
-class WebhookSource(Enum):
-    USER_MANAGEMENT = "user_management"
-    PAYMENT_SERVICE = "payment_service"
-    COMMUNICATION_SERVICE = "communication_service"
-
-@dataclass
-class WebhookConfig:
-    source: WebhookSource
-    secret_key: str
-    signature_header: str = "X-Signature"
-    timestamp_header: str = "X-Timestamp"
-    signature_algorithm: str = "sha256"
-    max_age_seconds: int = 300  
-
-@dataclass
-class WebhookPayload:
-    source: WebhookSource
-    event_type: str
-    event_id: str
-    timestamp: datetime
-    data: Dict[str, Any]
-    tenant_id: Optional[str] = None
-    raw_payload: Optional[Dict[str, Any]] = None
-
-class WebhookSignatureError(Exception):
-    """Webhook signature verification failed"""
-    pass
+logger = structlog.get_logger(__name__)
 
 class WebhookTimestampError(Exception):
     """Webhook timestamp validation failed"""
@@ -52,6 +25,7 @@ class WebhookReceiver:
     def register_source(self, config: WebhookConfig):
         """Register a webhook source with its configuration"""
         self.configs[config.source] = config
+        signature_verifier.register(config, settings.WEBHOOK_SECRETS.get(config.source.value))
         logger.info(f"Registered webhook source: {config.source.value}")
     
     def register_processor(self, event_type: str, processor: Callable):
@@ -67,23 +41,16 @@ class WebhookReceiver:
     ) -> bool:
         """Verify webhook signature"""
         try:
-            if "=" in signature:
-                algorithm, signature = signature.split("=", 1)
-            
-            if config.signature_algorithm == "sha256":
-                expected = hmac.new(
-                    config.secret_key.encode(),
-                    payload,
-                    hashlib.sha256
-                ).hexdigest()
-            else:
-                raise ValueError(f"Unsupported algorithm: {config.signature_algorithm}")
-            
-            return hmac.compare_digest(expected, signature)
-            
+            return signature_verifier.verify(config.source, payload, signature)
         except Exception as e:
             logger.error(f"Signature verification error: {e}")
             return False
+
+    def start_signature_check(self, source: WebhookSource, signature: Optional[str]) -> Optional[SignatureCheck]:
+        """Incremental signature check for a body that is still being received"""
+        if not signature or not signature_verifier.has_secrets(source):
+            return None
+        return signature_verifier.start(source, signature)
     
     def verify_timestamp(self, timestamp_str: str, max_age_seconds: int) -> bool:
         """Verify webhook timestamp is within acceptable range"""
@@ -107,52 +74,108 @@ class WebhookReceiver:
     ) -> WebhookPayload:
         """Process incoming webhook request"""
         
+        body = await self.read_verified_body(request, source, signature, timestamp)
+        return self.parse_payload(body, source)
+
+    async def read_verified_body(
+        self,
+        request: Request,
+        source: WebhookSource,
+        signature: Optional[str] = None,
+        timestamp: Optional[str] = None,
+        max_size: Optional[int] = None
+    ) -> bytes:
+        """
+        Read the request body, hashing it for the signature check as it arrives.
+        Rejects with 413 as soon as Content-Length or the bytes received so far
+        pass max_size (the source's payload limit by default).
+        """
+        
+        max_size = max_size or self.max_payload_size(source)
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_size:
+            raise self._too_large(source, max_size)
+
+        signature_check = self.start_signature_check(source, signature)
+        chunks = []
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_size:
+                raise self._too_large(source, max_size)
+            if signature_check:
+                signature_check.update(chunk)
+            chunks.append(chunk)
+        body = b"".join(chunks)
+
+        await self.verify_request(body, source, signature, timestamp, signature_check=signature_check)
+        return body
+
+    def max_payload_size(self, source: WebhookSource) -> int:
+        return settings.WEBHOOK_SOURCE_MAX_PAYLOAD_SIZE.get(source.value, settings.MAX_WEBHOOK_PAYLOAD_SIZE)
+
+    def _too_large(self, source: WebhookSource, max_size: int) -> HTTPException:
+        logger.warning(f"Rejected oversized webhook from {source.value} (limit {max_size} bytes)")
+        return HTTPException(status_code=413, detail=f"Webhook payload exceeds {max_size} bytes")
+
+    async def verify_request(
+        self,
+        body: bytes,
+        source: WebhookSource,
+        signature: Optional[str] = None,
+        timestamp: Optional[str] = None,
+        signature_check: Optional[SignatureCheck] = None
+    ) -> WebhookConfig:
+        """
+        Check a webhook body's signature and timestamp against its source config.
+        Pass signature_check if the body was already fed to it while streaming.
+        """
+        
         config = self.configs.get(source)
         if not config:
             raise HTTPException(status_code=400, detail=f"Unknown webhook source: {source.value}")
         
-        body = await request.body()
-        
-        if signature and config.secret_key:
+        if signature_check:
+            if not signature_check.verify(body):
+                raise WebhookSignatureError("Invalid webhook signature")
+        elif signature and signature_verifier.has_secrets(source):
             if not await self.verify_signature(body, signature, config):
                 raise WebhookSignatureError("Invalid webhook signature")
         
         if timestamp:
             if not self.verify_timestamp(timestamp, config.max_age_seconds):
                 raise WebhookTimestampError("Webhook timestamp too old or invalid")
+
+        return config
+
+    def parse_payload(self, body: bytes, source: WebhookSource) -> WebhookPayload:
+        """Build a WebhookPayload from a verified webhook body"""
         
         try:
-            raw_payload = json.loads(body.decode())
-        except json.JSONDecodeError as e:
+            webhook_payload = webhook_codec.decode(body, source)
+        except UnknownEventTypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except msgspec.DecodeError as e:
             raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {e}")
         
-        event_type = raw_payload.get("event_type", "unknown")
-        event_id = raw_payload.get("event_id", "")
-        event_timestamp = raw_payload.get("timestamp")
-        tenant_id = raw_payload.get("tenant_id")
-        data = raw_payload.get("data", {})
-        
-        if event_timestamp:
-            try:
-                parsed_timestamp = datetime.fromisoformat(event_timestamp.replace('Z', '+00:00'))
-            except ValueError:
-                parsed_timestamp = datetime.now(timezone.utc)
-        else:
-            parsed_timestamp = datetime.now(timezone.utc)
-        
-        webhook_payload = WebhookPayload(
-            source=source,
-            event_type=event_type,
-            event_id=event_id,
-            timestamp=parsed_timestamp,
-            data=data,
-            tenant_id=tenant_id,
-            raw_payload=raw_payload
-        )
-        
-        logger.info(f"Processed webhook: {source.value}/{event_type} - {event_id}")
+        logger.info(f"Processed webhook: {source.value}/{webhook_payload.event_type} - {webhook_payload.event_id}")
         return webhook_payload
     
+    def parse_batch(self, body: bytes, source: WebhookSource) -> Iterator[Tuple[bytes, Union[WebhookPayload, HTTPException]]]:
+        """
+        Lazily parse a verified JSON array or NDJSON batch. Yields each event's
+        raw body with its payload, or the error that rejected it.
+        """
+        
+        try:
+            for raw in webhook_codec.split_batch(body):
+                try:
+                    yield raw, self.parse_payload(raw, source)
+                except HTTPException as e:
+                    yield raw, e
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch payload: {e}")
+    
     def get_processor(self, event_type: str) -> Optional[Callable]:
         """Get processor function for event type"""
         return self.processors.get(event_type)
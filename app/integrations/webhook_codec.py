@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import msgspec
+
+from app.models.webhooks import EventType
+from app.schemas.webhooks import EVENT_DATA_TYPES, EventData, WebhookPayload, WebhookSource
+
+
+class UnknownEventTypeError(ValueError):
+    """Webhook body names an event type with no registered schema"""
+    pass
+
+
+class _EventTypeProbe(msgspec.Struct):
+    """Reads only event_type; every other field is skipped without being built"""
+    event_type: str = ""
+
+
+class _DataFieldsProbe(msgspec.Struct):
+    """The data object's keys, each value left as an unparsed slice of the body"""
+    data: Dict[str, msgspec.Raw] = {}
+
+
+class _Envelope(msgspec.Struct):
+    """Wire format sent by the services; typed per event in WebhookCodec"""
+    event_type: str
+    data: Any = {}
+    event_id: str = ""
+    id: str = ""
+    tenant_id: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+def _parse_timestamp(value: Optional[str]) -> datetime:
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc)
+
+
+class WebhookCodec:
+    """
+    Decodes webhook bodies straight from bytes into WebhookPayload structs.
+
+    Decoders are compiled once per event type, with the body typed by the
+    event's EventData schema. The event type is probed first, so bodies for
+    unknown event types are rejected before the rest is parsed. Data fields
+    the schema doesn't declare are decoded on their own into EventData.extra,
+    and the body itself is kept as raw_payload. The same structs are encoded
+    for Celery and decoded back on the worker.
+    """
+
+    def __init__(self, event_types: Dict[str, type]):
+        self._probe = msgspec.json.Decoder(_EventTypeProbe)
+        self._data_fields = msgspec.json.Decoder(_DataFieldsProbe)
+        self._batch = msgspec.json.Decoder(List[msgspec.Raw])
+        self._value = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+        self._data_types: Dict[str, type] = {}
+        self._envelopes: Dict[str, msgspec.json.Decoder] = {}
+        self._payloads: Dict[str, Tuple[type, msgspec.json.Decoder]] = {}
+        for event_type, data_type in event_types.items():
+            self.register(event_type, data_type)
+
+    def register(self, event_type: str, data_type: type):
+        """Compile decoders for an event type"""
+        envelope = msgspec.defstruct(
+            f"Envelope[{event_type}]",
+            [("data", data_type, msgspec.field(default_factory=data_type))],
+            bases=(_Envelope,)
+        )
+        payload = msgspec.defstruct(f"WebhookPayload[{event_type}]", [("data", data_type)], bases=(WebhookPayload,))
+        self._data_types[event_type] = data_type
+        self._envelopes[event_type] = msgspec.json.Decoder(envelope)
+        self._payloads[event_type] = (payload, msgspec.json.Decoder(payload))
+
+    def event_type(self, body: bytes) -> str:
+        return self._probe.decode(body).event_type
+
+    def decode(self, body: bytes, source: WebhookSource) -> WebhookPayload:
+        """Decode a webhook body as received from a service"""
+        event_type = self.event_type(body)
+        decoder = self._envelopes.get(event_type)
+        if decoder is None:
+            raise UnknownEventTypeError(f"Unknown event type: {event_type or '<missing>'}")
+
+        envelope = decoder.decode(body)
+        self._decode_extra(envelope.data, body)
+        payload_type, _ = self._payloads[event_type]
+        return payload_type(
+            source=source,
+            event_type=event_type,
+            event_id=envelope.event_id or envelope.id,
+            timestamp=_parse_timestamp(envelope.timestamp),
+            data=envelope.data,
+            tenant_id=envelope.tenant_id,
+            raw_payload=bytes(body)
+        )
+
+    def _decode_extra(self, data: EventData, body: bytes):
+        """Fill extra with the data fields the typed decode skipped"""
+        fields = data.__struct_fields__
+        extra = {
+            key: self._value.decode(value)
+            for key, value in self._data_fields.decode(body).data.items()
+            if key not in fields
+        }
+        if extra:
+            data.extra = extra
+
+    @staticmethod
+    def event_data(data_type: type, data: Dict[str, Any]) -> Any:
+        """Convert a data dict to its EventData schema, keeping unknown fields in extra"""
+        event_data = msgspec.convert(data, data_type)
+        if isinstance(data, dict):
+            extra = {key: value for key, value in data.items() if key not in data_type.__struct_fields__}
+            if extra:
+                event_data.extra = extra
+        return event_data
+
+    def split_batch(self, body: bytes) -> Iterator[bytes]:
+        """
+        Raw event bodies from a JSON array or NDJSON batch. Events are only
+        delimited here; each one is parsed when it is passed to decode().
+        """
+        if body.lstrip()[:1] == b"[":
+            for raw in self._batch.decode(body):
+                yield bytes(raw)
+            return
+
+        for line in body.splitlines():
+            if line.strip():
+                yield line
+
+    def encode_payload(self, payload: WebhookPayload) -> bytes:
+        return self._encoder.encode(payload)
+
+    def decode_payload(self, encoded: Union[bytes, str, Dict[str, Any]]) -> WebhookPayload:
+        """Rebuild a payload produced by encode_payload (or its dict form)"""
+        if isinstance(encoded, dict):
+            event_type = encoded.get("event_type", "")
+        else:
+            event_type = self.event_type(encoded)
+
+        compiled = self._payloads.get(event_type)
+        if compiled is None:
+            raise UnknownEventTypeError(f"Unknown event type: {event_type or '<missing>'}")
+
+        payload_type, decoder = compiled
+        if isinstance(encoded, dict):
+            data = encoded.get("data") or {}
+            payload = msgspec.convert({**encoded, "data": {}}, payload_type)
+            payload.data = self.event_data(self._data_types[event_type], data)
+            return payload
+        return decoder.decode(encoded)
+
+
+webhook_codec = WebhookCodec({
+    event_type.value: EVENT_DATA_TYPES[event_type.value.split(".", 1)[0]]
+    for event_type in EventType
+})
@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+
+from app.schemas.webhooks import WebhookConfig, WebhookSource
+
+logger = structlog.get_logger(__name__)
+
+ALGORITHMS = ("sha1", "sha256", "sha384", "sha512")
+
+class WebhookSignatureError(Exception):
+    """Webhook signature verification failed"""
+    pass
+
+
+class PrecomputedHmac:
+    """
+    HMAC keyed once per secret. A request copies the keyed object, which
+    copies OpenSSL's already keyed inner and outer states, instead of
+    hashing the padded key again (RFC 2104) for every request.
+    """
+
+    __slots__ = ("_keyed",)
+
+    def __init__(self, secret: bytes, algorithm: str):
+        self._keyed = hmac.new(secret, digestmod=algorithm)
+
+    def start(self):
+        """Fresh keyed state to feed the message into"""
+        return self._keyed.copy()
+
+    def finish(self, state) -> bytes:
+        return state.digest()
+
+    def digest(self, message: bytes) -> bytes:
+        state = self._keyed.copy()
+        state.update(message)
+        return state.digest()
+
+
+class SignatureCheck:
+    """
+    Verification of a single request. Feed body chunks to update() as they
+    arrive, then call verify() with the whole body.
+
+    Chunks are hashed with one secret only: the one the source's last
+    verified request matched (the newest at first). The other active secrets
+    are tried on the buffered body only if that one doesn't match, so a
+    rotation costs a second hash only for requests that changed secret.
+    """
+
+    def __init__(
+        self,
+        verifier: "SignatureVerifier",
+        source: WebhookSource,
+        keys: List[PrecomputedHmac],
+        expected: bytes,
+        first: int = 0
+    ):
+        self._verifier = verifier
+        self._source = source
+        self._keys = keys
+        self._first = first if first < len(keys) else 0
+        self._state = keys[self._first].start()
+        self._expected = expected
+        self.matched_key: Optional[int] = None
+
+    def update(self, chunk: bytes):
+        self._state.update(chunk)
+
+    def verify(self, body: Optional[bytes] = None) -> bool:
+        """True if the body was signed with any active secret for the source"""
+        if hmac.compare_digest(self._keys[self._first].finish(self._state), self._expected):
+            return self._matched(self._first)
+        if body is not None:
+            for index, key in enumerate(self._keys):
+                if index != self._first and hmac.compare_digest(key.digest(body), self._expected):
+                    return self._matched(index)
+        self._verifier._matches[self._source][None] += 1
+        return False
+
+    def _matched(self, index: int) -> bool:
+        self.matched_key = index
+        self._verifier._matches[self._source][index] += 1
+        self._verifier._preferred[self._source] = index
+        return True
+
+
+class SignatureVerifier:
+    """
+    HMAC verification engine for webhook sources.
+
+    Secrets are keyed once per source and algorithm when registered; each
+    request only copies the precomputed hash states. A source can have several
+    active secrets (newest first) so senders can rotate without downtime,
+    and get_stats() shows which secret index requests are still signed with.
+    """
+
+    def __init__(self):
+        self._keys: Dict[Tuple[WebhookSource, str], List[PrecomputedHmac]] = {}
+        self._default_algorithms: Dict[WebhookSource, str] = {}
+        self._matches: Dict[WebhookSource, Counter] = {}
+        self._preferred: Dict[WebhookSource, int] = {}  # index of the secret that matched last
+
+    def register(self, config: WebhookConfig, secrets: Optional[List[str]] = None):
+        """Precompute keyed HMACs for a source; secrets defaults to the config's"""
+        secrets = [s for s in (secrets or [config.secret_key, *config.previous_secret_keys]) if s]
+        algorithms = set(config.accepted_algorithms) | {config.signature_algorithm}
+        unsupported = algorithms - set(ALGORITHMS)
+        if unsupported:
+            raise ValueError(f"Unsupported signature algorithm(s) for {config.source.value}: {', '.join(sorted(unsupported))}")
+
+        for key in [key for key in self._keys if key[0] == config.source]:
+            del self._keys[key]
+        for algorithm in algorithms:
+            self._keys[(config.source, algorithm)] = [PrecomputedHmac(secret.encode(), algorithm) for secret in secrets]
+        self._default_algorithms[config.source] = config.signature_algorithm
+        self._matches[config.source] = Counter()
+        self._preferred.pop(config.source, None)
+        logger.info(f"Registered {len(secrets)} signing secret(s) for {config.source.value}: {sorted(algorithms)}")
+
+    def rotate(self, config: WebhookConfig, secrets: List[str]):
+        """Replace a source's active secrets, newest first"""
+        self.register(config, secrets)
+
+    def has_secrets(self, source: WebhookSource) -> bool:
+        return bool(self._keys.get((source, self._default_algorithms.get(source))))
+
+    def start(self, source: WebhookSource, signature: str) -> SignatureCheck:
+        """Begin verifying a request signed with `signature` ("sha256=<hex>" or bare hex)"""
+        keys, expected = self._parse(source, signature)
+        return SignatureCheck(self, source, keys, expected, self._preferred.get(source, 0))
+
+    def verify(self, source: WebhookSource, body: bytes, signature: str) -> bool:
+        """Verify a fully buffered body, trying the secret that matched last first"""
+        keys, expected = self._parse(source, signature)
+        first = self._preferred.get(source, 0)
+        if first < len(keys) and hmac.compare_digest(keys[first].digest(body), expected):
+            self._matches[source][first] += 1
+            return True
+        for index, key in enumerate(keys):
+            if index != first and hmac.compare_digest(key.digest(body), expected):
+                self._matches[source][index] += 1
+                self._preferred[source] = index
+                return True
+        self._matches[source][None] += 1
+        return False
+
+    def _parse(self, source: WebhookSource, signature: str) -> Tuple[List[PrecomputedHmac], bytes]:
+        algorithm, _, digest = signature.rpartition("=")
+        algorithm = algorithm or self._default_algorithms.get(source)
+        keys = self._keys.get((source, algorithm))
+        if not keys:
+            raise WebhookSignatureError(f"Signature algorithm {algorithm} not accepted for {source.value}")
+        try:
+            return keys, bytes.fromhex(digest)
+        except ValueError:
+            raise WebhookSignatureError("Malformed webhook signature")
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Verified requests per source, by the index of the secret that matched"""
+        return {
+            source.value: {("invalid" if index is None else f"key_{index}"): count for index, count in matches.items()}
+            for source, matches in list(self._matches.items())
+        }
+
+
+signature_verifier = SignatureVerifier()
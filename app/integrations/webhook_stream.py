@@ -0,0 +1,209 @@
+import asyncio
+import base64
+import json
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+import structlog
+from fastapi import HTTPException
+from redis.exceptions import ResponseError
+
+from app.core.event_pipeline import dispatch_event
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+from app.core.tenant_scheduler import tenant_scheduler
+from app.integrations.webhook import WebhookSource, webhook_receiver
+from app.schemas.webhooks import ProcessingResult
+
+logger = structlog.get_logger(__name__)
+
+
+def stream_key(source: WebhookSource) -> str:
+    return f"{settings.WEBHOOK_STREAM_PREFIX}{source.value}"
+
+
+def dead_letter_key(source: WebhookSource) -> str:
+    return f"{settings.WEBHOOK_STREAM_PREFIX}{source.value}:dead"
+
+
+async def append_webhook(source: WebhookSource, body: bytes, headers: Dict[str, str]) -> str:
+    """Durably record a verified webhook; returns the stream entry id"""
+    return (await append_webhooks(source, [body], headers))[0]
+
+
+def entry_body(fields: Dict[str, Any]) -> bytes:
+    """Raw webhook body of a stream entry (base64 in body_b64; older entries have it as text in body)"""
+    if "body_b64" in fields:
+        return base64.b64decode(fields["body_b64"])
+    return fields["body"].encode()
+
+
+async def append_webhooks(source: WebhookSource, bodies: List[bytes], headers: Dict[str, str]) -> List[str]:
+    """
+    Record several verified webhooks in one round trip; returns their stream
+    entry ids. Bodies are stored base64-encoded since the stream is read with
+    decode_responses and a body need not be valid UTF-8.
+    """
+    encoded_headers = json.dumps(headers)
+    received_at = f"{time.time():.6f}"
+    pipe = async_redis_client.pipeline(transaction=False)
+    for body in bodies:
+        pipe.xadd(
+            stream_key(source),
+            {"body_b64": base64.b64encode(body).decode(), "headers": encoded_headers, "received_at": received_at},
+            maxlen=settings.WEBHOOK_STREAM_MAXLEN,
+            approximate=True
+        )
+    return await pipe.execute()
+
+
+class WebhookStreamConsumer:
+    """
+    Consumer-group worker for webhook streams.
+
+    Reads new entries with XREADGROUP, runs them through the same scheduler
+    and pipeline as inline webhooks and XACKs each one once its handlers
+    succeeded. Failed entries stay pending and, like entries left by a
+    crashed consumer, are reclaimed after claim_idle_ms; entries that keep
+    failing are moved to a dead-letter stream after max_deliveries attempts.
+    Entries no handler ran are dead-lettered straight away, never acked as done.
+    """
+
+    def __init__(
+        self,
+        sources: Optional[List[WebhookSource]] = None,
+        group: str = None,
+        consumer_name: Optional[str] = None,
+        batch_size: int = None,
+        block_ms: int = 1000,
+        claim_idle_ms: int = None,
+        max_deliveries: int = None
+    ):
+        self.sources = sources or list(WebhookSource)
+        self.group = group or settings.WEBHOOK_STREAM_GROUP
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{id(self):x}"
+        self.batch_size = batch_size or settings.WEBHOOK_STREAM_BATCH_SIZE
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms or settings.WEBHOOK_STREAM_CLAIM_IDLE_MS
+        self.max_deliveries = max_deliveries or settings.WEBHOOK_STREAM_MAX_DELIVERIES
+        self._running = False
+
+    async def ensure_groups(self):
+        for source in self.sources:
+            try:
+                await async_redis_client.xgroup_create(stream_key(source), self.group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def run(self):
+        """Consume until stop() is called"""
+        await self.ensure_groups()
+        self._running = True
+        last_reclaim = 0.0
+        logger.info(f"Webhook stream consumer {self.consumer_name} started for {[s.value for s in self.sources]}")
+
+        while self._running:
+            try:
+                if time.monotonic() - last_reclaim >= self.claim_idle_ms / 1000:
+                    await self.reclaim_pending()
+                    last_reclaim = time.monotonic()
+
+                response = await async_redis_client.xreadgroup(
+                    self.group,
+                    self.consumer_name,
+                    {stream_key(source): ">" for source in self.sources},
+                    count=self.batch_size,
+                    block=self.block_ms
+                )
+                entries = [
+                    (WebhookSource(key[len(settings.WEBHOOK_STREAM_PREFIX):]), entry_id, fields)
+                    for key, stream_entries in response or []
+                    for entry_id, fields in stream_entries
+                ]
+                if entries:
+                    await asyncio.gather(*(self.handle_entry(*entry) for entry in entries))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook stream consumer error: {e}")
+                await asyncio.sleep(1)
+
+    def stop(self):
+        self._running = False
+
+    async def handle_entry(self, source: WebhookSource, entry_id: str, fields: Dict[str, Any]):
+        """Process one stream entry and acknowledge it if it succeeded"""
+        key = stream_key(source)
+        try:
+            payload = webhook_receiver.parse_payload(entry_body(fields), source)
+        except (HTTPException, KeyError, ValueError) as e:
+            # Can never succeed, so don't let it be redelivered forever
+            logger.error(f"Dropping unparseable webhook stream entry {entry_id}: {e}")
+            await self._dead_letter(source, entry_id, fields, str(e))
+            return
+
+        try:
+            result = await tenant_scheduler.submit(payload, dispatch_event)
+        except Exception as e:
+            logger.error(f"Webhook stream entry {entry_id} failed, leaving it pending: {e}")
+            return
+        if isinstance(result, ProcessingResult) and not result.success:
+            logger.error(f"Webhook stream entry {entry_id} failed, leaving it pending: {result.error_message}")
+            return
+        if isinstance(result, ProcessingResult) and result.metadata.get("skipped") == "no_handler":
+            # Nothing ran it: keep it for a consumer that has the handlers
+            logger.error(f"No handler for {payload.event_type}, dead-lettering webhook stream entry {entry_id}")
+            await self._dead_letter(source, entry_id, fields, f"no handler for {payload.event_type}")
+            return
+
+        await async_redis_client.xack(key, self.group, entry_id)
+
+    async def reclaim_pending(self):
+        """Take over entries another consumer left unacknowledged for too long"""
+        for source in self.sources:
+            key = stream_key(source)
+            pending = await async_redis_client.xpending_range(
+                key, self.group, min="-", max="+", count=self.batch_size, idle=self.claim_idle_ms
+            )
+            if not pending:
+                continue
+
+            exhausted = [p["message_id"] for p in pending if p["times_delivered"] >= self.max_deliveries]
+            retry = [p["message_id"] for p in pending if p["times_delivered"] < self.max_deliveries]
+
+            if exhausted:
+                for entry_id, fields in await async_redis_client.xclaim(
+                    key, self.group, self.consumer_name, self.claim_idle_ms, exhausted
+                ):
+                    await self._dead_letter(source, entry_id, fields, "max deliveries exceeded")
+
+            if retry:
+                claimed = await async_redis_client.xclaim(
+                    key, self.group, self.consumer_name, self.claim_idle_ms, retry
+                )
+                logger.info(f"Reclaimed {len(claimed)} pending webhook entries from {key}")
+                await asyncio.gather(*(
+                    self.handle_entry(source, entry_id, fields) for entry_id, fields in claimed if fields
+                ))
+
+    async def _dead_letter(self, source: WebhookSource, entry_id: str, fields: Dict[str, Any], reason: str):
+        await async_redis_client.xadd(
+            dead_letter_key(source),
+            {**(fields or {}), "original_id": entry_id, "error": reason}
+        )
+        await async_redis_client.xack(stream_key(source), self.group, entry_id)
+
+    async def get_lag(self) -> Dict[str, Dict[str, Any]]:
+        """Stream length and pending count per source"""
+        lag = {}
+        for source in self.sources:
+            key = stream_key(source)
+            summary = await async_redis_client.xpending(key, self.group)
+            lag[source.value] = {
+                "length": await async_redis_client.xlen(key),
+                "pending": summary["pending"] if summary else 0,
+            }
+        return lag
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,8 +8,13 @@ import redis
 from app.core.settings import settings
 from app.core.middleware import RateLimitMiddleware, AuditMiddleware, TenantContextMiddleware
 from app.core.database import engine
+from app.core.audit_sink import audit_sink
+from app.core.partitioned_executor import partitioned_executor
+from app.core.table_partitions import table_partitions
+from app.integrations.external_client import ApiClientFactory
 from app.models.base import Base
 from app.api.v1 import api_router
+from app.integrations import event_processors  # noqa: F401  registers the event handlers
 
 structlog.configure(
     processors=[
@@ -32,6 +38,19 @@ logger = structlog.get_logger()
 
 
 Base.metadata.create_all(bind=engine)
+# create_all only makes the parents of partitioned tables; without partitions
+# every insert into them would fail
+table_partitions.ensure_partitions()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    ApiClientFactory.start()
+    yield
+    await partitioned_executor.shutdown()
+    await ApiClientFactory.close_all()
+    audit_sink.stop()
 
 
 app = FastAPI(
@@ -40,7 +59,8 @@ app = FastAPI(
     description="Enterprise Multi-Tenant SaaS Platform with External Integrations",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
-    redoc_url=f"{settings.API_V1_STR}/redoc"
+    redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan
 )
 
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -5,9 +5,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from enum import Enum
 from dataclasses import dataclass, asdict
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
 import httpx
+import hashlib
 import json
 from contextlib import asynccontextmanager
 
@@ -76,6 +78,16 @@ class MockNotification(BaseModel):
 
 
 
+def etag_response(request: Request, content: Any) -> Response:
+    """JSON response with an ETag of its body, or 304 if If-None-Match already has it"""
+    body = json.dumps(jsonable_encoder(content), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+
 # Webhook Configuration
 @dataclass
 class WebhookConfig:
@@ -180,11 +192,11 @@ class MockUserManagementService:
             return user_data
         
         @self.app.get("/users/{user_id}", response_model=MockUser)
-        async def get_user(user_id: str):
+        async def get_user(user_id: str, request: Request):
             
             if user_id not in self.registry.users:
                 raise HTTPException(status_code=404, detail="User not found")
-            return self.registry.users[user_id]
+            return etag_response(request, self.registry.users[user_id])
         
         @self.app.put("/users/{user_id}", response_model=MockUser)
         async def update_user(user_id: str, user_data: MockUser, background_tasks: BackgroundTasks):
@@ -232,11 +244,11 @@ class MockUserManagementService:
             return {"message": "User deleted successfully"}
         
         @self.app.get("/users", response_model=List[MockUser])
-        async def list_users(tenant_id: Optional[str] = None, limit: int = 100):
+        async def list_users(request: Request, tenant_id: Optional[str] = None, limit: int = 100):
             users = list(self.registry.users.values())
             if tenant_id:
                 users = [u for u in users if u.tenant_id == tenant_id]
-            return users[:limit]
+            return etag_response(request, users[:limit])
 
 # Payment Service
 class MockPaymentService:
@@ -267,10 +279,10 @@ class MockPaymentService:
             return sub_data
         
         @self.app.get("/subscriptions/{subscription_id}", response_model=MockSubscription)
-        async def get_subscription(subscription_id: str):
+        async def get_subscription(subscription_id: str, request: Request):
             if subscription_id not in self.registry.subscriptions:
                 raise HTTPException(status_code=404, detail="Subscription not found")
-            return self.registry.subscriptions[subscription_id]
+            return etag_response(request, self.registry.subscriptions[subscription_id])
         
         @self.app.post("/payments/process")
         async def process_payment(payment_data: Dict[str, Any], background_tasks: BackgroundTasks):
@@ -371,17 +383,17 @@ class MockCommunicationService:
             return notification
         
         @self.app.get("/notifications/{notification_id}", response_model=MockNotification)
-        async def get_notification(notification_id: str):
+        async def get_notification(notification_id: str, request: Request):
             if notification_id not in self.registry.notifications:
                 raise HTTPException(status_code=404, detail="Notification not found")
-            return self.registry.notifications[notification_id]
+            return etag_response(request, self.registry.notifications[notification_id])
         
         @self.app.get("/notifications", response_model=List[MockNotification])
-        async def list_notifications(tenant_id: Optional[str] = None, limit: int = 100):
+        async def list_notifications(request: Request, tenant_id: Optional[str] = None, limit: int = 100):
             notifications = list(self.registry.notifications.values())
             if tenant_id:
                 notifications = [n for n in notifications if n.tenant_id == tenant_id]
-            return notifications[:limit]
+            return etag_response(request, notifications[:limit])
     
     async def _simulate_delivery(self, notification_id: str, success: bool):
         """Simulate email delivery with delay"""
@@ -437,28 +449,31 @@ class MockServiceDiscovery:
         service = self.services.get(service_name)
         return service["url"] if service else None
     
-    async def health_check(self, service_name: str) -> bool:
+    async def health_check(self, service_name: str, client: Optional[httpx.AsyncClient] = None) -> bool:
         """Check service health"""
         service = self.services.get(service_name)
         if not service:
             return False
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{service['url']}{service['health_endpoint']}",
-                    timeout=5.0
-                )
-                return response.status_code == 200
+            if client is None:
+                async with httpx.AsyncClient() as client:
+                    return await self.health_check(service_name, client)
+            response = await client.get(
+                f"{service['url']}{service['health_endpoint']}",
+                timeout=5.0
+            )
+            return response.status_code == 200
         except:
             return False
     
     async def health_check_all(self) -> Dict[str, bool]:
-        """Check health of all services"""
-        results = {}
-        for service_name in self.services.keys():
-            results[service_name] = await self.health_check(service_name)
-        return results
+        """Check health of all services at once over one shared client"""
+        async with httpx.AsyncClient() as client:
+            results = await asyncio.gather(
+                *(self.health_check(service_name, client) for service_name in self.services)
+            )
+        return dict(zip(self.services, results))
 
 # Webhook Payload Generators for Testing
 class WebhookPayloadGenerator:
@@ -1,4 +1,5 @@
-from sqlalchemy import UUID, Column, String, Text, JSON, ForeignKey
+from sqlalchemy import UUID, Column, DateTime, String, Text, JSON, ForeignKey
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -7,6 +8,10 @@ from app.models.base import TenantIsolatedModel
 class AuditLog(TenantIsolatedModel):
     """audit logging for compliance"""
     __tablename__ = "audit_logs"
+    # Range-partitioned by created_at; retention drops whole partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
 
 
     # CREATE, UPDATE, DELETE, LOGIN
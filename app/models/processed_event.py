@@ -9,9 +9,11 @@ from app.models.base import BaseModel
 class ProcessedEvent(BaseModel):
     """Model for tracking processed events for idempotency"""
     __tablename__ = "processed_events"
+    # Range-partitioned by created_at; retention drops whole partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     
-    event_hash = Column(String(64), unique=True, nullable=False, index=True)
+    event_hash = Column(String(64), nullable=False, index=True)
     event_id = Column(String(255), nullable=False)
     source = Column(String(100), nullable=False)
     event_type = Column(String(100), nullable=False)
@@ -19,5 +21,5 @@ class ProcessedEvent(BaseModel):
     processed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     data = Column(JSONB, default=dict)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
     
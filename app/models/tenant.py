@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Column, String, Text, JSON, Boolean, UniqueConstraint
+from sqlalchemy import Integer, Column, String, Text, JSON, Boolean, UniqueConstraint, true
 from sqlalchemy.orm import relationship
 import uuid
 
@@ -20,7 +20,7 @@ class Tenant(BaseModel):
     
     
     is_verified = Column(Boolean, default=False)
-    # is_active = Column(Boolean, default=False)
+    is_active = Column(Boolean, default=True, server_default=true(), nullable=False)
   
     users = relationship("User", cascade="all, delete-orphan")
     
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, DateTime, Text, Integer, JSON, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
 
 from datetime import datetime
 from enum import Enum
@@ -32,12 +33,21 @@ class EventType(str, Enum):
 
 class WebhookEventDB(BaseModel):
     __tablename__ = "webhook_events"
+    # Range-partitioned by created_at (see app.core.table_partitions), so the
+    # partition key is part of the primary key and idempotency_key can only be
+    # unique per partition; uniqueness is enforced by WebhookIdempotencyKey.
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
 
     service_name = Column(String, nullable=False, index=True)
     event_type = Column(String, nullable=False, index=True)
     payload = Column(JSONB, nullable=False,  default=dict)
     tenant_id = Column(String, nullable=True, index=True)
-    idempotency_key = Column(String, nullable=False, unique=True, index=True)
+    idempotency_key = Column(String, nullable=False, index=True)
+    # Envelope as sent, so a worker can rebuild the payload from the row alone
+    event_id = Column(String, nullable=True)
+    event_timestamp = Column(String, nullable=True)
     status = Column(String, default=WebhookStatus.PENDING, index=True)
     retry_count = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
@@ -45,4 +55,17 @@ class WebhookEventDB(BaseModel):
 
     last_attempted_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
-    archived_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    archived_at = Column(DateTime, nullable=True)
+
+
+class WebhookIdempotencyKey(BaseModel):
+    """
+    One row per event, claimed with INSERT ... ON CONFLICT before the event is
+    dispatched. Not partitioned, so the unique key holds across all time and
+    two workers can never both claim the same event.
+    """
+    __tablename__ = "webhook_idempotency_keys"
+
+    idempotency_key = Column(String(64), nullable=False, unique=True, index=True)
+    status = Column(String, nullable=False, default=WebhookStatus.PROCESSING)
+    claimed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
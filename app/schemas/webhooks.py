@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import uuid
 
+import msgspec
 from pydantic import BaseModel, Field
 
 from app.models.webhooks import EventType
@@ -27,18 +28,116 @@ class WebhookConfig:
     secret_key: str
     signature_header: str = "X-Signature"
     timestamp_header: str = "X-Timestamp"
-    signature_algorithm: str = "sha256"
+    signature_algorithm: str = "sha256"  # used when the signature has no "algo=" prefix
     max_age_seconds: int = 300  
+    previous_secret_keys: List[str] = field(default_factory=list)  # still accepted during rotation
+    accepted_algorithms: List[str] = field(default_factory=lambda: ["sha256"])
 
-@dataclass
-class WebhookPayload:
+class EventData(msgspec.Struct, kw_only=True):
+    """
+    Typed event body. Supports payload["field"] and payload.get("field")
+    so handlers can treat it like the dict it replaces. Fields the schema
+    doesn't declare are kept in extra and read the same way.
+    """
+    id: Optional[str] = None
+    tenant_id: Optional[str] = None
+    extra: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__struct_fields__ and key != "extra":
+            return getattr(self, key)
+        try:
+            return self.extra[key]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The body as a dict, unset schema fields left out"""
+        data = {key: value for key, value in msgspec.to_builtins(self).items() if value is not None}
+        data.update(data.pop("extra", {}))
+        return data
+
+
+class UserEventData(EventData, kw_only=True):
+    email: Optional[str] = None
+    name: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class SubscriptionEventData(EventData, kw_only=True):
+    user_id: Optional[str] = None
+    plan_id: Optional[str] = None
+    status: Optional[str] = None
+    amount: Optional[float] = None
+    currency: Optional[str] = None
+    billing_cycle: Optional[str] = None
+    current_period_start: Optional[str] = None
+    current_period_end: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class PaymentEventData(EventData, kw_only=True):
+    subscription_id: Optional[str] = None
+    amount: Optional[float] = None
+    currency: Optional[str] = None
+    status: Optional[str] = None
+    processed_at: Optional[str] = None
+
+
+class NotificationEventData(EventData, kw_only=True):
+    user_id: Optional[str] = None
+    type: Optional[str] = None
+    recipient: Optional[str] = None
+    subject: Optional[str] = None
+    content: Optional[str] = None
+    status: Optional[str] = None
+    sent_at: Optional[str] = None
+    delivered_at: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+# Event type prefix -> body schema
+EVENT_DATA_TYPES: Dict[str, type] = {
+    "user": UserEventData,
+    "subscription": SubscriptionEventData,
+    "payment": PaymentEventData,
+    "email": NotificationEventData,
+}
+
+
+class _RawData(msgspec.Struct):
+    data: Any = None
+
+
+_raw_data = msgspec.json.Decoder(_RawData)
+
+
+class WebhookPayload(msgspec.Struct):
     source: WebhookSource
     event_type: str
     event_id: str
     timestamp: datetime
-    data: Dict[str, Any]
+    data: Any  # EventData subclass, or a plain dict for untyped payloads
     tenant_id: Optional[str] = None
-    raw_payload: Optional[Dict[str, Any]] = None
+    raw_payload: Optional[bytes] = None  # the body as received
+
+    def data_dict(self) -> Dict[str, Any]:
+        """The event data as the service sent it, for storing"""
+        if self.raw_payload is not None:
+            data = _raw_data.decode(self.raw_payload).data
+            if isinstance(data, dict):
+                return data
+        if isinstance(self.data, EventData):
+            return self.data.to_dict()
+        return msgspec.to_builtins(self.data or {})
 
 @dataclass
 class ProcessingResult:
@@ -55,3 +154,16 @@ class WebhookEvent(BaseModel):
     data: Dict[str, Any]
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     signature: Optional[str] = None
+
+
+class WebhookReplayRequest(BaseModel):
+    sources: List[str] = []
+    event_types: List[str] = []
+    tenant_ids: List[str] = []
+    statuses: List[str] = []
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+    rate_per_second: Optional[float] = Field(default=None, gt=0)  # None replays as fast as possible
+    concurrency: int = Field(default=50, ge=1, le=1000)
+    bypass_dedup: bool = False
@@ -10,6 +10,7 @@ import pytz
 from app.mock.service_orchestrator import service_orchestrator
 from app.mock.mock_services import MockServiceTester, WebhookPayloadGenerator
 from app.mock.client import external_client
+from app.mock.config import mock_service_config
 from app.models.webhooks import EventType
 
 timezone_name = "Africa/Lagos"
@@ -64,7 +65,35 @@ class TestMockServices:
         # Verify deletion
         deleted_user = await external_client.get_user(user_id)
         assert deleted_user is None
-    
+
+    async def test_conditional_get(self, tenant_id: str):
+        """Test ETag revalidation of resource reads"""
+        created_user = await external_client.create_user({
+            "email": "etaguser@example.com",
+            "name": "ETag User",
+            "tenant_id": tenant_id
+        })
+        assert created_user is not None
+        url = f"{mock_service_config.user_management_url}/users/{created_user['id']}"
+
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url)
+            assert response.status_code == 200
+            etag = response.headers.get("ETag")
+            assert etag
+
+            # Unchanged resource: 304 without a body
+            not_modified = await client.get(url, headers={"If-None-Match": etag})
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+
+            # Changed resource: new body and ETag
+            await external_client.update_user(created_user["id"], {**created_user, "name": "Renamed ETag User"})
+            modified = await client.get(url, headers={"If-None-Match": etag})
+            assert modified.status_code == 200
+            assert modified.headers["ETag"] != etag
+            assert modified.json()["name"] == "Renamed ETag User"
+
     async def test_payment_service(self, tenant_id: str):
         """Test payment service operations"""
         # Create subscription
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+import structlog
+from sqlalchemy import text
+
+from app.core.database import get_db_session
+from app.core.queue_telemetry import percentile
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+from app.integrations.external_client import ApiClientConfig, ApiClientFactory
+from app.models import IntegrationHealth
+
+logger = structlog.get_logger(__name__)
+
+SUMMARY_KEY = "integration_health:summary"
+
+
+class HealthStatus:
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"  # answered, but slower than degraded_ms
+    UNHEALTHY = "unhealthy"
+
+
+@dataclass
+class HealthSample:
+    service_name: str
+    status: str
+    response_time_ms: float
+    checked_at: float
+    status_code: Optional[int] = None
+    error_message: Optional[str] = None
+
+
+class IntegrationHealthMonitor:
+    """
+    Periodic health probes for the external services we integrate with.
+
+    Every service is probed at once over its pooled ApiClientFactory client.
+    Samples are written to integration_health and kept in a rolling window
+    per service, from which a summary (latest status, p50/p95 latency, error
+    rate) is built and cached in Redis so every process can read it.
+    The ApiClientFactory clients consult it on every request: their circuit
+    breakers stay open while is_available() is False, and requests time out
+    after suggested_timeout(). Those reads never wait on Redis; a stale
+    summary is reloaded in the background every summary_ttl_seconds.
+
+    Raw samples are kept for raw_retention_hours, then downsampled into one
+    row per service and hour (data["resolution"] == "1h") that is kept for
+    rollup_retention_days.
+    """
+
+    def __init__(
+        self,
+        services: Dict[str, str],
+        health_path: str = "/health",
+        timeout: float = 5.0,
+        degraded_ms: float = 1000.0,
+        window: int = 60,
+        summary_ttl_seconds: float = 60.0,
+        raw_retention_hours: int = 24,
+        rollup_retention_days: int = 30
+    ):
+        self.services = services
+        self.health_path = health_path
+        self.timeout = timeout
+        self.degraded_ms = degraded_ms
+        self.window = window
+        self.summary_ttl_seconds = summary_ttl_seconds
+        self.raw_retention_hours = raw_retention_hours
+        self.rollup_retention_days = rollup_retention_days
+        self._samples: Dict[str, Deque[HealthSample]] = {name: deque(maxlen=window) for name in services}
+        self._summary: Dict[str, Dict[str, Any]] = {}
+        self._summary_loaded_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def run_check(self) -> List[HealthSample]:
+        """Probe every service, record the samples and publish the summary"""
+        samples = await self.check_all()
+        self.record(samples)
+        await self.publish_summary()
+        return samples
+
+    async def check_all(self) -> List[HealthSample]:
+        return list(await asyncio.gather(*(self.check(name) for name in self.services)))
+
+    async def check(self, service_name: str) -> HealthSample:
+        try:
+            client = ApiClientFactory.get_client(service_name)
+        except ValueError:
+            client = ApiClientFactory.create_client(service_name, ApiClientConfig(base_url=self.services[service_name]))
+        started = time.perf_counter()
+        try:
+            response = await client.client.get(self.health_path, timeout=self.timeout)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                status = HealthStatus.UNHEALTHY
+            elif elapsed_ms > self.degraded_ms:
+                status = HealthStatus.DEGRADED
+            else:
+                status = HealthStatus.HEALTHY
+            return HealthSample(
+                service_name=service_name,
+                status=status,
+                response_time_ms=elapsed_ms,
+                checked_at=time.time(),
+                status_code=response.status_code,
+                error_message=None if response.status_code < 400 else f"HTTP {response.status_code}"
+            )
+        except Exception as e:
+            return HealthSample(
+                service_name=service_name,
+                status=HealthStatus.UNHEALTHY,
+                response_time_ms=(time.perf_counter() - started) * 1000,
+                checked_at=time.time(),
+                error_message=str(e) or type(e).__name__
+            )
+
+    def record(self, samples: List[HealthSample]):
+        for sample in samples:
+            self._samples.setdefault(sample.service_name, deque(maxlen=self.window)).append(sample)
+        self._summary = self._build_summary()
+        self._summary_loaded_at = time.monotonic()
+
+        try:
+            with get_db_session() as db:
+                db.add_all([
+                    IntegrationHealth(
+                        service_name=sample.service_name,
+                        status=sample.status,
+                        response_time_ms=sample.response_time_ms,
+                        error_message=sample.error_message,
+                        data={"resolution": "raw", "status_code": sample.status_code},
+                        checked_at=datetime.fromtimestamp(sample.checked_at, timezone.utc)
+                    )
+                    for sample in samples
+                ])
+        except Exception as e:
+            logger.error(f"Error recording integration health samples: {e}")
+
+    async def publish_summary(self):
+        try:
+            await async_redis_client.set(
+                SUMMARY_KEY,
+                json.dumps(self._summary),
+                ex=max(1, int(self.summary_ttl_seconds * 3))
+            )
+        except Exception as e:
+            logger.warning(f"Could not publish integration health summary: {e}")
+
+    async def get_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Latest health per service; read from Redis at most every summary_ttl_seconds"""
+        if time.monotonic() - self._summary_loaded_at < self.summary_ttl_seconds:
+            return self._summary
+        try:
+            cached = await async_redis_client.get(SUMMARY_KEY)
+            if cached:
+                self._summary = json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Could not load integration health summary: {e}")
+        self._summary_loaded_at = time.monotonic()
+        return self._summary
+
+    def service_summary(self, service_name: str) -> Optional[Dict[str, Any]]:
+        """Last summary recorded or loaded by this process for a service, without I/O"""
+        self._maybe_refresh()
+        return self._summary.get(service_name)
+
+    def is_available(self, service_name: str) -> bool:
+        """False only if the last probe found the service unhealthy"""
+        summary = self.service_summary(service_name)
+        return not summary or summary["status"] != HealthStatus.UNHEALTHY
+
+    def suggested_timeout(
+        self,
+        service_name: str,
+        default: float,
+        multiplier: float = 3.0,
+        floor: float = 1.0
+    ) -> float:
+        """Request timeout in seconds derived from the service's p95 latency, capped at default"""
+        summary = self.service_summary(service_name)
+        if not summary or summary.get("p95_ms") is None:
+            return default
+        return max(floor, min(default, summary["p95_ms"] * multiplier / 1000))
+
+    def _maybe_refresh(self):
+        """Reload a stale summary in the background when an event loop is running"""
+        if time.monotonic() - self._summary_loaded_at < self.summary_ttl_seconds:
+            return
+        if self._refresh is not None and not self._refresh.done():
+            return
+        try:
+            self._refresh = asyncio.get_running_loop().create_task(self.get_summary())
+        except RuntimeError:
+            pass
+
+    def downsample(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Roll raw samples past their retention up into hourly rows, and drop expired rollups"""
+        now = now or datetime.now(timezone.utc)
+        raw_cutoff = (now - timedelta(hours=self.raw_retention_hours)).replace(minute=0, second=0, microsecond=0)
+        rollup_cutoff = now - timedelta(days=self.rollup_retention_days)
+        raw = "coalesce(data->>'resolution', 'raw') = 'raw'"
+
+        with get_db_session() as db:
+            rolled_up = db.execute(text(f"""
+                INSERT INTO integration_health (service_name, status, response_time_ms, error_message, data, checked_at)
+                SELECT
+                    service_name,
+                    mode() WITHIN GROUP (ORDER BY status),
+                    avg(response_time_ms),
+                    NULL,
+                    jsonb_build_object(
+                        'resolution', '1h',
+                        'samples', count(*),
+                        'failures', count(*) FILTER (WHERE status = :unhealthy),
+                        'p50_ms', percentile_cont(0.5) WITHIN GROUP (ORDER BY response_time_ms),
+                        'p95_ms', percentile_cont(0.95) WITHIN GROUP (ORDER BY response_time_ms),
+                        'max_ms', max(response_time_ms)
+                    ),
+                    date_trunc('hour', checked_at)
+                FROM integration_health
+                WHERE {raw} AND checked_at < :raw_cutoff
+                GROUP BY service_name, date_trunc('hour', checked_at)
+            """), {"unhealthy": HealthStatus.UNHEALTHY, "raw_cutoff": raw_cutoff}).rowcount
+            deleted_raw = db.execute(
+                text(f"DELETE FROM integration_health WHERE {raw} AND checked_at < :raw_cutoff"),
+                {"raw_cutoff": raw_cutoff}
+            ).rowcount
+            deleted_rollups = db.execute(
+                text("DELETE FROM integration_health WHERE data->>'resolution' = '1h' AND checked_at < :rollup_cutoff"),
+                {"rollup_cutoff": rollup_cutoff}
+            ).rowcount
+
+        return {"rolled_up": rolled_up, "deleted_raw": deleted_raw, "deleted_rollups": deleted_rollups}
+
+    def _build_summary(self) -> Dict[str, Dict[str, Any]]:
+        summary = {}
+        for service_name, samples in self._samples.items():
+            if not samples:
+                continue
+            latest = samples[-1]
+            answered = [s.response_time_ms for s in samples if s.status != HealthStatus.UNHEALTHY]
+            failures = sum(1 for s in samples if s.status == HealthStatus.UNHEALTHY)
+            summary[service_name] = {
+                "status": latest.status,
+                "checked_at": datetime.fromtimestamp(latest.checked_at, timezone.utc).isoformat(),
+                "response_time_ms": round(latest.response_time_ms, 2),
+                "error_message": latest.error_message,
+                "p50_ms": percentile(answered, 0.5),
+                "p95_ms": percentile(answered, 0.95),
+                "error_rate": round(failures / len(samples), 3),
+                "samples": len(samples),
+            }
+        return summary
+
+
+integration_health = IntegrationHealthMonitor(
+    services={
+        "user_management": settings.EXTERNAL_USER_SERVICE_URL,
+        "payment_service": settings.EXTERNAL_PAYMENT_SERVICE_URL,
+        "communication_service": settings.EXTERNAL_COMMS_SERVICE_URL,
+    },
+    timeout=settings.INTEGRATION_HEALTH_TIMEOUT_SECONDS,
+    degraded_ms=settings.INTEGRATION_HEALTH_DEGRADED_MS,
+    window=settings.INTEGRATION_HEALTH_WINDOW,
+    summary_ttl_seconds=settings.INTEGRATION_HEALTH_CHECK_INTERVAL,
+    raw_retention_hours=settings.INTEGRATION_HEALTH_RAW_RETENTION_HOURS,
+    rollup_retention_days=settings.INTEGRATION_HEALTH_ROLLUP_RETENTION_DAYS
+)
@@ -14,7 +14,6 @@ import structlog
 from app.core.database import get_db
 from app.models.sync import SyncConfiguration, SyncStatus, DataSyncLog, ConflictResolution
 from app.models.organization import Organization
-from app.integrations.external_client import ExternalApiClient
 
 logger = structlog.get_logger(__name__)
 
@@ -62,7 +61,6 @@ class DataSyncEngine:
     """
     
     def __init__(self):
-        self.external_client = ExternalApiClient()
         self.sync_locks = {}  
 
 
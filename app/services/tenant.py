@@ -7,9 +7,10 @@ import uuid
 from app.models.auth_schema import UserAuthScheme
 from app.models.tenant import Tenant
 from app.models.user import User, UserRole
-from app.models.audit_log import AuditLog
+from app.core.audit_sink import audit_sink
 from app.schemas.tenant import TenantCreate, TenantUpdate
 from app.core.security import get_password_hash
+from app.core.tenant_cache import tenant_cache
 
 logger = structlog.get_logger()
 
@@ -90,7 +91,7 @@ class TenantService:
             
 
             
-            audit_log = AuditLog(
+            audit_sink.record(
                 event_type="CREATE",
                 resource_type="Tenant",
                 resource_id=str(db_tenant.id),
@@ -101,14 +102,14 @@ class TenantService:
                     "slug": tenant_data.slug,
                     "domain": tenant_data.domain,
                     "admin_email": tenant_data.admin_email
-                }
+                },
+                db=self.db
             )
-            
-            self.db.add(audit_log)
 
             
             self.db.commit()
             self.db.refresh(db_tenant)
+            tenant_cache.publish_change(str(db_tenant.id), exists=True)
             
             logger.info("Tenant created with admin", 
                        tenant_id=db_tenant.id,
@@ -145,17 +146,17 @@ class TenantService:
             setattr(tenant, field, value)
         
 
-        audit_log = AuditLog(
+        audit_sink.record(
             event_type="UPDATE",
             resource_type="Tenant",
             resource_id=str(tenant.id),
             user_id=updated_by_user_id,
             tenant_id=tenant_id,
             old_values=old_values,
-            new_values=update_data
+            new_values=update_data,
+            db=self.db
         )
         
-        self.db.add(audit_log)
         self.db.commit()
         self.db.refresh(tenant)
         
@@ -179,18 +180,19 @@ class TenantService:
         self.db.query(User).filter(User.tenant_id == tenant_id).update({"is_active": False})
         
 
-        audit_log = AuditLog(
+        audit_sink.record(
             event_type="DEACTIVATE",
             resource_type="Tenant",
             resource_id=str(tenant.id),
             user_id=deactivated_by_user_id,
             tenant_id=tenant_id,
             old_values={"is_active": True},
-            new_values={"is_active": False}
+            new_values={"is_active": False},
+            db=self.db
         )
         
-        self.db.add(audit_log)
         self.db.commit()
+        tenant_cache.publish_change(str(tenant.id), exists=False)
         
         logger.warning("Tenant deactivated", 
                       tenant_id=tenant_id,
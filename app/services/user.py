@@ -5,7 +5,7 @@ import structlog
 
 from app.models.user import User, UserRole
 from app.models.auth_schema import UserAuthScheme
-from app.models.audit_log import AuditLog
+from app.core.audit_sink import audit_sink
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
 
@@ -187,7 +187,8 @@ class UserService:
             self.db.commit()
         
 
-        self._create_audit_log(
+        # Nothing else is committed on a successful login, so don't tie the entry to the session
+        audit_sink.record(
             event_type="LOGIN",
             resource_type="User",
             resource_id=str(user.id),
@@ -205,9 +206,9 @@ class UserService:
     def _create_audit_log(self, event_type: str, resource_type: str, resource_id: str, 
                          user_id: Optional[int], tenant_id: str, 
                          old_values: dict = None, new_values: dict = None, **kwargs):
-        """Create audit log entry"""
+        """Create audit log entry, written once the current transaction commits"""
         
-        audit_log = AuditLog(
+        audit_sink.record(
             event_type=event_type,
             resource_type=resource_type,
             resource_id=resource_id,
@@ -215,7 +216,6 @@ class UserService:
             tenant_id=tenant_id,
             old_values=old_values,
             new_values=new_values,
+            db=self.db,
             **kwargs
-        )
-        
-        self.db.add(audit_log)
\ No newline at end of file
+        )
\ No newline at end of file
@@ -0,0 +1,255 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import structlog
+from sqlalchemy import select
+
+from app.core.database import get_db_session
+from app.core.event_pipeline import dispatch_event, processing_pipeline
+from app.integrations.webhook_codec import UnknownEventTypeError, webhook_codec
+from app.models.webhooks import WebhookEventDB
+from app.schemas.webhooks import ProcessingResult, WebhookPayload
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class ReplayFilter:
+    sources: List[str] = field(default_factory=list)
+    event_types: List[str] = field(default_factory=list)
+    tenant_ids: List[str] = field(default_factory=list)
+    statuses: List[str] = field(default_factory=list)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: Optional[int] = None
+
+
+@dataclass
+class ReplayReport:
+    replay_id: str
+    status: str = "running"
+    selected: int = 0
+    dispatched: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    error_message: Optional[str] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def events_per_second(self) -> float:
+        return self.dispatched / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "replay_id": self.replay_id,
+            "status": self.status,
+            "selected": self.selected,
+            "dispatched": self.dispatched,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "events_per_second": round(self.events_per_second, 1),
+            "error_message": self.error_message,
+        }
+
+
+class WebhookReplayer:
+    """
+    Re-drives stored webhook_events through the event pipeline.
+
+    Rows are streamed with a server-side cursor, fetch_size at a time, so
+    a replay never holds the whole selection in memory. Events are
+    dispatched at rate_per_second (None for as fast as possible) with at
+    most `concurrency` in flight.
+
+    A replayed event keeps its original id and timestamp, so it has the
+    original idempotency key: its webhook_events row is updated in place,
+    and events that already completed are skipped by dedup. bypass_dedup
+    releases their idempotency claims first so the handlers run again.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: Optional[float] = None,
+        concurrency: int = 50,
+        bypass_dedup: bool = False,
+        fetch_size: int = 500,
+        dispatch: Callable[[WebhookPayload], Awaitable[Any]] = dispatch_event
+    ):
+        self.rate_per_second = rate_per_second
+        self.concurrency = max(1, concurrency)
+        self.bypass_dedup = bypass_dedup
+        self.fetch_size = max(1, fetch_size)
+        self.dispatch = dispatch
+
+    async def run(self, filters: ReplayFilter, report: Optional[ReplayReport] = None) -> ReplayReport:
+        report = report or ReplayReport(replay_id=str(uuid.uuid4()))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        interval = 1 / self.rate_per_second if self.rate_per_second else 0.0
+        next_at = time.monotonic()
+
+        async def _dispatch(payload: WebhookPayload):
+            try:
+                result = await self.dispatch(payload)
+                if isinstance(result, ProcessingResult) and not result.success:
+                    report.failed += 1
+                elif isinstance(result, ProcessingResult) and result.metadata.get("skipped"):
+                    # duplicate_event, or no_handler: nothing ran it
+                    report.skipped += 1
+                    if result.metadata["skipped"] == "no_handler":
+                        logger.warning(f"No handler for {payload.event_type}, replay of {payload.event_id} skipped")
+                else:
+                    report.succeeded += 1
+            except Exception as e:
+                report.failed += 1
+                logger.error(f"Replay of {payload.event_id} failed: {e}")
+            finally:
+                semaphore.release()
+
+        batches = self._fetch(filters)
+        fetch: Optional[asyncio.Future] = None
+        try:
+            while True:
+                # shielded: if the replay is cancelled mid-fetch, the thread
+                # keeps running next() and has to finish before close()
+                fetch = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+                batch = await asyncio.shield(fetch)
+                if batch is None:
+                    break
+                report.selected += len(batch)
+                if self.bypass_dedup:
+                    await processing_pipeline.release_claims([payload for payload in batch if payload])
+
+                for payload in batch:
+                    if payload is None:
+                        report.skipped += 1
+                        continue
+
+                    if interval:
+                        now = time.monotonic()
+                        if next_at > now:
+                            await asyncio.sleep(next_at - now)
+                        next_at = max(next_at, now) + interval
+
+                    await semaphore.acquire()
+                    task = asyncio.create_task(_dispatch(payload))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    report.dispatched += 1
+
+            if tasks:
+                await asyncio.gather(*tasks)
+            report.status = "completed"
+        except asyncio.CancelledError:
+            report.status = "cancelled"
+            raise
+        except Exception as e:
+            report.status = "failed"
+            report.error_message = str(e)
+            logger.error(f"Replay {report.replay_id} failed: {e}")
+        finally:
+            if fetch is not None and not fetch.done():
+                await asyncio.wait([fetch])
+            batches.close()
+            report.finished_at = time.monotonic()
+            logger.info(f"Replay {report.replay_id} {report.status}: {report.to_dict()}")
+
+        return report
+
+    def _fetch(self, filters: ReplayFilter) -> Iterator[List[Optional[WebhookPayload]]]:
+        """Batches of payloads from a server-side cursor (None for rows that can't be replayed)"""
+        with get_db_session() as db:
+            result = db.execute(
+                self._query(filters).execution_options(stream_results=True, yield_per=self.fetch_size)
+            )
+            for rows in result.partitions():
+                yield [self._to_payload(row) for row in rows]
+
+    def _query(self, filters: ReplayFilter):
+        query = select(
+            WebhookEventDB.id,
+            WebhookEventDB.service_name,
+            WebhookEventDB.event_type,
+            WebhookEventDB.tenant_id,
+            WebhookEventDB.payload,
+            WebhookEventDB.event_id,
+            WebhookEventDB.event_timestamp,
+            WebhookEventDB.created_at
+        )
+        if filters.sources:
+            query = query.where(WebhookEventDB.service_name.in_(filters.sources))
+        if filters.event_types:
+            query = query.where(WebhookEventDB.event_type.in_(filters.event_types))
+        if filters.tenant_ids:
+            query = query.where(WebhookEventDB.tenant_id.in_(filters.tenant_ids))
+        if filters.statuses:
+            query = query.where(WebhookEventDB.status.in_(filters.statuses))
+        if filters.since:
+            query = query.where(WebhookEventDB.created_at >= filters.since)
+        if filters.until:
+            query = query.where(WebhookEventDB.created_at < filters.until)
+        query = query.order_by(WebhookEventDB.created_at)
+        if filters.limit:
+            query = query.limit(filters.limit)
+        return query
+
+    def _to_payload(self, row) -> Optional[WebhookPayload]:
+        try:
+            return webhook_codec.decode_payload({
+                "source": row.service_name,
+                "event_type": row.event_type,
+                "event_id": row.event_id or str(row.id),
+                "timestamp": row.event_timestamp or row.created_at or datetime.now(timezone.utc),
+                "data": row.payload or {},
+                "tenant_id": row.tenant_id,
+            })
+        except (UnknownEventTypeError, ValueError) as e:
+            logger.warning(f"Skipping webhook event {row.id} during replay: {e}")
+            return None
+
+
+class ReplayManager:
+    """
+    Replays started from the admin API, run in the background of the API
+    process. Reports of the max_reports most recent replays are kept; older
+    finished ones are dropped.
+    """
+
+    def __init__(self, max_reports: int = 100):
+        self.max_reports = max_reports
+        self.reports: "OrderedDict[str, ReplayReport]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, replayer: WebhookReplayer, filters: ReplayFilter) -> ReplayReport:
+        report = ReplayReport(replay_id=str(uuid.uuid4()))
+        self.reports[report.replay_id] = report
+        finished = [replay_id for replay_id, old in self.reports.items() if old.finished_at is not None]
+        for replay_id in finished[:max(0, len(self.reports) - self.max_reports)]:
+            del self.reports[replay_id]
+        task = asyncio.create_task(replayer.run(filters, report))
+        self._tasks[report.replay_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(report.replay_id, None))
+        return report
+
+    def cancel(self, replay_id: str) -> bool:
+        task = self._tasks.get(replay_id)
+        if not task:
+            return False
+        task.cancel()
+        return True
+
+
+replay_manager = ReplayManager()
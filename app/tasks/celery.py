@@ -1,6 +1,17 @@
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
 from app.core.settings import settings
 import os
+import time
+import structlog
+
+logger = structlog.get_logger(__name__)
 
 
 celery_app = Celery(
@@ -8,7 +19,11 @@ celery_app = Celery(
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
     include=[
-        "app.tasks.webhook_tasks",
+        "app.tasks.webhook",
+        "app.tasks.sync",
+        "app.tasks.partitions",
+        "app.tasks.monitoring",
+        "app.integrations.event_processors",
     ]
 )
 
@@ -27,36 +42,98 @@ celery_app.conf.update(
     worker_disable_rate_limits=False,
     task_default_retry_delay=60,  
     task_max_retries=3,
-    task_routes={
-        "app.tasks.webhook.*": {"queue": "webhooks"},
-        'app.tasks.data_sync.*': {'queue': 'data_sync'},
-        "app.tasks.*": {"queue": "default"},
-        
+    # Queue and priority per task: event type, tenant plan and task kind
+    task_routes=("app.tasks.routing.route_task",),
+    task_default_queue="default",
+    task_default_priority=settings.TASK_DEFAULT_PRIORITY,
+    # Redis broker priorities: every queue is split into 10 priority lists,
+    # drained lowest number first
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
     },
     # Dead letter queue configuration, TODO(Richdotcom)  revist this when doing external config
     task_reject_on_worker_lost=True,
     task_ignore_result=False,
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
 
 
     # Beat schedule for periodic tasks
-    # beat_schedule={
-    #     'check-integration-health': {
-    #         'task': 'app.services.integration_health.check_integration_health',
-    #         'schedule': 300.0,  
-    #     },
-    #     'cleanup-old-webhook-events': {
-    #         'task': 'app.services.webhook_processor.cleanup_old_events',
-    #         'schedule': 3600.0, 
-    #     },
-    #     'process-dead-letter-queue': {
-    #         'task': 'app.services.webhook_processor.process_dead_letter_queue',
-    #         'schedule': 1800.0, 
-    #     },
-    # },
+    beat_schedule={
+        'check-integration-health': {
+            'task': 'check_integration_health',
+            'schedule': float(settings.INTEGRATION_HEALTH_CHECK_INTERVAL),
+        },
+        'downsample-integration-health': {
+            'task': 'downsample_integration_health',
+            'schedule': 3600.0,
+        },
+        'maintain-table-partitions': {
+            'task': 'maintain_table_partitions',
+            'schedule': float(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS),
+        },
+    },
 )
 
 
 @celery_app.task(bind=True)
 def health_check(self):
     """Health check task for Celery workers"""
-    return {"status": "healthy", "task_id": self.request.id}
\ No newline at end of file
+    return {"status": "healthy", "task_id": self.request.id}
+
+
+@task_postrun.connect
+def expire_task_result(task_id=None, task=None, **kwargs):
+    """Apply the per-task result lifetime from TASK_RESULT_TTLS"""
+    ttl = settings.TASK_RESULT_TTLS.get(task.name) if task else None
+    if ttl is None or task.ignore_result or not hasattr(task.backend, "expire"):
+        return
+    try:
+        task.backend.expire(task.backend.get_key_for_task(task_id), ttl)
+    except Exception as e:
+        logger.warning(f"Could not set result expiry for task {task_id}: {e}")
+
+
+@before_task_publish.connect
+def stamp_sent_at(headers=None, **kwargs):
+    """Record when a message was published, so telemetry can tell how long it has waited"""
+    if headers is not None:
+        headers.setdefault("sent_at", time.time())
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    from app.core.queue_telemetry import worker_telemetry
+    worker_telemetry.task_started(task_id, task.name if task else "unknown")
+
+
+@task_postrun.connect
+def stop_task_timer(task_id=None, **kwargs):
+    from app.core.queue_telemetry import worker_telemetry
+    worker_telemetry.task_finished(task_id)
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    """Start the process's long-lived event loop before it takes tasks, and its heartbeat"""
+    from app.core.queue_telemetry import worker_telemetry
+    from app.tasks.runtime import worker_runtime
+    worker_runtime.start()
+    worker_telemetry.start(worker_runtime.loop)
+
+
+@worker_process_shutdown.connect
+def flush_audit_sink(**kwargs):
+    """Write buffered audit entries before the worker process exits"""
+    from app.core.audit_sink import audit_sink
+    audit_sink.stop()
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**kwargs):
+    """Close pooled connections and clients, then stop the event loop"""
+    from app.core.queue_telemetry import worker_telemetry
+    from app.tasks.runtime import worker_runtime
+    worker_telemetry.stop()
+    worker_runtime.stop()
@@ -0,0 +1,51 @@
+import structlog
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from app.tasks.celery import celery_app
+from app.tasks.runtime import worker_runtime
+from app.services.integration_health import integration_health
+
+logger = structlog.get_logger(__name__)
+
+
+@celery_app.task(name="check_integration_health")
+def check_integration_health() -> Dict[str, Any]:
+    """Probe every external service concurrently and record the results (Celery beat)"""
+    try:
+        samples = worker_runtime.run(integration_health.run_check())
+
+        return {
+            "success": True,
+            "services": {sample.service_name: sample.status for sample in samples},
+            "processed_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Error checking integration health: {e}")
+        return {
+            "success": False,
+            "error_message": str(e)
+        }
+
+
+@celery_app.task(name="downsample_integration_health")
+def downsample_integration_health() -> Dict[str, Any]:
+    """Roll old integration health samples up into hourly rows (Celery beat)"""
+    try:
+        counts = integration_health.downsample()
+
+        logger.info(f"Downsampled integration health: {counts}")
+
+        return {
+            "success": True,
+            **counts,
+            "processed_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Error downsampling integration health: {e}")
+        return {
+            "success": False,
+            "error_message": str(e)
+        }
@@ -0,0 +1,42 @@
+import structlog
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from app.tasks.celery import celery_app
+from app.core.event_pipeline import processing_pipeline
+from app.core.settings import settings
+from app.core.table_partitions import table_partitions
+
+logger = structlog.get_logger(__name__)
+
+
+@celery_app.task(name="maintain_table_partitions")
+def maintain_table_partitions() -> Dict[str, Any]:
+    """
+    Create upcoming partitions and drop the ones past retention (Celery beat),
+    and expire webhook idempotency claims with the webhook_events they cover
+    """
+    try:
+        created = table_partitions.ensure_partitions()
+        dropped = table_partitions.drop_expired_partitions()
+        expired_claims = processing_pipeline.expire_claims(settings.PARTITION_RETENTION_DAYS.get("webhook_events", 90))
+
+        logger.info(
+            f"Partition maintenance: created {created or 'none'}, dropped {dropped or 'none'}, "
+            f"expired {expired_claims} idempotency claims"
+        )
+
+        return {
+            "success": True,
+            "created": created,
+            "dropped": dropped,
+            "expired_claims": expired_claims,
+            "processed_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Error maintaining table partitions: {e}")
+        return {
+            "success": False,
+            "error_message": str(e)
+        }
@@ -0,0 +1,137 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from app.core.database import get_db_session
+from app.core.partitioned_executor import entity_key, partition_queue_name
+from app.core.settings import settings
+from app.core.tenant_cache import tenant_cache
+from app.core.tenant_scheduler import tenant_scheduler
+from app.models import Organization
+
+logger = structlog.get_logger(__name__)
+
+# Broker queues. Each should have its own workers so a backlog in one never
+# delays another; see the README for the worker layout.
+CRITICAL_QUEUE = "webhooks.critical"
+WEBHOOK_QUEUE = "webhooks"
+BULK_QUEUE = "webhooks.bulk"
+SYNC_QUEUE = "sync"
+MAINTENANCE_QUEUE = "maintenance"
+DEFAULT_QUEUE = "default"
+
+# Event type prefix -> queue. Billing events are latency-critical; subscription
+# events share the queue with payments because both are ordered per subscription.
+EVENT_QUEUES: Dict[str, str] = {
+    "payment": CRITICAL_QUEUE,
+    "subscription": CRITICAL_QUEUE,
+    "email": BULK_QUEUE,
+}
+
+# Task name -> (queue, priority offset) for tasks not routed per event
+TASK_KINDS: Dict[str, Tuple[str, int]] = {
+    "process_webhook_event": (WEBHOOK_QUEUE, 0),
+    "process_bulk_webhook_events": (BULK_QUEUE, 2),
+    "summarize_bulk_webhook_results": (BULK_QUEUE, 2),
+    "trigger_sync_task": (SYNC_QUEUE, 1),
+    "batch_sync_task": (SYNC_QUEUE, 2),
+    "cleanup_processed_events": (MAINTENANCE_QUEUE, 9),
+    "periodic_cleanup": (MAINTENANCE_QUEUE, 9),
+    "maintain_table_partitions": (MAINTENANCE_QUEUE, 0),
+    "check_integration_health": (MAINTENANCE_QUEUE, -9),
+    "downsample_integration_health": (MAINTENANCE_QUEUE, 9),
+}
+
+MIN_PRIORITY = 0  # served first on the Redis broker
+MAX_PRIORITY = 9
+
+
+class TaskRouter:
+    """
+    Picks the queue and broker priority for Celery tasks.
+
+    The queue follows the kind of work: payment and subscription events get
+    a dedicated critical queue, bulk and email work its own queue, syncs and
+    maintenance theirs. Within a queue the priority follows the customer's
+    plan (Tenant.plan_type for webhook events, Organization.subscription_tier
+    for syncs), so an enterprise event is taken ahead of a basic one. Tenant
+    plans come from the tenant scheduler's plan cache; organization plans are
+    cached here for plan_ttl_seconds.
+
+    Lower priority numbers are served first, matching the Redis transport.
+    """
+
+    def __init__(
+        self,
+        plan_priorities: Dict[str, int],
+        default_priority: int,
+        plan_ttl_seconds: float = 300.0
+    ):
+        self.plan_priorities = plan_priorities
+        self.default_priority = default_priority
+        self.plan_ttl_seconds = plan_ttl_seconds
+        self._organization_plans: Dict[str, Tuple[Optional[str], float]] = {}
+
+    def webhook_route(self, payload: Any) -> Dict[str, Any]:
+        """Queue and priority for process_webhook_event carrying this payload"""
+        base = EVENT_QUEUES.get(payload.event_type.split(".", 1)[0], WEBHOOK_QUEUE)
+        key = entity_key(payload)
+        queue = partition_queue_name(key, prefix=base) if key else base
+        return {"queue": queue, "priority": self.priority_for_plan(self.tenant_plan(payload.tenant_id))}
+
+    def route_task(self, name: str, args, kwargs, options, task=None, **kw) -> Optional[Dict[str, Any]]:
+        """Celery router; explicit apply_async options still take precedence"""
+        kind = TASK_KINDS.get(name)
+        if kind is None:
+            return {"queue": DEFAULT_QUEUE}
+
+        queue, offset = kind
+        plan = None
+        if queue == SYNC_QUEUE:
+            organization_id = kwargs.get("organization_id") if kwargs else None
+            if organization_id is None and args:
+                organization_id = args[0]
+            plan = self.organization_plan(organization_id)
+        return {"queue": queue, "priority": self.priority_for_plan(plan, offset)}
+
+    def priority_for_plan(self, plan: Optional[str], offset: int = 0) -> int:
+        priority = self.plan_priorities.get(plan, self.default_priority) + offset
+        return max(MIN_PRIORITY, min(MAX_PRIORITY, priority))
+
+    def tenant_plan(self, tenant_id: Optional[str]) -> Optional[str]:
+        tenant = tenant_cache.normalize(tenant_id) if tenant_id else None
+        if not tenant:
+            return None
+        return tenant_scheduler.plan(tenant)
+
+    def organization_plan(self, organization_id: Optional[str]) -> Optional[str]:
+        organization = tenant_cache.normalize(str(organization_id)) if organization_id else None
+        if not organization:
+            return None
+        cached = self._organization_plans.get(organization)
+        now = time.monotonic()
+        if cached and cached[1] > now:
+            return cached[0]
+
+        plan = None
+        try:
+            with get_db_session() as db:
+                row = db.query(Organization.subscription_tier).filter(Organization.id == organization).first()
+                plan = row.subscription_tier if row else None
+        except Exception as e:
+            logger.warning(f"Could not load plan for organization {organization}: {e}")
+
+        self._organization_plans[organization] = (plan, now + self.plan_ttl_seconds)
+        return plan
+
+
+task_router = TaskRouter(
+    plan_priorities=settings.TASK_PLAN_PRIORITIES,
+    default_priority=settings.TASK_DEFAULT_PRIORITY,
+    plan_ttl_seconds=settings.TENANT_CACHE_TTL_SECONDS
+)
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    return task_router.route_task(name, args, kwargs, options, task=task, **kw)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+import structlog
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for asyncpg"""
+    parsed = make_url(url)
+    return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+class WorkerRuntime:
+    """
+    Long-lived asyncio runtime for a Celery worker process.
+
+    One event loop runs for the life of the process in a background thread,
+    so connection pools, HTTP clients and caches bound to it survive between
+    tasks. Tasks hand it coroutines with run(). The runtime also owns the
+    process's async DB engine and closes the ApiClientFactory clients on stop().
+    """
+
+    def __init__(self, pool_size: int = 5, max_overflow: int = 5):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="worker-runtime", daemon=True)
+            self._thread.start()
+            logger.info("Worker async runtime started")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime's loop and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(
+                async_database_url(settings.DATABASE_URL),
+                pool_pre_ping=True,
+                pool_recycle=300,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow
+            )
+            self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._engine
+
+    def session(self) -> AsyncSession:
+        """New AsyncSession on the worker's engine; use it from coroutines passed to run()"""
+        self.engine
+        return self._session_factory()
+
+    def stop(self, timeout: float = 10.0):
+        """Close pooled clients and connections, then stop the loop"""
+        if not (self._thread and self._thread.is_alive()):
+            return
+        try:
+            self.run(self._close(), timeout=timeout)
+        except Exception as e:
+            logger.error(f"Error closing worker runtime resources: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop.close()
+        self._thread = None
+        logger.info("Worker async runtime stopped")
+
+    async def _close(self):
+        from app.integrations.external_client import ApiClientFactory
+        await ApiClientFactory.close_all()
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+worker_runtime = WorkerRuntime()
@@ -2,9 +2,8 @@ from celery import Task
 import structlog
 from app.tasks.celery import celery_app
 from app.services.sync_engine import DataSyncEngine
-from app.core.database import get_db
+from app.tasks.runtime import worker_runtime
 import logging
-import asyncio
 
 logger = structlog.get_logger(__name__)
 
@@ -22,11 +21,8 @@ class SyncCallbackTask(Task):
 def trigger_sync_task(self, organization_id, service_name, entity_type=None, force=False):
     """Celery task to trigger a sync for a service/entity."""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         async def run():
-            async with get_db() as db:
-
+            async with worker_runtime.session() as db:
                 sync_engine = DataSyncEngine()
                 result = await sync_engine.trigger_sync(
                     db=db,
@@ -36,10 +32,8 @@ def trigger_sync_task(self, organization_id, service_name, entity_type=None, for
                     force=force
                 )
                 return result
-        try:
-            result = loop.run_until_complete(run())
-        finally:
-            loop.close()
+
+        result = worker_runtime.run(run())
         logger.info(f"Sync triggered for org={organization_id}, service={service_name}, entity={entity_type}")
         return result.__dict__
     except Exception as exc:
@@ -50,20 +44,16 @@ def trigger_sync_task(self, organization_id, service_name, entity_type=None, for
 def batch_sync_task(self, organization_id):
     """Celery task to batch sync all services for an organization."""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         async def run():
-            async with get_db() as db:
+            async with worker_runtime.session() as db:
                 sync_engine = DataSyncEngine()
                 results = await sync_engine.batch_sync(
                     db=db,
                     organization_id=organization_id
                 )
                 return {k: v.__dict__ for k, v in results.items()}
-        try:
-            results = loop.run_until_complete(run())
-        finally:
-            loop.close()
+
+        results = worker_runtime.run(run())
         logger.info(f"Batch sync triggered for org={organization_id}")
         return results
     except Exception as exc:
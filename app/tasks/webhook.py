@@ -1,20 +1,35 @@
-from celery import Task
+from celery import Task, chord
+import asyncio
 import structlog
-from app.core.database import get_db
-from sqlalchemy import text
+from sqlalchemy import select, update
 from datetime import timedelta
+import uuid
 
 from app.tasks.celery import celery_app
-from app.integrations.webhook import WebhookPayload, WebhookSource
-from app.core.event_pipeline import event_emitter, ProcessingResult
+from app.tasks.routing import task_router
+from app.tasks.runtime import worker_runtime
+from app.integrations.webhook import WebhookPayload
+from app.integrations.webhook_codec import webhook_codec
+from app.core.event_pipeline import dispatch_event, processing_pipeline, ProcessingResult
+from app.core.partitioned_executor import entity_key
+from app.core.settings import settings
+from app.core.table_partitions import table_partitions
+from app.decorators.event_handler import process_event_bulk
+from app.models.webhooks import WebhookEventDB, WebhookStatus
 import logging
 import json
 from datetime import datetime, timezone
-from typing import Dict, Any
-import asyncio
+from typing import Dict, Any, List, Optional, Union
 
 logger = structlog.get_logger(__name__)
 
+class WebhookProcessingError(Exception):
+    """A handler reported that it could not process the event"""
+
+    def __init__(self, result: ProcessingResult):
+        super().__init__(result.error_message or "Webhook handler failed")
+        self.result = result
+
 class CallbackTask(Task):
     """Custom Celery task with callbacks for success/failure"""
     
@@ -27,33 +42,133 @@ class CallbackTask(Task):
     def on_retry(self, exc, task_id, args, kwargs, einfo):
         logger.warning(f"Task {task_id} retrying: {exc}")
 
-@celery_app.task(bind=True, base=CallbackTask, name="process_webhook_event")
-def process_webhook_event(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Process webhook event asynchronously"""
-    
+def is_event_reference(webhook_data: Union[str, Dict[str, Any]]) -> bool:
+    """True if a task argument is a webhook_events id rather than an encoded payload"""
+    if not isinstance(webhook_data, str):
+        return False
     try:
-        payload = WebhookPayload(
-            source=WebhookSource(webhook_data["source"]),
-            event_type=webhook_data["event_type"],
-            event_id=webhook_data["event_id"],
-            timestamp=datetime.fromisoformat(webhook_data["timestamp"]),
-            data=webhook_data["data"],
-            tenant_id=webhook_data.get("tenant_id"),
-            raw_payload=webhook_data.get("raw_payload")
+        uuid.UUID(webhook_data)
+        return True
+    except ValueError:
+        return False
+
+def webhook_payload_from_row(row: WebhookEventDB) -> WebhookPayload:
+    return webhook_codec.decode_payload({
+        "source": row.service_name,
+        "event_type": row.event_type,
+        "event_id": row.event_id or str(row.id),
+        "timestamp": row.event_timestamp or row.created_at,
+        "data": row.payload or {},
+        "tenant_id": row.tenant_id,
+    })
+
+async def load_webhook_events(event_ids: List[str]) -> Dict[str, WebhookPayload]:
+    """
+    Claim-check side of the worker: fetch queued events by webhook_events id
+    in one query and mark them processing. Rows that no longer exist or are
+    already completed are left out.
+    """
+    async with worker_runtime.session() as session:
+        rows = (await session.execute(
+            select(WebhookEventDB).where(
+                WebhookEventDB.id.in_(event_ids),
+                WebhookEventDB.status.notin_([WebhookStatus.COMPLETED, WebhookStatus.ARCHIVED])
+            )
+        )).scalars().all()
+        if rows:
+            await session.execute(
+                update(WebhookEventDB)
+                .where(WebhookEventDB.id.in_([row.id for row in rows]))
+                .values(status=WebhookStatus.PROCESSING, last_attempted_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+    return {str(row.id): webhook_payload_from_row(row) for row in rows}
+
+async def mark_webhook_events_failed(event_ids: List[str], error_message: str):
+    """Move claim-checked events that ran out of retries to the dead letter state"""
+    async with worker_runtime.session() as session:
+        await session.execute(
+            update(WebhookEventDB)
+            .where(WebhookEventDB.id.in_(event_ids))
+            .values(status=WebhookStatus.DEAD_LETTER, error_message=error_message)
         )
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        await session.commit()
+
+async def dispatch_in_order(payload: WebhookPayload, retries: int) -> ProcessingResult:
+    """
+    Run an event that has an entity key, retrying it here rather than with
+    self.retry: a re-published task would land behind later events for the
+    same entity on its partition queue. While it waits the partition's
+    worker takes nothing else, so those events run only once this one
+    succeeded or was dead-lettered.
+    """
+    attempt = 0
+    while True:
+        try:
+            result = await dispatch_event(payload)
+        except Exception as e:
+            result = ProcessingResult(success=False, error_message=str(e))
+        if result.success or attempt >= retries:
+            return result
+        delay = result.retry_after_seconds or 2 ** attempt
+        attempt += 1
+        logger.warning(f"Event {payload.event_id} failed: {result.error_message}. Retrying in place in {delay}s")
+        await asyncio.sleep(delay)
+
+def dead_letter_webhook_event(reference: Optional[str], error_message: str) -> Dict[str, Any]:
+    """Dead-letter a claim-checked event that ran out of retries; returns the task result"""
+    if reference:
         try:
-            result = loop.run_until_complete(event_emitter.emit_future(payload.event_type, payload))
-        finally:
-            loop.close()
+            worker_runtime.run(mark_webhook_events_failed([reference], error_message))
+        except Exception as e:
+            logger.error(f"Could not dead-letter webhook event {reference}: {e}")
+
+    return {
+        "success": False,
+        "error_message": error_message,
+        "metadata": {"max_retries_reached": True},
+        "processed_at": datetime.now(timezone.utc).isoformat()
+    }
+
+@celery_app.task(bind=True, base=CallbackTask, name="process_webhook_event", ignore_result=True)
+def process_webhook_event(self, webhook_data: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Process webhook event asynchronously.
+    webhook_data is normally a webhook_events id (see enqueue_webhook_event);
+    an encoded payload is still accepted for messages queued before that.
+    Events with an entity key are retried in place to keep them in order
+    (see dispatch_in_order); others are retried with self.retry.
+    """
+    
+    reference = webhook_data if is_event_reference(webhook_data) else None
+    try:
+        if reference:
+            payload = worker_runtime.run(load_webhook_events([reference])).get(reference)
+            if payload is None:
+                logger.info(f"Webhook event {reference} is missing or already processed, skipping")
+                return {
+                    "success": True,
+                    "error_message": None,
+                    "metadata": {"event_ref": reference, "skipped": True},
+                    "processed_at": datetime.now(timezone.utc).isoformat()
+                }
+        else:
+            payload = webhook_codec.decode_payload(webhook_data)
+        
+        if entity_key(payload):
+            result = worker_runtime.run(dispatch_in_order(payload, self.max_retries))
+            if not result.success:
+                logger.error(f"Event {payload.event_id} failed after {self.max_retries} retries in place: {result.error_message}")
+                return dead_letter_webhook_event(reference, result.error_message or "Webhook handler failed")
+        else:
+            result = worker_runtime.run(dispatch_event(payload))
+            if not result.success:
+                raise WebhookProcessingError(result)
         
         return {
-            "success": result.success,
-            "error_message": result.error_message,
-            "metadata": result.metadata,
+            "success": True,
+            "error_message": None,
+            "metadata": {**result.metadata, "event_id": payload.event_id},
             "processed_at": datetime.now(timezone.utc).isoformat()
         }
         
@@ -63,81 +178,153 @@ def process_webhook_event(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
         # exponential backoff this thing fit no work o
         if self.request.retries < self.max_retries:
             retry_countdown = 2 ** self.request.retries
+            if isinstance(exc, WebhookProcessingError) and exc.result.retry_after_seconds:
+                retry_countdown = exc.result.retry_after_seconds
             raise self.retry(exc=exc, countdown=retry_countdown)
-        
-        return {
-            "success": False,
-            "error_message": str(exc),
-            "metadata": {"max_retries_reached": True},
-            "processed_at": datetime.now(timezone.utc).isoformat()
-        }
+
+        return dead_letter_webhook_event(reference, str(exc))
+
+def serialize_webhook_payload(payload: WebhookPayload) -> str:
+    """
+    Celery-safe form of a webhook payload. The struct is encoded as-is and
+    decoded straight back into the same typed struct on the worker; the
+    older dict form is still accepted.
+    """
+    return webhook_codec.encode_payload(payload).decode()
+
+def enqueue_webhook_event(payload: WebhookPayload):
+    """
+    Queue an event for a Celery worker.
+    The payload is stored as a pending webhook_events row and only the row id
+    goes through the broker (claim check), so broker traffic doesn't grow
+    with the payload. Returns None if the event was already processed.
+
+    The queue follows the event type (payment and subscription events go to
+    webhooks.critical) and the priority follows the tenant's plan. Events with
+    an entity key go to that entity's partition of the queue
+    (e.g. webhooks.critical.partition.N); run one single-process worker per
+    partition queue to keep them in order.
+    """
+    event_ref = processing_pipeline.record_pending_events([payload])[0]
+    if event_ref is None:
+        logger.info(f"Event {payload.event_id} already processed, not queueing")
+        return None
+    return process_webhook_event.apply_async(args=[event_ref], **task_router.webhook_route(payload))
 
 @celery_app.task(bind=True, name="process_bulk_webhook_events")
-def process_bulk_webhook_events(self, webhook_events: list) -> Dict[str, Any]:
-    """Process multiple webhook events in batch"""
-    
-    results = []
-    successful = 0
-    failed = 0
+def process_bulk_webhook_events(self, webhook_events: list, concurrency: int = None) -> Dict[str, Any]:
+    """
+    Process multiple webhook events in one pass: load them all, then run
+    them through the pipeline together on the worker's event loop with
+    grouped dedup and status writes.
+    webhook_events holds webhook_events ids (one query loads them all) or
+    encoded payloads. The stored result only lists the events that failed,
+    so its size doesn't grow with the batch.
+    """
     
-    for webhook_data in webhook_events:
+    results: List[Optional[Dict[str, Any]]] = [None] * len(webhook_events)
+    indexes = []
+    payloads = []
+
+    references = [webhook_data for webhook_data in webhook_events if is_event_reference(webhook_data)]
+    loaded: Dict[str, WebhookPayload] = {}
+    if references:
         try:
-            result = process_webhook_event.apply(args=[webhook_data])
-            results.append(result.get())
-            
-            if result.get().get("success"):
-                successful += 1
+            loaded = worker_runtime.run(load_webhook_events(references))
+        except Exception as e:
+            logger.error(f"Error loading {len(references)} webhook events: {e}")
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+
+    for i, webhook_data in enumerate(webhook_events):
+        if is_event_reference(webhook_data):
+            if webhook_data in loaded:
+                payloads.append(loaded[webhook_data])
+                indexes.append(i)
             else:
-                failed += 1
-                
+                results[i] = {"success": True, "error_message": None, "metadata": {"event_ref": webhook_data, "skipped": True}}
+            continue
+        try:
+            payloads.append(webhook_codec.decode_payload(webhook_data))
+            indexes.append(i)
         except Exception as e:
-            logger.error(f"Error in bulk processing: {e}")
-            failed += 1
-            results.append({
+            logger.error(f"Undecodable event in bulk processing: {e}")
+            results[i] = {
                 "success": False,
                 "error_message": str(e),
                 "metadata": {"bulk_processing_error": True}
-            })
-    
+            }
+
+    if payloads:
+        try:
+            outcomes = worker_runtime.run(process_event_bulk(payloads, concurrency))
+        except Exception as e:
+            logger.error(f"Error in bulk processing: {e}")
+            outcomes = [ProcessingResult(success=False, error_message=str(e)) for _ in payloads]
+
+        for i, payload, outcome in zip(indexes, payloads, outcomes):
+            results[i] = {
+                "success": outcome.success,
+                "error_message": outcome.error_message,
+                "metadata": {**outcome.metadata, "event_id": payload.event_id}
+            }
+
+    successful = sum(1 for result in results if result["success"])
     return {
         "total_processed": len(webhook_events),
         "successful": successful,
-        "failed": failed,
-        "results": results,
+        "failed": len(webhook_events) - successful,
+        "results": [{"index": i, **result} for i, result in enumerate(results) if not result["success"]],
+        "processed_at": datetime.now(timezone.utc).isoformat()
+    }
+
+@celery_app.task(name="summarize_bulk_webhook_results")
+def summarize_bulk_webhook_results(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chord callback: merge the per-chunk summaries of a chunked bulk job"""
+    return {
+        "total_processed": sum(chunk["total_processed"] for chunk in chunk_results),
+        "successful": sum(chunk["successful"] for chunk in chunk_results),
+        "failed": sum(chunk["failed"] for chunk in chunk_results),
+        "chunks": len(chunk_results),
+        "results": [result for chunk in chunk_results for result in chunk["results"]],
         "processed_at": datetime.now(timezone.utc).isoformat()
     }
 
+def enqueue_bulk_webhook_events(payloads: List[WebhookPayload], chunk_size: int = None):
+    """
+    Spread a large bulk job across workers: the events are stored as pending
+    webhook_events rows, then one process_bulk_webhook_events task per chunk
+    of row ids runs them, with the summaries merged by a chord callback.
+    Events that were already processed are left out; returns None if that
+    leaves nothing to run.
+    """
+    chunk_size = chunk_size or settings.WEBHOOK_BULK_CHUNK_SIZE
+    event_refs = [ref for ref in processing_pipeline.record_pending_events(payloads) if ref]
+    if not event_refs:
+        logger.info(f"All {len(payloads)} bulk events already processed, not queueing")
+        return None
+    chunks = [event_refs[i:i + chunk_size] for i in range(0, len(event_refs), chunk_size)]
+    return chord(
+        process_bulk_webhook_events.s(chunk) for chunk in chunks
+    )(summarize_bulk_webhook_results.s())
+
 @celery_app.task(name="cleanup_processed_events")
 def cleanup_processed_events(days_to_keep: int = 30) -> Dict[str, Any]:
-    """Clean up old processed events from database"""
+    """
+    Clean up old processed events by dropping processed_events partitions
+    older than days_to_keep, instead of deleting rows one by one
+    """
     
     try:
-
-        
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def cleanup():
-            async with get_db() as session:
-                result = await session.execute(
-                    text("DELETE FROM processed_events WHERE processed_at < :cutoff_date"),
-                    {"cutoff_date": cutoff_date}
-                )
-                await session.commit()
-                return result.rowcount
-        
-        try:
-            deleted_count = loop.run_until_complete(cleanup())
-        finally:
-            loop.close()
+        dropped = table_partitions.drop_expired_partitions("processed_events", retention_days=days_to_keep)
+        dropped_partitions = dropped.get("processed_events", [])
         
-        logger.info(f"Cleaned up {deleted_count} old processed events")
+        logger.info(f"Dropped {len(dropped_partitions)} old processed event partitions")
         
         return {
             "success": True,
-            "deleted_count": deleted_count,
+            "dropped_partitions": dropped_partitions,
             "cutoff_date": cutoff_date.isoformat()
         }
         
@@ -151,4 +338,4 @@ def cleanup_processed_events(days_to_keep: int = 30) -> Dict[str, Any]:
 @celery_app.task(name="periodic_cleanup")
 def periodic_cleanup():
     """Periodic cleanup task"""
-    return cleanup_processed_events.delay(days_to_keep=30)
\ No newline at end of file
+    return cleanup_processed_events.delay(days_to_keep=settings.PARTITION_RETENTION_DAYS.get("processed_events", 30))
\ No newline at end of file
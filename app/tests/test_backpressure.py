@@ -0,0 +1,110 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1 import webhooks
+from app.core import backpressure
+from app.core.backpressure import InFlightBudget, LoadShedError
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(backpressure, "time", clock)
+
+
+def fill(budget: InFlightBudget, source: str, count: int):
+    for _ in range(count):
+        budget.acquire(source)
+
+
+class TestInFlightBudget:
+    """Admitting or shedding webhook work"""
+
+    def test_process_budget_spent_is_503(self):
+        budget = InFlightBudget(max_in_flight=2, max_retry_after_seconds=30)
+        fill(budget, "payment_service", 1)
+        fill(budget, "user_management", 1)
+
+        with pytest.raises(LoadShedError) as shed:
+            budget.acquire("communication_service")
+
+        assert shed.value.status_code == 503
+        # nothing has completed yet, so the longest wait is asked for
+        assert shed.value.retry_after_seconds == 30
+        assert budget.get_stats()["shed"] == {"communication_service": 1}
+
+    def test_source_over_its_share_is_429(self):
+        budget = InFlightBudget(max_in_flight=10, per_source_limits={"communication_service": 2})
+        fill(budget, "communication_service", 2)
+
+        with pytest.raises(LoadShedError) as shed:
+            budget.acquire("communication_service")
+
+        assert shed.value.status_code == 429
+        # other sources are still admitted
+        budget.acquire("payment_service")
+        assert budget.get_stats()["by_source"] == {"communication_service": 2, "payment_service": 1}
+
+    def test_release_frees_a_slot(self):
+        budget = InFlightBudget(max_in_flight=1)
+        budget.acquire("payment_service")
+
+        budget.release("payment_service")
+
+        budget.acquire("payment_service")
+        assert budget.get_stats()["in_flight"] == 1
+
+    def test_retry_after_follows_the_completion_rate(self, clock):
+        budget = InFlightBudget(max_in_flight=20, max_retry_after_seconds=30)
+        fill(budget, "payment_service", 20)
+        # eleven completions over two seconds, 20 in flight: ceil(20 / 5.5)
+        for _ in range(10):
+            budget.release("payment_service")
+        clock.advance(2)
+        budget.acquire("payment_service")
+        budget.release("payment_service")
+        fill(budget, "payment_service", 10)
+
+        with pytest.raises(LoadShedError) as shed:
+            budget.acquire("payment_service")
+
+        assert shed.value.retry_after_seconds == 4
+
+
+class TestWebhookEndpointShedding:
+    """The inline webhook endpoint answers for the budget"""
+
+    @pytest.fixture
+    def budget(self, monkeypatch) -> InFlightBudget:
+        budget = InFlightBudget(
+            max_in_flight=2,
+            per_source_limits={"communication_service": 1},
+            max_retry_after_seconds=15
+        )
+        monkeypatch.setattr(webhooks, "webhook_budget", budget)
+        monkeypatch.setattr(webhooks.settings, "WEBHOOK_INGEST_MODE", "inline")
+        return budget
+
+    async def post(self, service_name: str) -> httpx.Response:
+        app = FastAPI()
+        app.include_router(webhooks.router)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(f"/{service_name}", content=b"{}")
+
+    async def test_over_capacity_is_503_with_retry_after(self, budget):
+        fill(budget, "payment_service", 2)
+
+        response = await self.post("user_management")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "15"
+        assert budget.get_stats()["in_flight"] == 2
+
+    async def test_source_over_its_share_is_429_with_retry_after(self, budget):
+        fill(budget, "communication_service", 1)
+
+        response = await self.post("communication_service")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "15"
+        assert budget.get_stats()["shed"] == {"communication_service": 1}
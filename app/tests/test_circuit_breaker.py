@@ -0,0 +1,258 @@
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerError,
+    CircuitState,
+    get_circuit_breaker,
+)
+from app.core.retry_util import ExternalServiceError, RetryPolicy
+from app.integrations.external_client import ApiClientConfig, ExternalApiClient, endpoint_pattern
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    breakers = circuit_breaker.OrderedDict()
+    monkeypatch.setattr(circuit_breaker, "_circuit_breakers", breakers)
+    return breakers
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(circuit_breaker, "async_redis_client", client)
+    return client
+
+
+def breaker(**config) -> CircuitBreaker:
+    return CircuitBreaker(CircuitBreakerConfig(
+        name="test",
+        failure_threshold=3,
+        failure_rate_threshold=0.5,
+        recovery_timeout=30,
+        **config
+    ))
+
+
+def fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        breaker.record_failure(breaker.acquire())
+
+
+def succeed(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        breaker.record_success(breaker.acquire())
+
+
+class TestCircuitBreaker:
+    """Opening, probing and closing"""
+
+    def test_opens_at_threshold_and_rate(self):
+        cb = breaker()
+        fail(cb, 2)
+        assert cb.state == CircuitState.CLOSED
+
+        fail(cb)
+
+        assert cb.state == CircuitState.OPEN
+        with pytest.raises(CircuitBreakerError):
+            cb.acquire()
+
+    def test_stays_closed_below_the_failure_rate(self):
+        cb = breaker()
+        succeed(cb, 10)
+
+        fail(cb, 5)
+
+        assert cb.state == CircuitState.CLOSED
+
+    def test_failures_outside_the_window_are_forgotten(self, clock):
+        cb = breaker(window_seconds=60)
+        fail(cb, 2)
+        clock.advance(61)
+
+        fail(cb)
+
+        assert cb.state == CircuitState.CLOSED
+        assert cb.snapshot()["window_failures"] == 1
+
+    def test_half_open_after_recovery_timeout(self, clock):
+        cb = breaker()
+        fail(cb, 3)
+        clock.advance(31)
+
+        assert cb.acquire() is True
+        assert cb.state == CircuitState.HALF_OPEN
+        # only half_open_max_calls probes at a time
+        with pytest.raises(CircuitBreakerError):
+            cb.acquire()
+
+    def test_probe_success_closes(self, clock):
+        cb = breaker()
+        fail(cb, 3)
+        clock.advance(31)
+
+        cb.record_success(cb.acquire())
+
+        assert cb.state == CircuitState.CLOSED
+        assert cb.snapshot()["window_calls"] == 0
+
+    def test_probe_failure_reopens(self, clock):
+        cb = breaker()
+        fail(cb, 3)
+        clock.advance(31)
+
+        cb.record_failure(cb.acquire())
+
+        assert cb.state == CircuitState.OPEN
+        clock.advance(29)
+        with pytest.raises(CircuitBreakerError):
+            cb.acquire()
+
+    def test_released_probe_frees_its_slot(self, clock):
+        cb = breaker()
+        fail(cb, 3)
+        clock.advance(31)
+
+        cb.release(cb.acquire())
+
+        assert cb.state == CircuitState.HALF_OPEN
+        assert cb.acquire() is True
+
+    async def test_context_manager_counts_expected_exceptions_only(self):
+        cb = breaker(expected_exception=ExternalServiceError)
+
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                async with cb:
+                    raise ValueError("caller bug")
+        assert cb.state == CircuitState.CLOSED
+
+        for _ in range(3):
+            with pytest.raises(ExternalServiceError):
+                async with cb:
+                    raise ExternalServiceError("503")
+        assert cb.state == CircuitState.OPEN
+
+    def test_health_check_opens_and_holds_the_breaker(self, clock):
+        healthy = False
+        cb = breaker(available=lambda: healthy)
+
+        with pytest.raises(CircuitBreakerError):
+            cb.acquire()
+        assert cb.state == CircuitState.OPEN
+
+        # no probes while the health check still reports the service down
+        clock.advance(31)
+        with pytest.raises(CircuitBreakerError):
+            cb.acquire()
+
+        healthy = True
+        cb.record_success(cb.acquire())
+        assert cb.state == CircuitState.CLOSED
+
+    async def test_open_state_is_shared_through_redis(self, redis, clock):
+        here = breaker(shared=True)
+        there = breaker(shared=True)
+
+        fail(here, 3)
+        await asyncio.sleep(0)
+        assert await redis.get("circuit:test")
+
+        there.acquire()
+        await there._sync
+        assert there.state == CircuitState.OPEN
+
+        clock.advance(31)
+        here.record_success(here.acquire())
+        await asyncio.sleep(0)
+        assert await redis.get("circuit:test") is None
+
+
+class TestRegistry:
+    """Breakers by name"""
+
+    def test_same_name_same_breaker(self):
+        assert get_circuit_breaker("a") is get_circuit_breaker("a")
+
+    def test_registry_is_bounded_but_keeps_open_breakers(self, registry, monkeypatch):
+        monkeypatch.setattr(circuit_breaker.settings, "CIRCUIT_BREAKER_MAX_BREAKERS", 3)
+        fail(get_circuit_breaker("open", CircuitBreakerConfig(name="open", failure_threshold=1)))
+        get_circuit_breaker("b")
+        get_circuit_breaker("c")
+        get_circuit_breaker("b")
+
+        get_circuit_breaker("d")
+
+        assert list(registry) == ["open", "b", "d"]
+
+
+class TestClientBreakers:
+    """Breakers of the external API clients, one per service route"""
+
+    @pytest.mark.parametrize("endpoint, pattern", [
+        ("/users", "/users"),
+        ("/payments/process", "/payments/process"),
+        ("/users/42", "/users/{id}"),
+        ("/users/3fa85f64-5717-4562-b3fc-2c963f66afa6/roles", "/users/{id}/roles"),
+        ("/subscriptions/sub_1234abcd", "/subscriptions/{id}"),
+        ("/customers/cus_NffrFeUfNV2Hib?expand=plan", "/customers/{id}"),
+        ("/v2/users/7", "/v2/users/{id}"),
+    ])
+    def test_endpoint_pattern(self, endpoint, pattern):
+        assert endpoint_pattern(endpoint) == pattern
+
+    def client(self, handler) -> ExternalApiClient:
+        client = ExternalApiClient(
+            ApiClientConfig(
+                base_url="http://billing.test",
+                response_cache=False,
+                retry_policy=RetryPolicy(max_attempts=1),
+                circuit_breaker_config=CircuitBreakerConfig(failure_threshold=2)
+            ),
+            service_name="billing"
+        )
+        client.client = httpx.AsyncClient(base_url="http://billing.test", transport=httpx.MockTransport(handler))
+        return client
+
+    async def test_one_breaker_per_route(self, registry):
+        client = self.client(lambda request: httpx.Response(200, json={}))
+
+        for customer in ("cus_NffrFeUfNV2Hib", "cus_Q1w2E3r4T5y6U7"):
+            await client.get(f"/customers/{customer}")
+        await client.get("/customers/abc", route="/customers/{id}")
+        await client.post("/customers")
+
+        assert list(registry) == ["billing:GET /customers/{id}", "billing:POST /customers"]
+
+    async def test_server_errors_open_the_route_breaker(self):
+        client = self.client(lambda request: httpx.Response(503))
+
+        for _ in range(2):
+            with pytest.raises(ExternalServiceError):
+                await client.get("/invoices/1")
+
+        with pytest.raises(CircuitBreakerError):
+            await client.get("/invoices/2")
+        assert client.circuit_breaker("GET", "/invoices/1").state == CircuitState.OPEN
+        assert client.circuit_breaker("GET", "/plans").state == CircuitState.CLOSED
+
+    async def test_client_errors_do_not_count(self):
+        client = self.client(lambda request: httpx.Response(404))
+
+        for _ in range(3):
+            with pytest.raises(ExternalServiceError):
+                await client.get("/invoices/1")
+
+        assert client.circuit_breaker("GET", "/invoices/1").state == CircuitState.CLOSED
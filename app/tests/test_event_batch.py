@@ -0,0 +1,240 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+
+from app.core import event_pipeline
+from app.core.event_batcher import EventBatcher
+from app.core.event_pipeline import EventPipeline, emit_event, event_emitter
+from app.decorators.event_handler import event_handler, process_event_batch
+from app.schemas.webhooks import PaymentEventData, ProcessingResult, WebhookPayload, WebhookSource
+
+
+def payment(event_id: str) -> WebhookPayload:
+    return WebhookPayload(
+        source=WebhookSource.PAYMENT_SERVICE,
+        event_type="payment.success",
+        event_id=event_id,
+        timestamp=datetime(2025, 7, 1, tzinfo=timezone.utc),
+        data=PaymentEventData(amount=10.0),
+        tenant_id="tenant-1"
+    )
+
+
+class FakePipeline:
+    """Claims every event the first time it is seen in a batch"""
+
+    def __init__(self):
+        self.marked = None
+        self.handlers = []
+
+    async def claim_events(self, payloads: List[WebhookPayload], handler: str) -> List[bool]:
+        self.handlers.append(handler)
+        seen = set()
+        claimed = []
+        for payload in payloads:
+            claimed.append(payload.event_id not in seen)
+            seen.add(payload.event_id)
+        return claimed
+
+    async def apply_batch_middleware(self, payloads):
+        return payloads
+
+    async def run_deferred_batch_middleware(self, payloads):
+        pass
+
+    async def mark_events_processed(self, payloads, results, handler):
+        self.marked = list(zip(payloads, results))
+
+
+class TestProcessEventBatch:
+    """Batches through the pipeline, one result per event"""
+
+    async def test_single_result_is_copied_per_event(self):
+        async def handler(payloads):
+            return ProcessingResult(success=True, metadata={"handled": True})
+
+        results = await process_event_batch(FakePipeline(), handler, [payment("evt_1"), payment("evt_2")])
+
+        assert results[0] == results[1]
+        results[0].metadata["note"] = "only the first"
+        assert results[0] is not results[1]
+        assert "note" not in results[1].metadata
+
+    async def test_handler_failure_gives_each_event_its_own_result(self):
+        async def handler(payloads):
+            raise RuntimeError("handler crashed")
+
+        results = await process_event_batch(FakePipeline(), handler, [payment("evt_1"), payment("evt_2")])
+
+        assert [result.success for result in results] == [False, False]
+        assert results[0] is not results[1]
+
+    async def test_result_count_must_match(self):
+        async def handler(payloads):
+            return [ProcessingResult(success=True)]
+
+        results = await process_event_batch(FakePipeline(), handler, [payment("evt_1"), payment("evt_2")])
+
+        assert not any(result.success for result in results)
+
+    async def test_duplicates_within_the_batch_are_skipped(self):
+        calls = []
+
+        async def handler(payloads):
+            calls.append([p.event_id for p in payloads])
+            return [ProcessingResult(success=True) for _ in payloads]
+
+        pipeline = FakePipeline()
+        results = await process_event_batch(pipeline, handler, [payment("evt_1"), payment("evt_1")])
+
+        assert calls == [["evt_1"]]
+        assert results[0].metadata == {}
+        assert results[1].metadata == {"skipped": "duplicate_event"}
+        assert pipeline.handlers == [f"{__name__}.{handler.__qualname__}"]
+
+
+class ClaimTable:
+    """webhook_idempotency_keys for EventPipeline._claim: each key can be claimed once"""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __call__(self, claim_keys) -> set:
+        claimed = set(claim_keys) - self.keys
+        self.keys |= claimed
+        return claimed
+
+
+class TestClaimsPerHandler:
+    """Every handler of an event gets its own claim"""
+
+    @pytest.fixture
+    def pipeline(self, monkeypatch) -> EventPipeline:
+        pipeline = EventPipeline(event_emitter)
+        monkeypatch.setattr(pipeline, "_claim", ClaimTable())
+
+        async def mark_event_processed(payload, result, handler):
+            pass
+
+        monkeypatch.setattr(pipeline, "mark_event_processed", mark_event_processed)
+        return pipeline
+
+    @pytest.fixture
+    def event_type(self):
+        event_type = "test.claims_per_handler"
+        yield event_type
+        for listener in event_emitter.listeners(event_type):
+            event_emitter.off(event_type, listener)
+
+    def test_claim_keys_differ_per_handler(self):
+        pipeline = EventPipeline(event_emitter)
+
+        assert pipeline.claim_key(payment("evt_1"), "a.handler") != pipeline.claim_key(payment("evt_1"), "b.handler")
+        assert pipeline.claim_key(payment("evt_1"), "a.handler") == pipeline.claim_key(payment("evt_1"), "a.handler")
+
+    async def test_both_listeners_run_once(self, pipeline, event_type):
+        calls = []
+
+        @event_handler(event_type, pipeline=pipeline)
+        async def send_receipt(payload):
+            calls.append("receipt")
+            return ProcessingResult(success=True)
+
+        @event_handler(event_type, pipeline=pipeline)
+        async def update_ledger(payload):
+            calls.append("ledger")
+            return ProcessingResult(success=True)
+
+        event = payment("evt_1")
+        event.event_type = event_type
+        first = await emit_event(event)
+        again = await emit_event(event)
+
+        assert sorted(calls) == ["ledger", "receipt"]
+        assert first.success and "skipped" not in first.metadata
+        assert again.metadata == {"skipped": "duplicate_event"}
+
+
+class TestEventBatcher:
+    """Micro-batching of single events"""
+
+    async def test_lone_event_is_not_held_back(self):
+        batches = []
+
+        async def processor(payloads):
+            batches.append([p.event_id for p in payloads])
+            return [ProcessingResult(success=True) for _ in payloads]
+
+        batcher = EventBatcher(processor, max_batch_size=10, max_wait_ms=60_000)
+
+        result = await asyncio.wait_for(batcher.submit(payment("evt_1")), timeout=1)
+
+        assert result.success
+        assert batches == [["evt_1"]]
+
+    async def test_events_arriving_during_a_flush_are_batched(self):
+        batches = []
+        release = asyncio.Event()
+
+        async def processor(payloads):
+            batches.append([p.event_id for p in payloads])
+            await release.wait()
+            return [ProcessingResult(success=True) for _ in payloads]
+
+        batcher = EventBatcher(processor, max_batch_size=3, max_wait_ms=60_000)
+        submitted = [asyncio.create_task(batcher.submit(payment(f"evt_{i}"))) for i in range(1, 5)]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*submitted)
+
+        assert batches == [["evt_1"], ["evt_2", "evt_3", "evt_4"]]
+
+
+class TestMarkEventsProcessed:
+    """Status writes for a processed batch"""
+
+    async def test_duplicates_do_not_overwrite_the_real_result(self, monkeypatch):
+        added = []
+        finished = {}
+
+        class Query:
+            def filter(self, *args):
+                return self
+
+            def all(self):
+                return []
+
+        class Session:
+            def query(self, *args):
+                return Query()
+
+            def add_all(self, rows):
+                added.extend(rows)
+
+        @contextmanager
+        def get_db_session():
+            yield Session()
+
+        async def remember(events):
+            pass
+
+        pipeline = EventPipeline(event_emitter)
+        monkeypatch.setattr(event_pipeline, "get_db_session", get_db_session)
+        monkeypatch.setattr(pipeline, "_finish_claims", lambda db, outcomes: finished.update(outcomes))
+        monkeypatch.setattr(pipeline, "_remember_events", remember)
+
+        await pipeline.mark_events_processed(
+            [payment("evt_1"), payment("evt_1")],
+            [
+                ProcessingResult(success=False, error_message="declined"),
+                ProcessingResult(success=True, metadata={"skipped": "duplicate_event"}),
+            ],
+            "app.handlers.record_payment"
+        )
+
+        assert len(added) == 1
+        assert added[0].error_message == "declined"
+        assert list(finished.values()) == [False]
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.partitioned_executor import PartitionedExecutor
+from app.schemas.webhooks import ProcessingResult, UserEventData, WebhookPayload, WebhookSource
+
+
+def user_event(event_id: str, user_id: str = "usr_1") -> WebhookPayload:
+    return WebhookPayload(
+        source=WebhookSource.USER_MANAGEMENT,
+        event_type="user.updated",
+        event_id=event_id,
+        timestamp=datetime(2025, 7, 1, tzinfo=timezone.utc),
+        data=UserEventData(id=user_id),
+        tenant_id="tenant-1"
+    )
+
+
+class TestPartitionedExecutor:
+    """Ordered dispatch per entity"""
+
+    async def test_same_entity_runs_in_order(self):
+        executor = PartitionedExecutor(partitions=4)
+        order = []
+
+        async def dispatch(payload):
+            await asyncio.sleep(0.01 if payload.event_id == "evt_1" else 0)
+            order.append(payload.event_id)
+            return ProcessingResult(success=True)
+
+        await asyncio.gather(*(executor.submit(user_event(f"evt_{i}"), dispatch) for i in range(1, 4)))
+
+        assert order == ["evt_1", "evt_2", "evt_3"]
+        await executor.shutdown()
+
+    async def test_worker_survives_a_cancelled_or_crashing_dispatch(self):
+        executor = PartitionedExecutor(partitions=1)
+
+        async def dispatch(payload):
+            if payload.event_id == "evt_1":
+                raise asyncio.CancelledError()
+            if payload.event_id == "evt_2":
+                raise KeyError("boom")
+            return ProcessingResult(success=True)
+
+        cancelled = executor.submit(user_event("evt_1"), dispatch)
+        crashed = executor.submit(user_event("evt_2"), dispatch)
+        processed = executor.submit(user_event("evt_3"), dispatch)
+
+        assert (await processed).success
+        assert cancelled.cancelled()
+        with pytest.raises(KeyError):
+            await crashed
+        await executor.shutdown()
+
+    async def test_shutdown_cancels_queued_events(self):
+        executor = PartitionedExecutor(partitions=1)
+        started = asyncio.Event()
+
+        async def dispatch(payload):
+            started.set()
+            await asyncio.sleep(10)
+
+        running = executor.submit(user_event("evt_1"), dispatch)
+        queued = executor.submit(user_event("evt_2"), dispatch)
+        await started.wait()
+
+        await executor.shutdown()
+
+        assert running.cancelled()
+        assert queued.cancelled()
+        assert executor.get_stats()["queued"] == 0
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from app.core import rate_limiter
+from app.core.rate_limiter import RedisTokenBucket, TokenBucket
+from app.core.retry_util import RateLimitError
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+
+
+class TestTokenBucket:
+    """Token bucket rate limiting"""
+
+    def test_burst_defaults_to_rate(self):
+        assert TokenBucket(5).burst == 5
+        assert TokenBucket(0.2).burst == 1
+        assert TokenBucket(5, burst=20).burst == 20
+
+    def test_rate_must_be_positive(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+    def test_burst_then_rate(self, clock):
+        bucket = TokenBucket(rate=10, burst=3)
+
+        assert [bucket._reserve() for _ in range(3)] == [0, 0, 0]
+        # each further caller waits one more refill interval
+        assert bucket._reserve() == pytest.approx(0.1)
+        assert bucket._reserve() == pytest.approx(0.2)
+
+        clock.advance(1)
+        assert bucket.tokens == pytest.approx(3)
+
+    def test_refill_is_capped_at_burst(self, clock):
+        bucket = TokenBucket(rate=10, burst=3)
+        bucket._reserve()
+
+        clock.advance(60)
+
+        assert bucket.tokens == 3
+
+    def test_max_wait(self):
+        bucket = TokenBucket(rate=1, burst=1, max_wait=0.5)
+        bucket._reserve()
+
+        with pytest.raises(RateLimitError) as error:
+            bucket._reserve()
+        # refused before sending, so the retry policy leaves it alone
+        assert error.value.status_code is None
+        # a refused caller doesn't take a token
+        assert bucket.tokens == 0
+
+    async def test_acquire_within_burst_does_not_wait(self):
+        bucket = TokenBucket(rate=1, burst=2)
+
+        await asyncio.wait_for(asyncio.gather(bucket.acquire(), bucket.acquire()), 0.1)
+
+        assert bucket.tokens == 0
+
+    async def test_cancelled_waiter_returns_its_token(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        assert bucket.tokens == -1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert bucket.tokens == 0
+
+
+class TestRedisTokenBucket:
+    """Shared rate limiting through Redis"""
+
+    async def test_waits_as_told_by_redis(self, monkeypatch):
+        bucket = RedisTokenBucket("test-key", rate=10)
+        slept = []
+
+        async def script(keys, args):
+            assert keys == ["ratelimit:test-key"]
+            assert args == [10, 10, -1]
+            return [1, "0.25"]
+
+        async def sleep(delay):
+            slept.append(delay)
+
+        monkeypatch.setattr(bucket, "_script", script)
+        monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+
+        await bucket.acquire()
+
+        assert slept == [0.25]
+
+    async def test_refused_reservation(self, monkeypatch):
+        bucket = RedisTokenBucket("test-key", rate=10, max_wait=0.1)
+
+        async def script(keys, args):
+            return [0, "2.5"]
+
+        monkeypatch.setattr(bucket, "_script", script)
+
+        with pytest.raises(RateLimitError):
+            await bucket.acquire()
+
+    async def test_falls_back_to_local_limiting(self, monkeypatch):
+        bucket = RedisTokenBucket("test-key", rate=1, burst=1, max_wait=0.1)
+
+        async def script(keys, args):
+            raise ConnectionError("Redis is down")
+
+        monkeypatch.setattr(bucket, "_script", script)
+
+        await bucket.acquire()
+        with pytest.raises(RateLimitError):
+            await bucket.acquire()
+
+    async def test_cancelled_waiter_returns_its_token(self, monkeypatch):
+        bucket = RedisTokenBucket("test-key", rate=1)
+        refunds = []
+
+        async def script(keys, args):
+            return [1, "10"]
+
+        async def refund_script(keys, args):
+            refunds.append((keys, args))
+            return 1
+
+        monkeypatch.setattr(bucket, "_script", script)
+        monkeypatch.setattr(bucket, "_refund_script", refund_script)
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert refunds == [(["ratelimit:test-key"], [1, 1])]
@@ -0,0 +1,187 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from app.integrations import response_cache
+from app.integrations.response_cache import ResponseCache
+
+KEY = ResponseCache.key("/users/1")
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(response_cache, "time", clock)
+
+
+class Service:
+    """Answers conditional GETs like an external service with ETags"""
+
+    def __init__(self, body: bytes = b'{"id": 1}', etag: Optional[str] = '"v1"', cacheable: bool = True):
+        self.body = body
+        self.etag = etag
+        self.cacheable = cacheable
+        self.requests: List[Optional[str]] = []
+        self.gate: Optional[asyncio.Event] = None
+
+    async def fetch(self, etag: Optional[str]):
+        self.requests.append(etag)
+        if self.gate is not None:
+            await self.gate.wait()
+        if etag is not None and etag == self.etag:
+            return 304, b"", self.etag, self.cacheable
+        return 200, self.body, self.etag, self.cacheable
+
+
+class TestResponseCache:
+    """Caching, revalidation and coalescing of GETs"""
+
+    def test_key_ignores_param_order_and_header_case(self):
+        assert ResponseCache.key("/users", {"a": 1, "b": 2}, {"X-Tenant": "t"}) == \
+            ResponseCache.key("/users", {"b": "2", "a": "1"}, {"x-tenant": "t"})
+
+    def test_ttl_by_endpoint_pattern(self):
+        cache = ResponseCache(ttls={"/users/*": 30, "/users": 5}, default_ttl=1)
+
+        assert cache.ttl_for("/users/1") == 30
+        assert cache.ttl_for("/users") == 5
+        assert cache.ttl_for("/payments/1") == 1
+
+    async def test_fresh_entry_is_served_without_a_request(self, clock):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+
+        assert await cache.get(KEY, service.fetch) == b'{"id": 1}'
+        clock.advance(29)
+        assert await cache.get(KEY, service.fetch) == b'{"id": 1}'
+
+        assert service.requests == [None]
+        assert cache.stats() == {"entries": 1, "hits": 1, "revalidated": 0, "misses": 1, "coalesced": 0}
+
+    async def test_stale_entry_is_revalidated_by_etag(self, clock):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        await cache.get(KEY, service.fetch)
+
+        clock.advance(31)
+        assert await cache.get(KEY, service.fetch) == b'{"id": 1}'
+        assert service.requests == [None, '"v1"']
+        assert cache.revalidated == 1
+
+        # a 304 makes the entry fresh again
+        clock.advance(29)
+        await cache.get(KEY, service.fetch)
+        assert len(service.requests) == 2
+
+    async def test_changed_resource_replaces_the_entry(self, clock):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        await cache.get(KEY, service.fetch)
+
+        service.body, service.etag = b'{"id": 1, "name": "new"}', '"v2"'
+        clock.advance(31)
+
+        assert await cache.get(KEY, service.fetch) == b'{"id": 1, "name": "new"}'
+        clock.advance(1)
+        assert await cache.get(KEY, service.fetch) == b'{"id": 1, "name": "new"}'
+        assert len(service.requests) == 2
+
+    async def test_etag_alone_keeps_an_entry_for_revalidation(self):
+        cache = ResponseCache()
+        service = Service()
+
+        await cache.get(KEY, service.fetch)
+        await cache.get(KEY, service.fetch)
+
+        assert service.requests == [None, '"v1"']
+
+    async def test_uncacheable_responses_are_not_stored(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        no_store = Service(cacheable=False)
+        no_etag = Service(etag=None)
+
+        await cache.get(KEY, no_store.fetch)
+        await cache.get(KEY, no_store.fetch)
+        await ResponseCache().get(KEY, no_etag.fetch)
+
+        assert no_store.requests == [None, None]
+        assert cache.stats()["entries"] == 0
+
+    async def test_concurrent_gets_share_one_request(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        service.gate = asyncio.Event()
+
+        waiters = [asyncio.create_task(cache.get(KEY, service.fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        service.gate.set()
+
+        assert await asyncio.gather(*waiters) == [b'{"id": 1}'] * 5
+        assert service.requests == [None]
+        assert cache.coalesced == 4
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        service.gate = asyncio.Event()
+
+        first = asyncio.create_task(cache.get(KEY, service.fetch))
+        second = asyncio.create_task(cache.get(KEY, service.fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        service.gate.set()
+
+        assert await second == b'{"id": 1}'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_failure_reaches_every_waiter_and_is_not_cached(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+
+        async def failing(etag):
+            await asyncio.sleep(0)
+            raise ConnectionError("service down")
+
+        results = await asyncio.gather(cache.get(KEY, failing), cache.get(KEY, failing), return_exceptions=True)
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert await cache.get(KEY, Service().fetch) == b'{"id": 1}'
+
+    async def test_invalidate_drops_every_variant(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        await cache.get(KEY, service.fetch)
+        await cache.get(ResponseCache.key("/users/1", {"expand": "org"}), service.fetch)
+        await cache.get(ResponseCache.key("/users/2"), service.fetch)
+
+        cache.invalidate("/users/1")
+
+        assert cache.stats()["entries"] == 1
+
+    async def test_get_in_flight_during_a_write_is_not_stored(self):
+        cache = ResponseCache(ttls={"/users/*": 30})
+        service = Service()
+        service.gate = asyncio.Event()
+
+        before_write = asyncio.create_task(cache.get(KEY, service.fetch))
+        await asyncio.sleep(0)
+        cache.invalidate("/users/1")
+        service.gate.set()
+        await before_write
+
+        assert cache.stats()["entries"] == 0
+        # and a GET after the write doesn't join the outdated one
+        service.gate = None
+        await cache.get(KEY, service.fetch)
+        assert service.requests == [None, None]
+
+    async def test_least_recently_used_entries_are_dropped(self):
+        cache = ResponseCache(ttls={"/users/*": 30}, max_entries=2)
+        service = Service()
+        for user in (1, 2):
+            await cache.get(ResponseCache.key(f"/users/{user}"), service.fetch)
+        await cache.get(ResponseCache.key("/users/1"), service.fetch)
+
+        await cache.get(ResponseCache.key("/users/3"), service.fetch)
+
+        assert [key[0] for key in cache._entries] == ["/users/1", "/users/3"]
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import List
+
+import httpx
+import pytest
+
+from app.core import retry_util
+from app.core.retry_util import (
+    ExternalServiceError,
+    RateLimitError,
+    RetryBudget,
+    RetryPolicy,
+    async_retry,
+    parse_retry_after,
+)
+
+
+class FakeAsyncio:
+    """Stands in for retry_util's asyncio, recording waits instead of sleeping"""
+
+    def __init__(self):
+        self.waits: List[float] = []
+
+    async def sleep(self, seconds: float):
+        self.waits.append(seconds)
+
+
+@pytest.fixture
+def waits(monkeypatch) -> List[float]:
+    fake = FakeAsyncio()
+    monkeypatch.setattr(retry_util, "asyncio", fake)
+    return fake.waits
+
+
+class Flaky:
+    """Fails with the given errors, then returns "ok" """
+
+    def __init__(self, *errors: BaseException):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def not_sent() -> ExternalServiceError:
+    try:
+        raise httpx.ConnectError("connection refused")
+    except httpx.ConnectError as cause:
+        error = ExternalServiceError("HTTP error")
+        error.__cause__ = cause
+        return error
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("120") == 120
+        assert parse_retry_after("-5") == 0
+
+    def test_http_date(self):
+        moment = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        assert parse_retry_after(format_datetime(moment, usegmt=True)) == pytest.approx(30, abs=2)
+
+    def test_missing_or_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("") is None
+        assert parse_retry_after("soon") is None
+
+
+class TestRetryPolicy:
+    """When and how long to wait before retrying"""
+
+    def test_full_jitter_backoff(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=4)
+
+        for attempt, ceiling in ((1, 0.5), (2, 1), (3, 2), (4, 4), (10, 4)):
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            assert all(0 <= delay <= ceiling for delay in delays)
+            assert max(delays) > ceiling / 2
+
+    def test_retry_after_is_honoured(self):
+        policy = RetryPolicy(base_delay=0.5, max_retry_after=60)
+
+        assert 10 <= policy.delay(1, RateLimitError("429", status_code=429, retry_after=10)) <= 10.5
+        assert policy.delay(1, RateLimitError("429", status_code=429, retry_after=61)) is None
+
+    @pytest.mark.parametrize("error, retryable", [
+        (ExternalServiceError("503", status_code=503), True),
+        (ExternalServiceError("408", status_code=408), True),
+        (RateLimitError("429", status_code=429), True),
+        (ExternalServiceError("404", status_code=404), False),
+        (ExternalServiceError("422", status_code=422), False),
+        (RateLimitError("local limiter"), False),
+        (httpx.ReadTimeout("timed out"), True),
+        (ValueError("bug"), False),
+    ])
+    def test_retryable_errors(self, error, retryable):
+        assert RetryPolicy().is_retryable(error, method="GET") is retryable
+
+    def test_non_idempotent_methods(self):
+        policy = RetryPolicy()
+        server_error = ExternalServiceError("503", status_code=503)
+
+        assert not policy.is_retryable(server_error, method="POST")
+        assert not policy.is_retryable(httpx.ReadTimeout("timed out"), method="POST")
+        assert policy.is_retryable(server_error, method="POST", idempotent=True)
+        assert policy.is_retryable(server_error, method="PUT")
+        assert policy.is_retryable(RateLimitError("429", status_code=429), method="POST")
+        assert policy.is_retryable(ExternalServiceError("503", status_code=503, retry_after=1), method="POST")
+        assert policy.is_retryable(not_sent(), method="POST")
+
+    async def test_retries_until_success(self, waits):
+        call = Flaky(ExternalServiceError("503", status_code=503), ExternalServiceError("502", status_code=502))
+
+        assert await RetryPolicy(max_attempts=3, base_delay=1).call(call, method="GET") == "ok"
+
+        assert call.calls == 3
+        assert len(waits) == 2
+        assert 0 <= waits[0] <= 1 and 0 <= waits[1] <= 2
+
+    async def test_gives_up_after_max_attempts(self, waits):
+        call = Flaky(*[ExternalServiceError("503", status_code=503)] * 5)
+
+        with pytest.raises(ExternalServiceError):
+            await RetryPolicy(max_attempts=3).call(call)
+
+        assert call.calls == 3
+
+    async def test_waits_for_retry_after(self, waits):
+        call = Flaky(RateLimitError("429", status_code=429, retry_after=7))
+
+        assert await RetryPolicy(base_delay=0.5).call(call, method="POST") == "ok"
+
+        assert 7 <= waits[0] <= 7.5
+
+    async def test_long_retry_after_is_not_waited_on(self, waits):
+        call = Flaky(RateLimitError("429", status_code=429, retry_after=600))
+
+        with pytest.raises(RateLimitError):
+            await RetryPolicy(max_retry_after=60).call(call)
+
+        assert call.calls == 1
+        assert waits == []
+
+    async def test_post_is_not_retried_after_reaching_the_service(self, waits):
+        call = Flaky(ExternalServiceError("503", status_code=503))
+
+        with pytest.raises(ExternalServiceError):
+            await RetryPolicy().call(call, method="POST")
+
+        assert call.calls == 1
+
+    async def test_async_retry_decorator(self, waits):
+        call = Flaky(ConnectionError("reset"))
+
+        @async_retry(max_attempts=2, wait_multiplier=0.1)
+        async def fetch():
+            return await call()
+
+        assert await fetch() == "ok"
+        assert call.calls == 2
+
+
+class TestRetryBudget:
+    """Retries capped at a fraction of requests"""
+
+    @pytest.fixture(autouse=True)
+    def fake_time(self, monkeypatch, clock):
+        monkeypatch.setattr(retry_util, "time", clock)
+
+    def test_requests_deposit_and_retries_withdraw(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=10)
+        budget._tokens = 0
+
+        budget.deposit()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+
+        assert budget.stats() == {"tokens": 0, "retries": 1, "exhausted": 1}
+
+    def test_trickle_refill_up_to_max(self, clock):
+        budget = RetryBudget(ratio=0.1, min_per_second=1, max_tokens=5)
+        budget._tokens = 0
+
+        clock.advance(2)
+        assert budget.stats()["tokens"] == 2
+        clock.advance(60)
+        assert budget.stats()["tokens"] == 5
+
+    async def test_exhausted_budget_stops_retries(self, waits):
+        budget = RetryBudget(ratio=0.1, min_per_second=0, max_tokens=2)
+        policy = RetryPolicy(max_attempts=5)
+        calls = []
+
+        for _ in range(3):
+            call = Flaky(*[ExternalServiceError("503", status_code=503)] * 10)
+            with pytest.raises(ExternalServiceError):
+                await policy.call(call, budget=budget)
+            calls.append(call.calls)
+
+        # two retries in the budget: the first request spends them both
+        assert calls == [3, 1, 1]
+        assert budget.retries == 2
+        assert budget.exhausted == 3
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import pytest
+
+from app.core.table_partitions import (
+    PartitionedTable,
+    TablePartitionManager,
+    next_partition_start,
+    parse_partition_name,
+    partition_name,
+    partition_start,
+)
+
+NOW = datetime(2025, 7, 30, 15, 30, tzinfo=timezone.utc)
+
+
+class FakePartitionManager(TablePartitionManager):
+    """Keeps partitions in a dict and records DDL instead of running it"""
+
+    def __init__(self, tables: List[PartitionedTable], premake_days: int = 3, **kwargs):
+        super().__init__(tables, premake_days=premake_days, bind=None, **kwargs)
+        self.partitions: Dict[str, Dict[str, datetime]] = {name: {} for name in self.tables}
+        self.statements: List[str] = []
+        self.failing: List[str] = []
+
+    def list_partitions(self, table_name: str) -> Dict[str, datetime]:
+        return dict(sorted(self.partitions[table_name].items(), key=lambda partition: partition[1]))
+
+    def _execute(self, statement: str):
+        if any(name in statement for name in self.failing):
+            raise RuntimeError("lock timeout")
+        self.statements.append(statement)
+        for table in self.tables.values():
+            if statement.startswith(f'CREATE TABLE IF NOT EXISTS "{table.name}_p'):
+                name = statement.split('"')[1]
+                self.partitions[table.name][name] = parse_partition_name(table.name, name, table.interval)
+            elif statement.startswith("DROP TABLE"):
+                self.partitions[table.name].pop(statement.split('"')[1], None)
+
+
+class TestPartitionNames:
+    """Partition bounds and names"""
+
+    def test_partition_start(self):
+        assert partition_start(NOW, "day") == datetime(2025, 7, 30, tzinfo=timezone.utc)
+        assert partition_start(NOW, "month") == datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+    def test_partition_start_is_utc(self):
+        lagos = datetime(2025, 7, 31, 0, 30, tzinfo=timezone(timedelta(hours=1)))
+
+        assert partition_start(lagos, "day") == datetime(2025, 7, 30, tzinfo=timezone.utc)
+
+    def test_next_partition_start(self):
+        assert next_partition_start(datetime(2025, 12, 31, tzinfo=timezone.utc), "day") == datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert next_partition_start(datetime(2025, 1, 1, tzinfo=timezone.utc), "month") == datetime(2025, 2, 1, tzinfo=timezone.utc)
+        assert next_partition_start(datetime(2025, 12, 1, tzinfo=timezone.utc), "month") == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def test_names_round_trip(self):
+        day = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+        assert partition_name("webhook_events", day, "day") == "webhook_events_p20250701"
+        assert partition_name("audit_logs", day, "month") == "audit_logs_p202507"
+        assert parse_partition_name("webhook_events", "webhook_events_p20250701", "day") == day
+        assert parse_partition_name("audit_logs", "audit_logs_p202507", "month") == day
+
+    def test_other_children_are_not_managed(self):
+        assert parse_partition_name("webhook_events", "webhook_events_default", "day") is None
+        assert parse_partition_name("webhook_events", "processed_events_p20250701", "day") is None
+
+
+class TestTablePartitionManager:
+    """Creating and dropping partitions"""
+
+    def test_unsupported_interval(self):
+        with pytest.raises(ValueError):
+            FakePartitionManager([PartitionedTable("webhook_events", interval="week")])
+
+    def test_ensure_partitions_premakes_ahead(self):
+        manager = FakePartitionManager([PartitionedTable("webhook_events")])
+
+        created = manager.ensure_partitions(NOW)
+
+        assert created == {"webhook_events": [
+            "webhook_events_p20250730",
+            "webhook_events_p20250731",
+            "webhook_events_p20250801",
+            "webhook_events_p20250802",
+        ]}
+        assert manager.statements[0] == 'CREATE TABLE IF NOT EXISTS "webhook_events_default" PARTITION OF "webhook_events" DEFAULT'
+        assert (
+            'CREATE TABLE IF NOT EXISTS "webhook_events_p20250731" PARTITION OF "webhook_events" '
+            "FOR VALUES FROM ('2025-07-31T00:00:00+00:00') TO ('2025-08-01T00:00:00+00:00')"
+        ) in manager.statements
+
+    def test_ensure_partitions_skips_existing(self):
+        manager = FakePartitionManager([PartitionedTable("webhook_events")])
+        manager.ensure_partitions(NOW)
+
+        created = manager.ensure_partitions(datetime(2025, 7, 31, 15, tzinfo=timezone.utc))
+
+        assert created == {"webhook_events": ["webhook_events_p20250803"]}
+
+    def test_monthly_partitions(self):
+        manager = FakePartitionManager([PartitionedTable("audit_logs", interval="month")], premake_days=14)
+
+        created = manager.ensure_partitions(NOW)
+
+        assert created == {"audit_logs": ["audit_logs_p202507", "audit_logs_p202508"]}
+
+    def test_failed_partition_does_not_stop_the_others(self):
+        manager = FakePartitionManager([PartitionedTable("webhook_events")])
+        manager.failing = ["webhook_events_p20250731"]
+
+        created = manager.ensure_partitions(NOW)
+
+        assert "webhook_events_p20250731" not in created["webhook_events"]
+        assert "webhook_events_p20250801" in created["webhook_events"]
+
+    def test_drop_expired_partitions(self):
+        manager = FakePartitionManager([PartitionedTable("webhook_events", retention_days=2)])
+        manager.ensure_partitions(datetime(2025, 7, 25, tzinfo=timezone.utc))
+
+        dropped = manager.drop_expired_partitions(now=NOW)
+
+        # 07-27 ends at 07-28 00:00, at or before the cutoff of 07-28 15:30;
+        # 07-28 still holds rows newer than the cutoff
+        assert dropped == {"webhook_events": [
+            "webhook_events_p20250725",
+            "webhook_events_p20250726",
+            "webhook_events_p20250727",
+        ]}
+        assert 'ALTER TABLE "webhook_events" DETACH PARTITION "webhook_events_p20250725"' in manager.statements
+        assert "webhook_events_p20250728" in manager.partitions["webhook_events"]
+
+    def test_detach_concurrently(self):
+        manager = FakePartitionManager([PartitionedTable("webhook_events", retention_days=1)], detach_concurrently=True)
+        manager.ensure_partitions(datetime(2025, 7, 25, tzinfo=timezone.utc))
+
+        manager.drop_expired_partitions(now=NOW)
+
+        assert 'ALTER TABLE "webhook_events" DETACH PARTITION "webhook_events_p20250725" CONCURRENTLY' in manager.statements
+
+    def test_tables_without_retention_keep_everything(self):
+        manager = FakePartitionManager([PartitionedTable("audit_logs", interval="month")])
+        manager.ensure_partitions(datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+        assert manager.drop_expired_partitions(now=NOW) == {}
+        assert manager.drop_expired_partitions("audit_logs", retention_days=30, now=NOW) == {
+            "audit_logs": ["audit_logs_p202001"]
+        }
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Set
+
+import fakeredis
+import pytest
+
+from app.core import tenant_cache as tenant_cache_module
+from app.core.tenant_cache import TenantCache
+
+TENANT = str(uuid.uuid4())
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    """Sync and async clients on one fake server, like two views of one Redis"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(tenant_cache_module, "redis_client", fakeredis.FakeRedis(server=server, decode_responses=True))
+    client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(tenant_cache_module, "async_redis_client", client)
+    return client
+
+
+class FakeTenants:
+    """The tenants table: ids of active tenants, plus what the queries looked like"""
+
+    def __init__(self):
+        self.active: Set[str] = set()
+        self.queries = 0
+        self.criteria = []
+        self.threads = set()
+
+    @contextmanager
+    def session(self):
+        tenants = self
+
+        class Query:
+            def filter(self, *criteria):
+                tenants.criteria.extend(str(c) for c in criteria)
+                return self
+
+            def all(self):
+                tenants.queries += 1
+                tenants.threads.add(threading.get_ident())
+                return [SimpleNamespace(id=uuid.UUID(tenant_id)) for tenant_id in tenants.active]
+
+        yield SimpleNamespace(query=lambda *columns: Query())
+
+
+@pytest.fixture
+def tenants(monkeypatch) -> FakeTenants:
+    tenants = FakeTenants()
+    monkeypatch.setattr(tenant_cache_module, "get_db_session", tenants.session)
+    return tenants
+
+
+@pytest.fixture
+async def caches():
+    """Two processes' caches; their invalidation listeners are stopped afterwards"""
+    created = [TenantCache(ttl_seconds=300, negative_ttl_seconds=30) for _ in range(2)]
+    yield created
+    for cache in created:
+        if cache._listener:
+            cache._listener.cancel()
+            await asyncio.gather(cache._listener, return_exceptions=True)
+
+
+async def settle():
+    """Let the invalidation listeners subscribe or receive"""
+    await asyncio.sleep(0.05)
+
+
+class TestTenantCache:
+    """Tenant existence across processes"""
+
+    async def test_only_active_tenants_are_loaded_off_the_event_loop(self, tenants, caches):
+        tenants.active.add(TENANT)
+
+        assert await caches[0].exists(TENANT)
+
+        assert any("is_active" in criterion for criterion in tenants.criteria)
+        assert threading.get_ident() not in tenants.threads
+
+    async def test_lookups_are_cached(self, tenants, caches, redis):
+        tenants.active.add(TENANT)
+        missing = str(uuid.uuid4())
+
+        assert await caches[0].exists_many([TENANT, missing, "not-a-uuid"]) == {TENANT}
+        assert await caches[0].exists_many([TENANT, missing]) == {TENANT}
+        # a second process answers from Redis
+        assert await caches[1].exists_many([TENANT, missing]) == {TENANT}
+
+        assert tenants.queries == 1
+        assert await redis.sismember("tenants:valid", TENANT)
+        assert await redis.exists(f"tenants:missing:{missing}")
+
+    async def test_deactivation_reaches_every_process(self, tenants, caches):
+        tenants.active.add(TENANT)
+        assert await caches[0].exists(TENANT)
+        assert await caches[1].exists(TENANT)
+        await settle()
+
+        tenants.active.discard(TENANT)
+        caches[0].publish_change(TENANT, exists=False)
+        await settle()
+
+        assert not await caches[1].exists(TENANT)
+        assert not await caches[0].exists(TENANT)
+
+    async def test_created_tenant_replaces_a_negative_entry(self, tenants, caches):
+        assert not await caches[0].exists(TENANT)
+        assert not await caches[1].exists(TENANT)
+        await settle()
+
+        tenants.active.add(TENANT)
+        caches[0].publish_change(TENANT, exists=True)
+        await settle()
+
+        assert await caches[1].exists(TENANT)
+        # known from Redis, no new query needed
+        assert tenants.queries == 1
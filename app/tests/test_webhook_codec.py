@@ -0,0 +1,120 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.integrations.webhook_codec import UnknownEventTypeError, webhook_codec
+from app.schemas.webhooks import PaymentEventData, UserEventData, WebhookSource
+
+
+def user_body(**data) -> bytes:
+    return json.dumps({
+        "event_type": "user.created",
+        "event_id": "evt_1",
+        "timestamp": "2025-07-01T12:00:00Z",
+        "tenant_id": "tenant-1",
+        "data": {"id": "usr_1", "email": "a@example.com", **data},
+    }).encode()
+
+
+class TestWebhookCodec:
+    """Decoding webhook bodies into typed payloads and back"""
+
+    def test_decode_typed_fields(self):
+        payload = webhook_codec.decode(user_body(name="Ada"), WebhookSource.USER_MANAGEMENT)
+
+        assert payload.event_type == "user.created"
+        assert payload.event_id == "evt_1"
+        assert payload.tenant_id == "tenant-1"
+        assert payload.timestamp == datetime(2025, 7, 1, 12, tzinfo=timezone.utc)
+        assert isinstance(payload.data, UserEventData)
+        assert payload.data.email == "a@example.com"
+        assert payload.data["name"] == "Ada"
+
+    def test_unknown_data_fields_are_kept(self):
+        payload = webhook_codec.decode(user_body(plan_tier="gold", flags={"beta": True}), WebhookSource.USER_MANAGEMENT)
+
+        assert payload.data.extra == {"plan_tier": "gold", "flags": {"beta": True}}
+        assert payload.data["plan_tier"] == "gold"
+        assert payload.data.get("missing", "default") == "default"
+        with pytest.raises(KeyError):
+            payload.data["missing"]
+
+    def test_data_dict_is_the_body_as_sent(self):
+        body = user_body(plan_tier="gold", status=None)
+
+        payload = webhook_codec.decode(body, WebhookSource.USER_MANAGEMENT)
+
+        assert payload.raw_payload == body
+        assert payload.data_dict() == {"id": "usr_1", "email": "a@example.com", "plan_tier": "gold", "status": None}
+
+    def test_unknown_event_type_is_rejected_before_parsing_the_body(self):
+        # data that no schema would accept
+        body = b'{"event_type": "user.teleported", "data": []}'
+
+        with pytest.raises(UnknownEventTypeError):
+            webhook_codec.decode(body, WebhookSource.USER_MANAGEMENT)
+
+    def test_to_dict_merges_extras_and_drops_unset_fields(self):
+        data = PaymentEventData(id="pay_1", amount=9.5, extra={"gateway": "stripe"})
+
+        assert data.to_dict() == {"id": "pay_1", "amount": 9.5, "gateway": "stripe"}
+
+    def test_unknown_event_type(self):
+        body = json.dumps({"event_type": "user.teleported", "data": {}}).encode()
+
+        with pytest.raises(UnknownEventTypeError):
+            webhook_codec.decode(body, WebhookSource.USER_MANAGEMENT)
+
+        with pytest.raises(UnknownEventTypeError):
+            webhook_codec.decode(b'{"data": {}}', WebhookSource.USER_MANAGEMENT)
+
+    def test_missing_timestamp_defaults_to_now(self):
+        body = json.dumps({"event_type": "user.created", "event_id": "evt_1", "data": {}}).encode()
+
+        payload = webhook_codec.decode(body, WebhookSource.USER_MANAGEMENT)
+
+        assert (datetime.now(timezone.utc) - payload.timestamp).total_seconds() < 5
+
+    def test_encode_round_trip(self):
+        payload = webhook_codec.decode(user_body(plan_tier="gold"), WebhookSource.USER_MANAGEMENT)
+
+        decoded = webhook_codec.decode_payload(webhook_codec.encode_payload(payload))
+
+        assert decoded.source == WebhookSource.USER_MANAGEMENT
+        assert decoded.event_id == payload.event_id
+        assert decoded.timestamp == payload.timestamp
+        assert decoded.data.email == "a@example.com"
+        assert decoded.data["plan_tier"] == "gold"
+        assert decoded.data_dict() == payload.data_dict()
+        assert decoded.raw_payload == payload.raw_payload
+
+    def test_decode_payload_from_dict(self):
+        decoded = webhook_codec.decode_payload({
+            "source": "payment_service",
+            "event_type": "payment.success",
+            "event_id": "evt_2",
+            "timestamp": "2025-07-01T12:00:00+00:00",
+            "data": {"amount": 20.0, "currency": "USD", "gateway": "stripe"},
+            "tenant_id": "tenant-1",
+        })
+
+        assert decoded.source == WebhookSource.PAYMENT_SERVICE
+        assert isinstance(decoded.data, PaymentEventData)
+        assert decoded.data.amount == 20.0
+        assert decoded.data["gateway"] == "stripe"
+
+    def test_split_json_array_batch(self):
+        events = [json.loads(user_body()), json.loads(user_body(name="Grace"))]
+
+        parts = list(webhook_codec.split_batch(json.dumps(events).encode()))
+
+        assert [json.loads(part) for part in parts] == events
+
+    def test_split_ndjson_batch(self):
+        body = user_body() + b"\n\n" + user_body(name="Grace") + b"\n"
+
+        parts = list(webhook_codec.split_batch(body))
+
+        assert len(parts) == 2
+        assert webhook_codec.decode(parts[1], WebhookSource.USER_MANAGEMENT).data.name == "Grace"
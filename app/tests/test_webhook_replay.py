@@ -0,0 +1,196 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from app.schemas.webhooks import ProcessingResult, WebhookPayload
+from app.services import webhook_replay
+from app.services.webhook_replay import ReplayFilter, WebhookReplayer
+
+
+def stored_event(number: int, event_type: str = "payment.success") -> SimpleNamespace:
+    """A webhook_events row as selected by WebhookReplayer._query"""
+    return SimpleNamespace(
+        id=f"row-{number}",
+        service_name="payment_service",
+        event_type=event_type,
+        tenant_id="tenant-1",
+        payload={"amount": number, "gateway": "stripe"},
+        event_id=f"evt_{number}",
+        event_timestamp=f"2025-07-01T12:00:{number:02d}+00:00",
+        created_at=datetime(2025, 7, 2, tzinfo=timezone.utc),
+    )
+
+
+class FakeResult:
+    def __init__(self, rows: list, fetch_size: int):
+        self.rows = rows
+        self.fetch_size = fetch_size
+
+    def partitions(self):
+        for i in range(0, len(self.rows), self.fetch_size):
+            yield self.rows[i:i + self.fetch_size]
+
+
+@pytest.fixture
+def stored(monkeypatch) -> List[SimpleNamespace]:
+    """Rows the replayer's session returns, fetch_size at a time"""
+    rows: List[SimpleNamespace] = []
+
+    @contextmanager
+    def get_db_session():
+        yield SimpleNamespace(execute=lambda query: FakeResult(rows, query.get_execution_options()["yield_per"]))
+
+    monkeypatch.setattr(webhook_replay, "get_db_session", get_db_session)
+    return rows
+
+
+class Dispatcher:
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.payloads: List[WebhookPayload] = []
+
+    async def __call__(self, payload: WebhookPayload):
+        self.payloads.append(payload)
+        result = self.results.get(payload.event_id, ProcessingResult(success=True))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestWebhookReplayer:
+    """Re-driving stored webhook events through the pipeline"""
+
+    async def test_events_keep_their_original_identity(self, stored):
+        stored.extend(stored_event(i) for i in range(1, 4))
+        dispatch = Dispatcher()
+
+        report = await WebhookReplayer(dispatch=dispatch, fetch_size=2).run(ReplayFilter())
+
+        assert report.status == "completed"
+        assert report.selected == report.dispatched == report.succeeded == 3
+        assert sorted(p.event_id for p in dispatch.payloads) == ["evt_1", "evt_2", "evt_3"]
+        first = next(p for p in dispatch.payloads if p.event_id == "evt_1")
+        assert first.timestamp == datetime(2025, 7, 1, 12, 0, 1, tzinfo=timezone.utc)
+        assert first.data.amount == 1
+        assert first.data["gateway"] == "stripe"
+
+    async def test_report_counts_failures_and_skips(self, stored):
+        stored.extend([stored_event(1), stored_event(2), stored_event(3), stored_event(4), stored_event(5, "unknown.event")])
+        dispatch = Dispatcher({
+            "evt_2": ProcessingResult(success=False, error_message="handler failed"),
+            "evt_3": ProcessingResult(success=True, metadata={"skipped": "duplicate_event"}),
+            "evt_4": RuntimeError("boom"),
+        })
+
+        report = await WebhookReplayer(dispatch=dispatch).run(ReplayFilter())
+
+        assert report.to_dict()["selected"] == 5
+        assert report.dispatched == 4
+        assert report.succeeded == 1
+        assert report.failed == 2
+        # the duplicate, and the row whose event type can't be decoded
+        assert report.skipped == 2
+
+    async def test_events_no_handler_ran_are_not_successes(self, stored):
+        stored.extend(stored_event(i) for i in range(1, 3))
+        dispatch = Dispatcher({
+            "evt_1": ProcessingResult(success=True, metadata={"skipped": "no_handler"}),
+        })
+
+        report = await WebhookReplayer(dispatch=dispatch).run(ReplayFilter())
+
+        assert report.succeeded == 1
+        assert report.skipped == 1
+
+    async def test_bypass_dedup_releases_claims_first(self, stored, monkeypatch):
+        stored.extend(stored_event(i) for i in range(1, 3))
+        released = []
+
+        async def release_claims(payloads):
+            released.extend(p.event_id for p in payloads)
+
+        monkeypatch.setattr(webhook_replay.processing_pipeline, "release_claims", release_claims)
+
+        await WebhookReplayer(dispatch=Dispatcher(), bypass_dedup=True).run(ReplayFilter())
+
+        assert released == ["evt_1", "evt_2"]
+
+    async def test_concurrency_is_bounded(self, stored):
+        stored.extend(stored_event(i) for i in range(1, 11))
+        running = peak = 0
+
+        async def dispatch(payload):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ProcessingResult(success=True)
+
+        report = await WebhookReplayer(dispatch=dispatch, concurrency=3).run(ReplayFilter())
+
+        assert report.succeeded == 10
+        assert peak == 3
+
+    async def test_cancelled_replay(self, stored):
+        stored.extend(stored_event(i) for i in range(1, 4))
+        started = asyncio.Event()
+
+        async def dispatch(payload):
+            started.set()
+            await asyncio.sleep(10)
+
+        report = webhook_replay.ReplayReport(replay_id="replay-1")
+        task = asyncio.create_task(WebhookReplayer(dispatch=dispatch, concurrency=1).run(ReplayFilter(), report))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert report.status == "cancelled"
+        assert report.finished_at is not None
+
+    def test_filters(self):
+        query = WebhookReplayer()._query(ReplayFilter(
+            sources=["payment_service"],
+            statuses=["failed"],
+            since=datetime(2025, 7, 1, tzinfo=timezone.utc),
+            limit=10
+        ))
+        sql = str(query.compile(compile_kwargs={"literal_binds": True}))
+
+        assert "webhook_events.service_name IN ('payment_service')" in sql
+        assert "webhook_events.status IN ('failed')" in sql
+        assert "webhook_events.created_at >=" in sql
+        assert "ORDER BY webhook_events.created_at" in sql
+        assert "LIMIT 10" in sql
+
+
+class TestReplayManager:
+    """Background replays started from the admin API"""
+
+    async def test_reports_are_capped_keeping_running_replays(self, stored):
+        manager = webhook_replay.ReplayManager(max_reports=2)
+        blocker = asyncio.Event()
+
+        async def dispatch(payload):
+            await blocker.wait()
+
+        stored.append(stored_event(1))
+        running = manager.start(WebhookReplayer(dispatch=dispatch), ReplayFilter())
+        await asyncio.sleep(0.05)
+        stored.clear()
+        finished = []
+        for _ in range(3):
+            finished.append(manager.start(WebhookReplayer(dispatch=Dispatcher()), ReplayFilter()))
+            await asyncio.sleep(0.05)
+
+        assert list(manager.reports) == [running.replay_id, finished[2].replay_id]
+
+        blocker.set()
+        await asyncio.sleep(0.05)
+        assert running.status == "completed"
@@ -0,0 +1,101 @@
+import hashlib
+import hmac
+
+import pytest
+
+from app.integrations.webhook_signature import SignatureVerifier, WebhookSignatureError
+from app.schemas.webhooks import WebhookConfig, WebhookSource
+
+SOURCE = WebhookSource.PAYMENT_SERVICE
+BODY = b'{"event_type": "payment.success", "data": {"amount": 10}}'
+
+
+def sign(secret: str, body: bytes = BODY, algorithm: str = "sha256") -> str:
+    return f"{algorithm}=" + hmac.new(secret.encode(), body, algorithm).hexdigest()
+
+
+@pytest.fixture
+def config() -> WebhookConfig:
+    return WebhookConfig(source=SOURCE, secret_key="new-secret", accepted_algorithms=["sha256", "sha1"])
+
+
+@pytest.fixture
+def verifier(config: WebhookConfig) -> SignatureVerifier:
+    verifier = SignatureVerifier()
+    verifier.register(config)
+    return verifier
+
+
+class TestSignatureVerifier:
+    """HMAC verification and secret rotation"""
+
+    def test_valid_signature(self, verifier: SignatureVerifier):
+        assert verifier.verify(SOURCE, BODY, sign("new-secret"))
+        assert verifier.get_stats() == {"payment_service": {"key_0": 1}}
+
+    def test_bare_hex_uses_the_default_algorithm(self, verifier: SignatureVerifier):
+        assert verifier.verify(SOURCE, BODY, hmac.new(b"new-secret", BODY, hashlib.sha256).hexdigest())
+
+    def test_accepted_algorithm(self, verifier: SignatureVerifier):
+        assert verifier.verify(SOURCE, BODY, sign("new-secret", algorithm="sha1"))
+
+    def test_wrong_secret_or_body(self, verifier: SignatureVerifier):
+        assert not verifier.verify(SOURCE, BODY, sign("other-secret"))
+        assert not verifier.verify(SOURCE, BODY + b" ", sign("new-secret"))
+        assert verifier.get_stats() == {"payment_service": {"invalid": 2}}
+
+    def test_algorithm_not_accepted(self, verifier: SignatureVerifier):
+        with pytest.raises(WebhookSignatureError):
+            verifier.verify(SOURCE, BODY, sign("new-secret", algorithm="sha512"))
+
+    def test_malformed_signature(self, verifier: SignatureVerifier):
+        with pytest.raises(WebhookSignatureError):
+            verifier.verify(SOURCE, BODY, "sha256=not-hex")
+
+    def test_unsupported_algorithm_rejected_at_registration(self):
+        with pytest.raises(ValueError):
+            SignatureVerifier().register(WebhookConfig(source=SOURCE, secret_key="s", accepted_algorithms=["md5"]))
+
+    def test_rotation_accepts_old_and_new_secrets(self, verifier: SignatureVerifier, config: WebhookConfig):
+        verifier.rotate(config, ["newer-secret", "new-secret"])
+
+        assert verifier.verify(SOURCE, BODY, sign("newer-secret"))
+        assert verifier.verify(SOURCE, BODY, sign("new-secret"))
+        assert verifier.get_stats() == {"payment_service": {"key_0": 1, "key_1": 1}}
+
+    def test_rotation_retires_dropped_secrets(self, verifier: SignatureVerifier, config: WebhookConfig):
+        verifier.rotate(config, ["newer-secret"])
+
+        assert not verifier.verify(SOURCE, BODY, sign("new-secret"))
+
+    def test_secret_that_matched_last_is_tried_first(self, verifier: SignatureVerifier, config: WebhookConfig):
+        verifier.rotate(config, ["newer-secret", "new-secret"])
+        verifier.verify(SOURCE, BODY, sign("new-secret"))
+
+        assert verifier._preferred[SOURCE] == 1
+        assert verifier.start(SOURCE, sign("new-secret"))._first == 1
+
+    def test_streamed_check_with_the_preferred_secret(self, verifier: SignatureVerifier):
+        check = verifier.start(SOURCE, sign("new-secret"))
+        for i in range(0, len(BODY), 7):
+            check.update(BODY[i:i + 7])
+
+        assert check.verify(BODY)
+        assert check.matched_key == 0
+
+    def test_streamed_check_falls_back_to_other_secrets(self, verifier: SignatureVerifier, config: WebhookConfig):
+        verifier.rotate(config, ["newer-secret", "new-secret"])
+        check = verifier.start(SOURCE, sign("new-secret"))
+        check.update(BODY)
+
+        assert check.verify(BODY)
+        assert check.matched_key == 1
+        # the next request streams with the secret that matched
+        assert verifier.start(SOURCE, sign("new-secret"))._first == 1
+
+    def test_streamed_check_without_body_only_tries_one_secret(self, verifier: SignatureVerifier, config: WebhookConfig):
+        verifier.rotate(config, ["newer-secret", "new-secret"])
+        check = verifier.start(SOURCE, sign("new-secret"))
+        check.update(BODY)
+
+        assert not check.verify()
@@ -0,0 +1,100 @@
+import json
+
+import fakeredis
+import pytest
+
+from app.integrations import webhook_stream
+from app.integrations.webhook_stream import WebhookStreamConsumer, append_webhook, dead_letter_key, stream_key
+from app.schemas.webhooks import ProcessingResult, WebhookSource
+
+SOURCE = WebhookSource.PAYMENT_SERVICE
+BODY = json.dumps({
+    "event_type": "payment.success",
+    "event_id": "evt_1",
+    "timestamp": "2025-07-01T12:00:00Z",
+    "tenant_id": "tenant-1",
+    "data": {"amount": 10.0},
+}).encode()
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(webhook_stream, "async_redis_client", client)
+    return client
+
+
+@pytest.fixture
+def outcome(monkeypatch):
+    """What the scheduler returns for every dispatched event"""
+    outcome = {"result": ProcessingResult(success=True)}
+
+    async def submit(payload, dispatch):
+        result = outcome["result"]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(webhook_stream.tenant_scheduler, "submit", submit)
+    return outcome
+
+
+async def deliver(consumer: WebhookStreamConsumer, redis, body: bytes = BODY):
+    """Append a webhook, read it as the consumer and handle it"""
+    await consumer.ensure_groups()
+    await append_webhook(SOURCE, body, {})
+    [(_, [(entry_id, fields)])] = await redis.xreadgroup(consumer.group, consumer.consumer_name, {stream_key(SOURCE): ">"})
+    await consumer.handle_entry(SOURCE, entry_id, fields)
+    return entry_id
+
+
+async def pending(consumer: WebhookStreamConsumer, redis) -> int:
+    return (await redis.xpending(stream_key(SOURCE), consumer.group))["pending"]
+
+
+class TestWebhookStreamConsumer:
+    """Acknowledging stream entries"""
+
+    async def test_processed_entry_is_acked(self, redis, outcome):
+        consumer = WebhookStreamConsumer(sources=[SOURCE])
+
+        await deliver(consumer, redis)
+
+        assert await pending(consumer, redis) == 0
+        assert await redis.xlen(dead_letter_key(SOURCE)) == 0
+
+    async def test_failed_entry_stays_pending(self, redis, outcome):
+        consumer = WebhookStreamConsumer(sources=[SOURCE])
+        outcome["result"] = ProcessingResult(success=False, error_message="handler failed")
+
+        await deliver(consumer, redis)
+
+        assert await pending(consumer, redis) == 1
+
+    async def test_dispatch_error_leaves_entry_pending(self, redis, outcome):
+        consumer = WebhookStreamConsumer(sources=[SOURCE])
+        outcome["result"] = RuntimeError("database down")
+
+        await deliver(consumer, redis)
+
+        assert await pending(consumer, redis) == 1
+
+    async def test_entry_without_handler_is_dead_lettered(self, redis, outcome):
+        consumer = WebhookStreamConsumer(sources=[SOURCE])
+        outcome["result"] = ProcessingResult(success=True, metadata={"skipped": "no_handler"})
+
+        entry_id = await deliver(consumer, redis)
+
+        [(_, fields)] = await redis.xrange(dead_letter_key(SOURCE))
+        assert fields["original_id"] == entry_id
+        assert fields["error"] == "no handler for payment.success"
+        assert webhook_stream.entry_body(fields) == BODY
+        assert await pending(consumer, redis) == 0
+
+    async def test_unparseable_entry_is_dead_lettered(self, redis, outcome):
+        consumer = WebhookStreamConsumer(sources=[SOURCE])
+
+        await deliver(consumer, redis, b"not json")
+
+        assert await redis.xlen(dead_letter_key(SOURCE)) == 1
+        assert await pending(consumer, redis) == 0